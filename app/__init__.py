@@ -1,39 +1,134 @@
-"""Main Litestar application for library management."""
-
-from litestar.app import Litestar
-from litestar.openapi import OpenAPIConfig
-from litestar.openapi.plugins import ScalarRenderPlugin, SwaggerRenderPlugin
-
-from app.config import settings
-from app.controllers.auth import AuthController
-from app.controllers.book import BookController
-from app.controllers.category import CategoryController
-from app.controllers.loan import LoanController
-from app.controllers.review import ReviewController
-from app.controllers.user import UserController
-from app.db import sqlalchemy_plugin
-from app.security import oauth2_auth
-
-openapi_config = OpenAPIConfig(
-    title="Mi API",
-    version="0.1",
-    render_plugins=[
-        ScalarRenderPlugin(),
-        SwaggerRenderPlugin(),
-    ],
-)
-
-app = Litestar(
-    route_handlers=[
+"""Main Litestar application for library management.
+
+The application is built on first access to ``app.app`` (or through
+:func:`create_app`), so importing ``app.config`` or ``app.models`` from Alembic,
+the CLI or scripts doesn't pay for controller imports and DTO code generation.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from litestar.app import Litestar
+    from litestar.openapi import OpenAPIConfig
+
+
+def create_openapi_config() -> OpenAPIConfig | None:
+    """OpenAPI config, or ``None`` to drop the ``/schema`` routes (``OPENAPI_ENABLED=false``).
+
+    Litestar only generates the schema on the first ``/schema`` request.
+    """
+    from litestar.openapi import OpenAPIConfig
+    from litestar.openapi.plugins import ScalarRenderPlugin, SwaggerRenderPlugin
+
+    from app.config import settings
+
+    if not settings.openapi_enabled:
+        return None
+
+    return OpenAPIConfig(
+        title="Mi API",
+        version="0.1",
+        render_plugins=[
+            ScalarRenderPlugin(),
+            SwaggerRenderPlugin(),
+        ],
+    )
+
+
+def create_app() -> Litestar:
+    """Build the Litestar application."""
+    from litestar.app import Litestar
+
+    from app.analytics import analytics_refresher
+    from app.catalog import catalog_reconciler
+    from app.cli import LibraryCLIPlugin
+    from app.config import settings
+    from app.controllers.analytics import AnalyticsController
+    from app.controllers.auth import AuthController
+    from app.controllers.book import BookController
+    from app.controllers.category import CategoryController
+    from app.controllers.events import EventsController
+    from app.controllers.loan import LoanController
+    from app.controllers.review import ReviewController
+    from app.controllers.user import UserController
+    from app.db import sqlalchemy_plugin
+    from app.events import live_events_lifespan
+    from app.outbox import outbox_worker
+    from app.passwords import password_params_refresher
+    from app.security import oauth2_auth, token_version_refresher
+    from app.sqlite import sqlite_maintenance
+    from app.trending import trending_flusher
+
+    route_handlers: list[Any] = [
         UserController,
         BookController,
         CategoryController,
         ReviewController,
         LoanController,
         AuthController,
-    ],
-    openapi_config=openapi_config,
-    debug=settings.debug,
-    plugins=[sqlalchemy_plugin],
-    on_app_init=[oauth2_auth.on_app_init],
-)
+        AnalyticsController,
+        EventsController,
+    ]
+    middleware: list[Any] = []
+    lifespan: list[Any] = [
+        password_params_refresher,
+        token_version_refresher,
+        catalog_reconciler,
+        outbox_worker,
+        trending_flusher,
+        analytics_refresher,
+        sqlite_maintenance,
+        live_events_lifespan,
+    ]
+
+    if settings.slow_query_log_enabled:
+        from app.controllers.debug import DebugController
+        from app.slowlog import SlowQueryRouteMiddleware, slow_query_lifespan
+
+        route_handlers.append(DebugController)
+        middleware.append(SlowQueryRouteMiddleware)
+        lifespan.append(slow_query_lifespan)
+
+    if settings.metrics_enabled:
+        from app.metrics import MetricsController, metrics_lifespan, prometheus_config
+
+        route_handlers.append(MetricsController)
+        middleware.append(prometheus_config.middleware)
+        lifespan.append(metrics_lifespan)
+
+    if settings.profiling_enabled:
+        from app.profiling import ProfilingMiddleware
+
+        middleware.append(ProfilingMiddleware)
+
+    if settings.single_flight_enabled:
+        from app.singleflight import SingleFlightMiddleware
+
+        middleware.append(SingleFlightMiddleware)
+
+    if settings.concurrency_limit_enabled:
+        from app.limiter import ConcurrencyLimitMiddleware
+
+        # Innermost: limits handler runs, after auth and single-flight
+        middleware.append(ConcurrencyLimitMiddleware)
+
+    return Litestar(
+        route_handlers=route_handlers,
+        openapi_config=create_openapi_config(),
+        debug=settings.debug,
+        plugins=[sqlalchemy_plugin, LibraryCLIPlugin()],
+        middleware=middleware,
+        on_app_init=[oauth2_auth.on_app_init],
+        lifespan=lifespan,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    # ``app:app`` for uvicorn / ``litestar run``: build once, on first access
+    if name == "app":
+        application = create_app()
+        globals()["app"] = application
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,65 @@
+"""Circulation analytics: rollup tables refreshed in the background from a watermark.
+
+Reports under ``/analytics/*`` read only the rollups, never ``loans``:
+
+* ``loan_daily_rollups``: loans per ``loan_dt`` x book x status, with how many
+  went overdue; monthly and per-category figures are sums over these rows.
+* ``fine_monthly_rollups``: returns, late returns and fines per return month x book.
+
+Every ``ANALYTICS_REFRESH_SECONDS`` one worker (the one that locks the
+watermark row) reads the loans whose ``updated_at`` is past the watermark, plus
+the keys of deleted loans, and recomputes only those (day, book) and
+(month, book) keys. ``litestar analytics-backfill`` rebuilds the history.
+"""
+
+from __future__ import annotations
+
+import logging
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import TYPE_CHECKING, AsyncIterator
+
+import anyio
+
+from app.config import settings
+from app.repositories.analytics import AnalyticsRepository
+
+if TYPE_CHECKING:
+    from litestar import Litestar
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_once() -> int | None:
+    """Fold loan changes since the watermark into the rollups; return the keys recomputed."""
+    from app.db import sqlalchemy_config
+
+    with sqlalchemy_config.get_session() as session:
+        return AnalyticsRepository(session=session).refresh(
+            overlap=timedelta(seconds=settings.analytics_refresh_overlap_seconds),
+            batch_size=settings.analytics_refresh_batch_size,
+        )
+
+
+@asynccontextmanager
+async def analytics_refresher(_: Litestar) -> AsyncIterator[None]:
+    """Refresh the rollups in the background while the app runs."""
+    if not settings.analytics_enabled:
+        yield
+        return
+
+    async def refresh_forever() -> None:
+        while True:
+            try:
+                await anyio.to_thread.run_sync(refresh_once)
+            except Exception:
+                # Database unavailable or a concurrent backfill: retried on the next run
+                logger.exception("Fallo al actualizar los resúmenes de circulación; se reintentará")
+            await anyio.sleep(settings.analytics_refresh_seconds)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(refresh_forever)
+        try:
+            yield
+        finally:
+            tg.cancel_scope.cancel()
@@ -0,0 +1,344 @@
+"""In-process catalog snapshot: books, categories and live stock counters.
+
+The busiest read endpoints (``/books/available``, ``/books/{id}``,
+``/books/by-category/{id}``, ``/books/{id}/availability``) are answered from this
+snapshot without SQL when the response only needs catalog fields (book columns
+and categories); responses that include ``loans`` or ``reviews`` still go to the
+database.
+
+The snapshot is loaded on first use, updated in place by the write handlers of
+this worker, and reconciled against the database every
+``CATALOG_CHECK_SECONDS`` so that writes made by other workers converge.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from array import array
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import TYPE_CHECKING, AsyncIterator, Iterable
+
+import anyio
+from sqlalchemy import select
+
+from app.config import settings
+from app.metrics import record_cache_lookup
+from app.models import Book, Category, book_categories
+
+if TYPE_CHECKING:
+    from litestar import Litestar
+    from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_BOOK_COLUMNS = (
+    Book.id,
+    Book.title,
+    Book.author,
+    Book.isbn,
+    Book.pages,
+    Book.published_year,
+    Book.description,
+    Book.language,
+    Book.publisher,
+    Book.created_at,
+    Book.updated_at,
+)
+_CATEGORY_COLUMNS = (Category.id, Category.name, Category.description, Category.created_at, Category.updated_at)
+
+# Fields a snapshot book can serve (everything in BookReadDTO except loans and reviews)
+CATALOG_FIELDS = frozenset(column.key for column in _BOOK_COLUMNS) | {"stock", "categories"}
+
+
+@dataclass(slots=True)
+class CatalogCategory:
+    """Category as held in the snapshot."""
+
+    id: int
+    name: str
+    description: str | None
+    created_at: datetime
+    updated_at: datetime
+
+
+@dataclass(slots=True)
+class CatalogBook:
+    """Book as held in the snapshot; ``stock`` lives in :attr:`CatalogSnapshot.stock`."""
+
+    id: int
+    title: str
+    author: str
+    isbn: str
+    pages: int
+    published_year: int
+    description: str | None
+    language: str | None
+    publisher: str | None
+    created_at: datetime
+    updated_at: datetime
+    slot: int = -1
+    category_ids: tuple[int, ...] = ()
+
+    @property
+    def stock(self) -> int:
+        return catalog.stock[self.slot]
+
+    @property
+    def categories(self) -> list[CatalogCategory]:
+        return [catalog.categories[cid] for cid in self.category_ids if cid in catalog.categories]
+
+
+_CATEGORY_FIELDS = tuple(f.name for f in fields(CatalogCategory))
+
+
+class CatalogSnapshot:
+    """Books by id, category -> book ids, and a stock counter per book slot."""
+
+    __slots__ = ("books", "categories", "by_category", "stock", "loaded", "_lock")
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop the snapshot; it is loaded again on next use."""
+        with self._lock:
+            self.books: dict[int, CatalogBook] = {}
+            self.categories: dict[int, CatalogCategory] = {}
+            self.by_category: dict[int, set[int]] = {}
+            self.stock = array("q")
+            self.loaded = False
+
+    # --- reads (no SQL once loaded) ---
+
+    def ensure_loaded(self) -> bool:
+        """Load the snapshot on first use; ``False`` if it is disabled."""
+        if not settings.catalog_snapshot_enabled:
+            return False
+        if not self.loaded:
+            from app.db import sqlalchemy_config
+
+            with sqlalchemy_config.get_session() as session:
+                self.load(session)
+        return True
+
+    def get(self, book_id: int) -> CatalogBook | None:
+        """Book by id, or ``None`` if it doesn't exist."""
+        book = self.books.get(book_id)
+        record_cache_lookup("catalog", book is not None)
+        return book
+
+    def available(self) -> list[CatalogBook]:
+        """Books with stock > 0, ordered by title."""
+        stock = self.stock
+        return sorted((b for b in self.books.values() if stock[b.slot] > 0), key=lambda b: b.title)
+
+    def in_category(self, category_id: int) -> list[CatalogBook]:
+        """Books of a category, ordered by title."""
+        ids = self.by_category.get(category_id, ())
+        return sorted((self.books[i] for i in ids if i in self.books), key=lambda b: b.title)
+
+    # --- full load and reconciliation ---
+
+    def load(self, session: Session) -> None:
+        """Replace the snapshot with the current database contents."""
+        categories = {row.id: CatalogCategory(**row._mapping) for row in session.execute(select(*_CATEGORY_COLUMNS))}
+        pairs = session.execute(select(book_categories.c.book_id, book_categories.c.category_id)).all()
+        rows = session.execute(select(*_BOOK_COLUMNS, Book.stock)).all()
+
+        with self._lock:
+            self.books.clear()
+            self.by_category.clear()
+            self.stock = array("q")
+            self.categories = categories
+            for row in rows:
+                self._put_book(row, row.stock)
+            self._set_memberships(pairs)
+            self.loaded = True
+
+    def reconcile(self, session: Session) -> int:
+        """Fix drift against the database; return the number of corrections."""
+        if not self.loaded:
+            self.load(session)
+            return 0
+
+        corrections = 0
+        current = {row.id: row for row in session.execute(select(Book.id, Book.stock, Book.updated_at))}
+        stale = [
+            book_id
+            for book_id, row in current.items()
+            if book_id not in self.books or self.books[book_id].updated_at != row.updated_at
+        ]
+        fresh = session.execute(select(*_BOOK_COLUMNS, Book.stock).where(Book.id.in_(stale))).all() if stale else []
+        categories = {row.id: CatalogCategory(**row._mapping) for row in session.execute(select(*_CATEGORY_COLUMNS))}
+        pairs = session.execute(select(book_categories.c.book_id, book_categories.c.category_id)).all()
+
+        with self._lock:
+            for book_id in set(self.books) - set(current):
+                self.remove_book(book_id)
+                corrections += 1
+            for row in fresh:
+                if self._is_newer(row.id, row.updated_at):
+                    continue
+                self._put_book(row, row.stock)
+                corrections += 1
+            for book_id, row in current.items():
+                book = self.books.get(book_id)
+                # Deleted before ``fresh`` was read: picked up as an insert if it comes back.
+                # Written by this worker after ``current`` was read: the snapshot is the newer one.
+                if book is None or self._is_newer(book_id, row.updated_at):
+                    continue
+                if self.stock[book.slot] != row.stock:
+                    self.stock[book.slot] = row.stock
+                    corrections += 1
+            if categories != self.categories:
+                self.categories = categories
+                corrections += 1
+            before = {cid: set(ids) for cid, ids in self.by_category.items() if ids}
+            self._set_memberships(pairs)
+            if before != {cid: ids for cid, ids in self.by_category.items() if ids}:
+                corrections += 1
+        return corrections
+
+    # --- incremental updates from write handlers ---
+
+    def upsert_book(self, book: Book) -> None:
+        """Insert or refresh a book after it was created or updated."""
+        if not self.loaded:
+            return
+        with self._lock:
+            self._put_book(book, book.stock)
+            self._set_book_categories(book.id, [c.id for c in book.categories])
+
+    def remove_book(self, book_id: int) -> None:
+        """Forget a deleted book (its stock slot is left unused)."""
+        with self._lock:
+            book = self.books.pop(book_id, None)
+            if book is not None:
+                for cid in book.category_ids:
+                    self.by_category.get(cid, set()).discard(book_id)
+
+    def set_stock(self, book_id: int, stock: int, updated_at: datetime) -> None:
+        """Record the stock of a book after a loan, a return or a stock update."""
+        with self._lock:
+            book = self.books.get(book_id)
+            if book is not None and not book.updated_at > updated_at:
+                self.stock[book.slot] = stock
+                book.updated_at = updated_at
+
+    def upsert_category(self, category: Category) -> None:
+        """Insert or refresh a category after it was created or updated."""
+        if not self.loaded:
+            return
+        with self._lock:
+            self.categories[category.id] = CatalogCategory(**{name: getattr(category, name) for name in _CATEGORY_FIELDS})
+
+    def remove_category(self, category_id: int) -> None:
+        """Forget a deleted category and its memberships."""
+        with self._lock:
+            self.categories.pop(category_id, None)
+            for book_id in self.by_category.pop(category_id, set()):
+                book = self.books.get(book_id)
+                if book is not None:
+                    book.category_ids = tuple(cid for cid in book.category_ids if cid != category_id)
+
+    def set_book_categories(self, book_id: int, category_ids: Iterable[int]) -> None:
+        """Record the categories of a book after they were replaced."""
+        with self._lock:
+            if book_id in self.books:
+                self._set_book_categories(book_id, category_ids)
+
+    def update_category_books(self, category_id: int, added: Iterable[int], removed: Iterable[int]) -> None:
+        """Record books added to and removed from a category."""
+        with self._lock:
+            for book_id in added:
+                book = self.books.get(book_id)
+                if book is not None:
+                    self._set_book_categories(book_id, {*book.category_ids, category_id})
+            for book_id in removed:
+                book = self.books.get(book_id)
+                if book is not None:
+                    self._set_book_categories(book_id, set(book.category_ids) - {category_id})
+
+    # --- helpers (caller holds the lock) ---
+
+    def _is_newer(self, book_id: int, updated_at: datetime) -> bool:
+        """Whether the snapshot holds a later version of the book than ``updated_at``."""
+        book = self.books.get(book_id)
+        return book is not None and book.updated_at > updated_at
+
+    def _put_book(self, row: Book | object, stock: int) -> None:
+        previous = self.books.get(row.id)  # type: ignore[attr-defined]
+        values = {column.key: getattr(row, column.key) for column in _BOOK_COLUMNS}
+        if previous is not None:
+            slot, category_ids = previous.slot, previous.category_ids
+        else:
+            slot, category_ids = len(self.stock), ()
+            self.stock.append(0)
+        self.books[values["id"]] = CatalogBook(**values, slot=slot, category_ids=category_ids)
+        self.stock[slot] = stock or 0
+
+    def _set_memberships(self, pairs: Iterable[tuple[int, int]]) -> None:
+        by_book: dict[int, list[int]] = {}
+        self.by_category = {cid: set() for cid in self.categories}
+        for book_id, category_id in pairs:
+            by_book.setdefault(book_id, []).append(category_id)
+            self.by_category.setdefault(category_id, set()).add(book_id)
+        for book_id, book in self.books.items():
+            book.category_ids = tuple(sorted(by_book.get(book_id, ())))
+
+    def _set_book_categories(self, book_id: int, category_ids: Iterable[int]) -> None:
+        book = self.books[book_id]
+        for cid in book.category_ids:
+            self.by_category.get(cid, set()).discard(book_id)
+        book.category_ids = tuple(sorted(category_ids))
+        for cid in book.category_ids:
+            self.by_category.setdefault(cid, set()).add(book_id)
+
+
+catalog = CatalogSnapshot()
+
+
+def serves_fields(fields_param: str | None) -> bool:
+    """Whether a request with this ``?fields=`` can be answered from the snapshot."""
+    if not fields_param:
+        return False
+    requested = {name.strip() for name in fields_param.split(",") if name.strip()}
+    return bool(requested) and requested <= CATALOG_FIELDS and catalog.ensure_loaded()
+
+
+@asynccontextmanager
+async def catalog_reconciler(_: Litestar) -> AsyncIterator[None]:
+    """Load the snapshot at startup and reconcile it periodically."""
+    if not settings.catalog_snapshot_enabled:
+        yield
+        return
+
+    from app.db import sqlalchemy_config
+
+    def reconcile_sync() -> None:
+        with sqlalchemy_config.get_session() as session:
+            catalog.reconcile(session)
+
+    async def reconcile() -> None:
+        try:
+            await anyio.to_thread.run_sync(reconcile_sync)
+        except Exception:
+            # Database unavailable: the snapshot keeps serving and is corrected on the next run
+            logger.exception("No se pudo conciliar el catálogo en memoria; se reintentará")
+
+    async def reconcile_forever() -> None:
+        while True:
+            await anyio.sleep(settings.catalog_check_seconds)
+            await reconcile()
+
+    await reconcile()
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(reconcile_forever)
+        try:
+            yield
+        finally:
+            tg.cancel_scope.cancel()
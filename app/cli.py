@@ -0,0 +1,377 @@
+"""Maintenance commands added to the ``litestar`` CLI."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+import timeit
+from datetime import date, timedelta
+from typing import Any, Callable
+
+from click import ClickException, Group, echo, option
+from litestar.plugins import CLIPluginProtocol
+
+# Run in a fresh interpreter: by the time a CLI command runs the app is already loaded
+_STARTUP_PROFILE_SCRIPT = """
+import json, time
+t0 = time.perf_counter()
+from app.config import settings
+settings.database_url
+t1 = time.perf_counter()
+import app.controllers.auth, app.controllers.book, app.controllers.category
+import app.controllers.loan, app.controllers.review, app.controllers.user
+t2 = time.perf_counter()
+from app import create_app
+create_app()
+t3 = time.perf_counter()
+print(json.dumps({"settings": t1 - t0, "imports": t2 - t1, "app_init": t3 - t2, "total": t3 - t0}))
+"""
+
+
+def _parse_importtime(stderr: str) -> list[tuple[str, float, float]]:
+    """Parse ``-X importtime`` output into ``(module, self_seconds, cumulative_seconds)``."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return modules
+
+
+def _statement_benchmarks() -> list[tuple[str, Callable[[], Any], Any]]:
+    """``(name, per-call builder as it was before, prebuilt statement)`` for the hot queries."""
+    from sqlalchemy import select, union_all
+    from sqlalchemy.orm import aliased
+
+    from app.models import Book, Loan, LoanArchive, LoanStatus, book_categories
+    from app.repositories import book, loan
+
+    def loan_history_with_archive() -> Any:
+        hot = select(*(Loan.__table__.c[name] for name in loan.LOAN_COLUMNS)).where(Loan.user_id == 1)
+        cold = select(*(LoanArchive.__table__.c[name] for name in loan.LOAN_COLUMNS)).where(LoanArchive.user_id == 1)
+        history = aliased(Loan, union_all(hot, cold).subquery("loan_history"))
+        return select(history).order_by(history.loan_dt.desc())
+
+    return [
+        (
+            "get_available_books",
+            lambda: select(Book).where(Book.stock > 0).order_by(Book.title.asc()),
+            book.AVAILABLE_BOOKS,
+        ),
+        (
+            "find_by_category",
+            lambda: select(Book)
+            .join(book_categories, book_categories.c.book_id == Book.id)
+            .where(book_categories.c.category_id == 1)
+            .order_by(Book.title.asc()),
+            book.BOOKS_BY_CATEGORY,
+        ),
+        (
+            "get_active_loans",
+            lambda: select(Loan)
+            .where(Loan.user_id == 1)
+            .where(Loan.status == LoanStatus.ACTIVE)
+            .order_by(Loan.loan_dt.desc()),
+            loan.ACTIVE_LOANS,
+        ),
+        (
+            "get_user_loan_history",
+            lambda: select(Loan).where(Loan.user_id == 1).order_by(Loan.loan_dt.desc()),
+            loan.LOAN_HISTORY,
+        ),
+        ("get_user_loan_history(archived)", loan_history_with_archive, loan.LOAN_HISTORY_WITH_ARCHIVE),
+    ]
+
+
+def _run_db_benchmark(seconds: float, readers: int, writers: int) -> dict[str, list[float]]:
+    """Latencies (seconds) per operation kind of a mixed read/write load on ``DATABASE_URL``.
+
+    Readers loop over a book by id, the available books and a user's active
+    loans; writers add one unit to a book's stock and take it back (two commits).
+    """
+    import random
+    import threading
+    import time
+
+    from sqlalchemy import select
+
+    from app.db import sqlalchemy_config
+    from app.models import Book, User
+    from app.repositories.book import BookRepository
+    from app.repositories.loan import LoanRepository
+
+    with sqlalchemy_config.get_session() as session:
+        book_ids = session.scalars(select(Book.id)).all()
+        user_ids = session.scalars(select(User.id)).all()
+    if not book_ids or not user_ids:
+        raise ClickException("la base de datos no tiene libros o usuarios (carga initial_data.sql)")
+
+    latencies: dict[str, list[float]] = {"read": [], "write": [], "error": []}
+    deadline = time.perf_counter() + seconds
+
+    def read() -> None:
+        with sqlalchemy_config.get_session() as session:
+            books, loans = BookRepository(session=session), LoanRepository(session=session)
+            while (start := time.perf_counter()) < deadline:
+                try:
+                    books.get(random.choice(book_ids))
+                    books.get_available_books()
+                    loans.get_active_loans(random.choice(user_ids))
+                    session.rollback()
+                except Exception:
+                    session.rollback()
+                    latencies["error"].append(time.perf_counter() - start)
+                else:
+                    latencies["read"].append(time.perf_counter() - start)
+
+    def write() -> None:
+        with sqlalchemy_config.get_session() as session:
+            books = BookRepository(session=session)
+            while (start := time.perf_counter()) < deadline:
+                book_id = random.choice(book_ids)
+                try:
+                    books.update_stock(book_id, 1)
+                    session.commit()
+                    books.update_stock(book_id, -1)
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    latencies["error"].append(time.perf_counter() - start)
+                else:
+                    latencies["write"].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=read) for _ in range(readers)]
+    threads += [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+class LibraryCLIPlugin(CLIPluginProtocol):
+    """Register the library maintenance commands (``litestar <command>``)."""
+
+    def on_cli_init(self, cli: Group) -> None:
+        @cli.command(name="archive-loans")
+        @option("--days", type=int, default=None, help="Archive loans returned more than DAYS ago.")
+        @option("--batch-size", type=int, default=None, help="Rows moved per transaction.")
+        def archive_loans(days: int | None, batch_size: int | None) -> None:
+            """Move old RETURNED loans from ``loans`` to ``loans_archive``."""
+            from app.config import settings
+            from app.db import sqlalchemy_config
+            from app.repositories.loan import LoanRepository
+
+            days = settings.loan_archive_after_days if days is None else days
+            batch_size = settings.loan_archive_batch_size if batch_size is None else batch_size
+            returned_before = date.today() - timedelta(days=days)
+
+            with sqlalchemy_config.get_session() as session:
+                archived = LoanRepository(session=session).archive_returned_loans(
+                    returned_before=returned_before,
+                    batch_size=batch_size,
+                )
+
+            echo(f"{archived} préstamos archivados (devueltos antes de {returned_before.isoformat()})")
+
+        @cli.command(name="analytics-backfill")
+        @option("--since", type=str, default=None, help="First day to rebuild (YYYY-MM-DD); default: the first loan.")
+        def analytics_backfill(since: str | None) -> None:
+            """Rebuild the circulation rollups from ``loans`` and ``loans_archive``, month by month."""
+            from app.db import sqlalchemy_config
+            from app.repositories.analytics import AnalyticsRepository
+
+            try:
+                since_date = date.fromisoformat(since) if since else None
+            except ValueError as e:
+                raise ClickException("--since debe tener formato YYYY-MM-DD") from e
+
+            with sqlalchemy_config.get_session() as session:
+                months = AnalyticsRepository(session=session).backfill(since=since_date)
+
+            echo(f"{months} meses de analítica recalculados")
+
+        @cli.command(name="trending-rebuild")
+        def trending_rebuild() -> None:
+            """Recompute the trending scores from the loan and review history."""
+            from app.db import sqlalchemy_config
+            from app.trending import rebuild_scores
+
+            with sqlalchemy_config.get_session() as session:
+                books = rebuild_scores(session)
+
+            echo(f"Puntuaciones de tendencia recalculadas para {books} libros")
+
+        @cli.command(name="fines-rebuild")
+        def fines_rebuild() -> None:
+            """Recompute the users' fine balances from the fines recorded on their loans."""
+            from app.db import sqlalchemy_config
+            from app.repositories.fine import rebuild_fine_balances
+
+            with sqlalchemy_config.get_engine().begin() as conn:
+                users = rebuild_fine_balances(conn)
+
+            echo(f"Saldos de multas recalculados para {users} usuarios")
+
+        @cli.command(name="password-calibrate")
+        @option("--target-ms", type=float, default=None, help="Latency of one hash (default PASSWORD_HASH_TARGET_MS).")
+        @option("--max-memory-mib", type=int, default=None, help="Memory budget per hash (default PASSWORD_HASH_MEMORY_KIB).")
+        @option("--parallelism", type=int, default=None, help="Argon2 lanes (default PASSWORD_HASH_PARALLELISM).")
+        @option("--rounds", type=int, default=5, help="Hashes timed per combination (median).")
+        @option("--dry-run", is_flag=True, help="Only measure; don't store the result.")
+        def password_calibrate(
+            target_ms: float | None,
+            max_memory_mib: int | None,
+            parallelism: int | None,
+            rounds: int,
+            dry_run: bool,
+        ) -> None:
+            """Time Argon2id on this host and store the costliest parameters within the target.
+
+            Run it on a production host, idle: logins rehash to the stored parameters.
+            """
+            from sqlalchemy import select
+
+            from app.config import settings
+            from app.db import sqlalchemy_config
+            from app.models import User
+            from app.passwords import calibrate, passwords, save_calibration
+
+            target_ms = settings.password_hash_target_ms if target_ms is None else target_ms
+            max_memory_kib = settings.password_hash_memory_kib if max_memory_mib is None else max_memory_mib * 1024
+            parallelism = settings.password_hash_parallelism if parallelism is None else parallelism
+
+            chosen, hash_ms, trials = calibrate(target_ms, max_memory_kib, parallelism, rounds)
+
+            echo(f"{'t':>3} {'memoria':>10} {'p':>3} {'hash':>10}")
+            for params, millis in trials:
+                echo(f"{params.time_cost:>3} {params.memory_kib // 1024:>7} MiB {params.parallelism:>3} {millis:>8.1f}ms")
+            echo(
+                f"Elegido: t={chosen.time_cost}, m={chosen.memory_kib // 1024} MiB, p={chosen.parallelism} "
+                f"({hash_ms:.1f} ms por hash, objetivo {target_ms:g} ms)"
+            )
+            if hash_ms > target_ms:
+                echo(f"Aviso: ni con la memoria mínima ({settings.password_hash_min_memory_kib // 1024} MiB) se alcanza el objetivo")
+            if dry_run:
+                return
+
+            with sqlalchemy_config.get_session() as session:
+                save_calibration(session, chosen, hash_ms, target_ms, trials)
+                passwords.use(chosen)
+                stale = sum(passwords.needs_rehash(h) for h in session.scalars(select(User.password)))
+
+            echo(f"Parámetros guardados; {stale} contraseñas se rehashearán en su próximo inicio de sesión")
+
+        @cli.command(name="sqlite-init")
+        @option("--no-seed", is_flag=True, help="Don't load initial_data.sql.")
+        def sqlite_init(no_seed: bool) -> None:
+            """Create a SQLite database for the tuned single-box mode and mark it migrated."""
+            import sqlite3
+
+            from advanced_alchemy.base import orm_registry
+            from sqlalchemy import inspect
+
+            import app.models  # noqa: F401  (registers every table)
+            from app.db import sqlalchemy_config
+            from app.repositories.fine import rebuild_fine_balances
+            from app.testing import PROJECT_ROOT, SEED_FILE
+
+            engine = sqlalchemy_config.get_engine()
+            if engine.dialect.name != "sqlite":
+                raise ClickException("DATABASE_URL no apunta a una base de datos SQLite")
+            if inspect(engine).get_table_names():
+                raise ClickException(f"{engine.url.database} ya tiene tablas")
+
+            # The Alembic baseline alters columns, which SQLite can't: build from the models, then stamp
+            orm_registry.metadata.create_all(engine)
+            if not no_seed:
+                with sqlite3.connect(engine.url.database) as conn:
+                    conn.executescript(SEED_FILE.read_text(encoding="utf-8"))
+                # Stamping skips the data steps of the migrations, like seeding the fine balances
+                with engine.begin() as conn:
+                    rebuild_fine_balances(conn)
+            subprocess.run([sys.executable, "-m", "alembic", "stamp", "head"], cwd=PROJECT_ROOT, check=True)
+
+            echo(f"Base de datos SQLite creada en {engine.url.database}")
+
+        @cli.command(name="db-benchmark")
+        @option("--seconds", type=float, default=10.0, help="Duration of the load.")
+        @option("--readers", type=int, default=8, help="Concurrent reading threads.")
+        @option("--writers", type=int, default=2, help="Concurrent writing threads.")
+        def db_benchmark(seconds: float, readers: int, writers: int) -> None:
+            """Throughput of a mixed read/write load on DATABASE_URL (SQLite or PostgreSQL).
+
+            Run it with the same data (initial_data.sql) on each database to compare them.
+            """
+            from app.db import sqlalchemy_config
+
+            engine = sqlalchemy_config.get_engine()
+            latencies = _run_db_benchmark(seconds, readers, writers)
+
+            echo(f"{engine.dialect.name} ({engine.url.render_as_string()}), {readers} lectores, {writers} escritores, {seconds:g}s")
+            echo(f"{'operación':<10} {'ops/s':>9} {'p50':>9} {'p95':>9}")
+            for kind in ("read", "write"):
+                samples = sorted(latencies[kind])
+                if not samples:
+                    continue
+                p50, p95 = samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+                echo(f"{kind:<10} {len(samples) / seconds:9.1f} {p50 * 1000:7.2f}ms {p95 * 1000:7.2f}ms")
+            if latencies["error"]:
+                echo(f"{len(latencies['error'])} operaciones fallidas")
+
+        @cli.command(name="bench-statements")
+        @option("--iterations", type=int, default=10000, help="Calls timed per statement.")
+        def bench_statements(iterations: int) -> None:
+            """Per-call Python overhead of the hot queries: built per call vs prebuilt.
+
+            Measures what every execution pays before the compiled cache lookup:
+            building the ``select()`` and generating its cache key.
+            """
+            echo(f"{'consulta':<34} {'antes':>10} {'después':>10}")
+            for name, build, prebuilt in _statement_benchmarks():
+                before = timeit.timeit(lambda: build()._generate_cache_key(), number=iterations) / iterations
+                after = timeit.timeit(lambda: prebuilt._generate_cache_key(), number=iterations) / iterations
+                echo(f"{name:<34} {before * 1e6:8.1f}µs {after * 1e6:8.2f}µs")
+
+        @cli.command(name="startup-profile")
+        @option("--top", type=int, default=15, help="Number of slowest modules to list.")
+        @option("--check", is_flag=True, help="Fail if the cold start exceeds STARTUP_BUDGET_SECONDS.")
+        def startup_profile(top: int, check: bool) -> None:
+            """Report import and init time of a cold start, per phase and per module."""
+            from app.config import settings
+
+            result = subprocess.run(
+                [sys.executable, "-X", "importtime", "-c", _STARTUP_PROFILE_SCRIPT],
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+            if result.returncode != 0:
+                raise ClickException(result.stderr.strip().splitlines()[-1])
+
+            phases = json.loads(result.stdout.strip().splitlines()[-1])
+            modules = _parse_importtime(result.stderr)
+
+            echo("Fases:")
+            for phase in ("settings", "imports", "app_init", "total"):
+                echo(f"  {phase:<10} {phases[phase] * 1000:9.1f} ms")
+
+            echo("Módulos de la app (acumulado):")
+            for name, _, cumulative in sorted(
+                (m for m in modules if m[0] == "app" or m[0].startswith("app.")),
+                key=lambda m: m[2],
+                reverse=True,
+            ):
+                echo(f"  {name:<40} {cumulative * 1000:9.1f} ms")
+
+            echo(f"Módulos más lentos (propio, top {top}):")
+            for name, self_seconds, _ in sorted(modules, key=lambda m: m[1], reverse=True)[:top]:
+                echo(f"  {name:<40} {self_seconds * 1000:9.1f} ms")
+
+            if check and phases["total"] > settings.startup_budget_seconds:
+                raise ClickException(
+                    f"arranque en frío de {phases['total']:.2f}s supera el límite de "
+                    f"{settings.startup_budget_seconds:.2f}s"
+                )
@@ -1,10 +1,152 @@
+from datetime import date
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     debug: bool = False
     jwt_secret: str = "secret123"
+    # Authorize requests from JWT claims only (no users query per request)
+    jwt_claims_auth: bool = False
+    token_version_refresh_seconds: int = 30
     database_url: str
+    # Compiled statement cache entries per engine (SQLAlchemy query_cache_size)
+    db_query_cache_size: int = 500
+    # psycopg 3: server-side prepare a statement after N executions (None disables)
+    db_prepare_threshold: int | None = 5
+    # Serve /schema (Swagger, Scalar); disable in production to skip those routes
+    openapi_enabled: bool = True
+    # Ceiling checked by `litestar startup-profile --check`
+    startup_budget_seconds: float = 3.0
+    # Expose GET /metrics and record per-route HTTP metrics (app/metrics.py)
+    metrics_enabled: bool = True
+
+    # On-demand request profiling (app/profiling.py, needs the "profiling" extra)
+    profiling_enabled: bool = False
+    profiling_token: str | None = None
+    profiling_sample_rate: float = 0.0
+    profiling_interval_seconds: float = 0.001
+    profiling_dir: str = "profiles"
+
+    # Tuned SQLite mode for single-box branches (app/sqlite.py); only with a sqlite:/// URL
+    sqlite_tuned: bool = True
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268_435_456
+    sqlite_cache_size_kib: int = 65_536
+    sqlite_optimize_seconds: int = 3600
+
+    # Slow-query log (app/slowlog.py); EXPLAIN sampling is PostgreSQL only
+    slow_query_log_enabled: bool = True
+    slow_query_threshold_ms: float = 200
+    slow_query_log_file: str = "logs/slow_queries.log"
+    slow_query_log_max_bytes: int = 10_000_000
+    slow_query_log_backups: int = 5
+    slow_query_explain_sample_rate: float = 0.1
+
+    # Coalesce identical concurrent GETs on these route templates (app/singleflight.py)
+    single_flight_enabled: bool = True
+    single_flight_routes: list[str] = [
+        "/books/stats",
+        "/books/most-reviewed",
+        "/books/negative-reviews",
+        "/loans/overdue",
+    ]
+
+    # Per-route-group concurrency limits and load shedding (app/limiter.py);
+    # keep CONCURRENCY_LIMIT near the database pool (5 + 10 overflow)
+    concurrency_limit_enabled: bool = True
+    concurrency_limit: int = 15
+    # Slots only the circulation group may use
+    concurrency_reserved_circulation: int = 3
+    concurrency_circulation_routes: list[str] = [
+        "POST /loans",
+        "POST /loans/{loan_id}/return",
+        "PATCH /loans/{id}",
+        "POST /auth/login",
+    ]
+    concurrency_analytics_routes: list[str] = [
+        "/books/stats",
+        "/books/most-reviewed",
+        "/books/negative-reviews",
+        "/loans/overdue",
+        "/loans/fines-report",
+        "/analytics/circulation",
+        "/analytics/categories",
+        "/analytics/fines",
+    ]
+    # Per group (circulation, writes, reads, analytics): max running, queue length, seconds queued
+    concurrency_group_max: dict[str, int] = {"analytics": 4}
+    concurrency_queue_size: dict[str, int] = {"circulation": 100, "writes": 32, "reads": 32, "analytics": 8}
+    concurrency_queue_seconds: dict[str, float] = {"circulation": 15, "writes": 5, "reads": 5, "analytics": 2}
+
+    # Live stock/loan events over SSE (app/events.py); backplane "local" (one worker) or "postgres"
+    events_enabled: bool = True
+    events_backplane: str = "local"
+    events_replay_size: int = 1000
+    events_client_buffer: int = 100
+    events_keepalive_seconds: float = 15
+
+    # Login throttling (app/throttle.py)
+    login_throttle_enabled: bool = True
+    login_throttle_redis_url: str | None = None
+    login_ip_burst: int = 20
+    login_ip_per_minute: float = 20
+    login_user_burst: int = 10
+    login_user_per_minute: float = 2
+    login_backoff_after: int = 3
+    login_backoff_max_seconds: int = 900
+    login_known_ip_days: int = 30
+
+    # Argon2id password hashing (app/passwords.py); the cost applies until `litestar password-calibrate` stores one
+    password_hash_time_cost: int = 3
+    password_hash_memory_kib: int = 65536
+    password_hash_parallelism: int = 4
+    # Calibration defaults: latency of one hash and memory floor
+    password_hash_target_ms: float = 250
+    password_hash_min_memory_kib: int = 19456
+    password_rehash_on_login: bool = True
+    password_params_refresh_seconds: int = 300
+
+    # In-process catalog snapshot (app/catalog.py)
+    catalog_snapshot_enabled: bool = True
+    catalog_check_seconds: int = 60
+
+    # Trending books (app/trending.py); rebuild scores after changing the half-life or epoch
+    trending_enabled: bool = True
+    trending_half_life_hours: float = 168
+    trending_loan_weight: float = 1.0
+    trending_review_weight: float = 0.5
+    trending_capacity: int = 200
+    trending_flush_seconds: int = 60
+    trending_epoch: date = date(2026, 1, 1)
+
+    # Transactional outbox worker (app/outbox.py)
+    outbox_enabled: bool = True
+    outbox_poll_seconds: float = 1.0
+    outbox_batch_size: int = 100
+    outbox_max_attempts: int = 10
+    outbox_backoff_base_seconds: float = 2.0
+    outbox_backoff_max_seconds: float = 600.0
+    outbox_retention_hours: int = 168
+
+    # Circulation analytics rollups (app/analytics.py)
+    analytics_enabled: bool = True
+    analytics_refresh_seconds: int = 60
+    analytics_refresh_overlap_seconds: int = 300
+    analytics_refresh_batch_size: int = 500
+
+    # Zero-downtime migration helpers (app/migration_toolkit.py)
+    migration_lock_timeout: str = "5s"
+    migration_backfill_batch_size: int = 5000
+    migration_backfill_pause_seconds: float = 0.1
+
+    # Change feed (GET /{resource}/changes): only rows stamped this long ago are served,
+    # so a transaction committing up to this long after its updated_at is never skipped
+    change_feed_lag_seconds: float = 5
+
+    # Loan archival (litestar archive-loans)
+    loan_archive_after_days: int = 365
+    loan_archive_batch_size: int = 1000
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,9 +1,16 @@
 """Controllers and error handlers for API endpoints."""
 
-from typing import Any
+from datetime import timedelta
+from typing import Any, Iterator
 
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
 from litestar import Request, Response
+from litestar.exceptions import HTTPException
+from litestar.response import Stream
+from litestar.serialization import encode_json
+
+from app.config import settings
+from app.repositories.change import ChangeCursor, ChangeFeedRepository, ChangePage
 
 
 def not_found_error_handler(_: Request[Any, Any, Any], __: NotFoundError) -> Response[Any]:
@@ -20,3 +27,30 @@ def duplicate_error_handler(_: Request[Any, Any, Any], __: DuplicateKeyError) ->
         status_code=404,
         content={"status_code": 404, "detail": "Already exists"},
     )
+
+
+def change_feed_response(resource: str, since: str | None, limit: int) -> Stream:
+    """Stream changes of ``resource`` after ``since`` as NDJSON.
+
+    Each line is an ``upsert`` or ``delete`` change; the last line carries the
+    ``cursor`` to pass as ``since`` on the next sync.
+    """
+    try:
+        cursor = ChangeCursor.decode(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    def lines() -> Iterator[bytes]:
+        from app.db import sqlalchemy_config
+
+        page = ChangePage(cursor=cursor)
+        # The request session is closed once the handler returns, so the stream owns its own
+        with sqlalchemy_config.get_session() as session:
+            repo = ChangeFeedRepository(session=session)
+            lag = timedelta(seconds=settings.change_feed_lag_seconds)
+            for change in repo.iter_changes(resource, page, limit=limit, lag=lag):
+                yield encode_json(change) + b"\n"
+
+        yield encode_json({"op": "cursor", "cursor": page.cursor.encode(), "has_more": not page.exhausted}) + b"\n"
+
+    return Stream(lines(), media_type="application/x-ndjson")
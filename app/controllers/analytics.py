@@ -0,0 +1,75 @@
+"""Controller for circulation analytics endpoints (served from rollup tables)."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Annotated, Literal
+
+from litestar import Controller, get
+from litestar.di import Provide
+from litestar.exceptions import HTTPException
+from litestar.params import Parameter
+
+from app.models import CategoryCirculation, CirculationPoint, FineMonth
+from app.repositories.analytics import AnalyticsRepository, provide_analytics_repo
+
+DateFrom = Annotated[date | None, Parameter(query="date_from")]
+DateTo = Annotated[date | None, Parameter(query="date_to")]
+
+
+def _date_range(date_from: date | None, date_to: date | None, default_days: int) -> tuple[date, date]:
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=default_days)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from debe ser anterior a date_to")
+    return date_from, date_to
+
+
+class AnalyticsController(Controller):
+    """Controller for loan, overdue and fine reports."""
+
+    path = "/analytics"
+    tags = ["analytics"]
+    return_dto = None
+    dependencies = {"analytics_repo": Provide(provide_analytics_repo)}
+
+    @get("/circulation")
+    async def get_circulation(
+        self,
+        analytics_repo: AnalyticsRepository,
+        date_from: DateFrom = None,
+        date_to: DateTo = None,
+        granularity: Annotated[Literal["day", "month"], Parameter(query="granularity")] = "day",
+        category_id: Annotated[int | None, Parameter(query="category_id")] = None,
+    ) -> list[CirculationPoint]:
+        """Loans per day/month of loan date, returned and overdue (default: last 30 days or 12 months)."""
+        date_from, date_to = _date_range(date_from, date_to, 30 if granularity == "day" else 365)
+        return analytics_repo.circulation(granularity, date_from, date_to, category_id=category_id)
+
+    @get("/categories")
+    async def get_circulation_by_category(
+        self,
+        analytics_repo: AnalyticsRepository,
+        date_from: DateFrom = None,
+        date_to: DateTo = None,
+    ) -> list[CategoryCirculation]:
+        """Loans, overdue rate and fines per category (default: last 12 months)."""
+        date_from, date_to = _date_range(date_from, date_to, 365)
+        return analytics_repo.circulation_by_category(date_from, date_to)
+
+    @get("/fines")
+    async def get_fines(
+        self,
+        analytics_repo: AnalyticsRepository,
+        date_from: DateFrom = None,
+        date_to: DateTo = None,
+        category_id: Annotated[int | None, Parameter(query="category_id")] = None,
+    ) -> list[FineMonth]:
+        """Returns and fines per month of return date (default: last 12 months)."""
+        date_from, date_to = _date_range(date_from, date_to, 365)
+        return analytics_repo.fines(date_from, date_to, category_id=category_id)
+
+    @get("/freshness")
+    async def get_freshness(self, analytics_repo: AnalyticsRepository) -> dict[str, datetime | None]:
+        """Loan changes up to ``refreshed_through`` are reflected in the reports."""
+        return {"refreshed_through": analytics_repo.watermark()}
@@ -1,24 +1,24 @@
 """Controller for authentication endpoints."""
 
-from typing import Annotated
+import time
+from typing import Annotated, Any
 
-from argon2 import PasswordHasher
-from argon2.exceptions import InvalidHash, VerifyMismatchError
-
-from litestar import Controller, Response, post
+import anyio
+from litestar import Controller, Request, Response, get, post
 from litestar.di import Provide
 from litestar.enums import RequestEncodingType
-from litestar.exceptions import HTTPException
+from litestar.exceptions import HTTPException, TooManyRequestsException
 from litestar.params import Body
 from litestar.security.jwt import OAuth2Login
 
+from app.config import settings
 from app.dtos.user import UserLoginDTO
+from app.metrics import LOGIN_ATTEMPTS
 from app.models import User
+from app.passwords import passwords
 from app.repositories.user import UserRepository, provide_user_repo
-from app.security import oauth2_auth
-
-# Argon2 hasher (compatible con hashes $argon2id$... del initial_data.sql)
-ph = PasswordHasher()
+from app.security import oauth2_auth, token_claims
+from app.throttle import login_throttle
 
 
 class AuthController(Controller):
@@ -34,19 +34,53 @@ class AuthController(Controller):
     )
     async def login(
         self,
+        request: Request[Any, Any, Any],
         data: Annotated[User, Body(media_type=RequestEncodingType.URL_ENCODED)],
         users_repo: UserRepository,
     ) -> Response[OAuth2Login]:
         """Authenticate user and generate OAuth2 token."""
+        client_ip = request.client.host if request.client else "unknown"
+
+        # Rejected before any DB lookup or Argon2 work
+        retry_after = await login_throttle.check(data.username, client_ip)
+        if retry_after:
+            LOGIN_ATTEMPTS.labels("throttled").inc()
+            raise TooManyRequestsException(
+                detail="Demasiados intentos de inicio de sesión",
+                headers={"Retry-After": str(retry_after)},
+            )
+
         user = users_repo.get_one_or_none(username=data.username)
 
         if user is None:
+            LOGIN_ATTEMPTS.labels("failure").inc()
+            await login_throttle.record_failure(data.username, client_ip)
             raise HTTPException(status_code=401, detail="Usuario o contraseña incorrectos")
 
-        try:
-            # verify(hashed_password, plain_password)
-            ph.verify(user.password, data.password)
-        except (VerifyMismatchError, InvalidHash):
+        started = time.perf_counter()
+        if not passwords.verify(data.password, user.password):
+            LOGIN_ATTEMPTS.labels("failure").inc()
+            await login_throttle.record_failure(data.username, client_ip, time.perf_counter() - started)
             raise HTTPException(status_code=401, detail="Usuario o contraseña incorrectos")
 
-        return oauth2_auth.login(identifier=user.username)
+        LOGIN_ATTEMPTS.labels("success").inc()
+        await login_throttle.record_success(data.username, client_ip, time.perf_counter() - started)
+
+        if settings.password_rehash_on_login and passwords.needs_rehash(user.password):
+            # Stored with other Argon2 parameters: move it to the current ones (no token revocation)
+            user.password = passwords.hash(data.password)
+            await anyio.to_thread.run_sync(users_repo.update, user)
+
+        return oauth2_auth.login(identifier=user.username, token_extras=token_claims(user))
+
+    @get("/throttle-stats")
+    async def get_throttle_stats(self) -> dict[str, float]:
+        """Login throttling counters for this worker."""
+        stats = login_throttle.stats
+        return {
+            "attempts": stats.attempts,
+            "rejected": stats.rejected,
+            "failures": stats.failures,
+            "verify_seconds_avg": stats.verify_seconds_avg,
+            "cpu_seconds_saved": stats.cpu_seconds_saved,
+        }
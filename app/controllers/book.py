@@ -3,20 +3,25 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Annotated, Sequence
+from typing import Annotated, Literal, Sequence
 
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
 from advanced_alchemy.filters import LimitOffset
-from litestar import Controller, delete, get, patch, post
+from litestar import Controller, delete, get, patch, post, put
 from litestar.di import Provide
 from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
 from litestar.params import Parameter
+from litestar.response import Stream
 
-from app.controllers import duplicate_error_handler, not_found_error_handler
+from app.catalog import catalog, serves_fields
+from app.controllers import change_feed_response, duplicate_error_handler, not_found_error_handler
 from app.dtos.book import BookCreateDTO, BookReadDTO, BookUpdateDTO
-from app.models import Book, BookStats
+from app.dtos.fields import FieldsParam
+from app.events import live_events
+from app.models import AssignmentResult, Book, BookAvailability, BookBrowsePage, BookCategoriesUpdate, BookStats, TrendingBook
 from app.repositories.book import BookRepository, provide_book_repo
+from app.trending import trending
 
 ALLOWED_LANGUAGES = {"es", "en", "fr"}
 
@@ -34,17 +39,43 @@ class BookController(Controller):
     }
 
     @get("/")
-    async def list_books(self, books_repo: BookRepository) -> Sequence[Book]:
-        """Get all books."""
-        return books_repo.list()
+    async def list_books(self, books_repo: BookRepository, fields: FieldsParam) -> Sequence[Book]:
+        """Get all books (``?fields=`` limits the columns fetched and returned)."""
+        return books_repo.list(load=BookReadDTO.load_options(fields))
 
-    @get("/{id:int}")
-    async def get_book(self, id: int, books_repo: BookRepository) -> Book:
-        """Get a book by ID."""
-        return books_repo.get(id)
+    @get("/changes", return_dto=None)
+    async def list_book_changes(
+        self,
+        since: Annotated[str | None, Parameter(query="since", default=None)],
+        limit: Annotated[int, Parameter(query="limit", default=1000, ge=1, le=10000)],
+    ) -> Stream:
+        """Stream books changed or deleted after the ``since`` cursor (NDJSON)."""
+        return change_feed_response("books", since, limit)
 
-    @post("/", dto=BookCreateDTO)
-    async def create_book(
+    @get("/{id:int}")
+    async def get_book(self, id: int, books_repo: BookRepository, fields: FieldsParam) -> Book:
+        """Get a book by ID (served from the catalog snapshot for catalog-only ``fields``)."""
+        if serves_fields(fields):
+            book = catalog.get(id)
+            if book is None:
+                raise NotFoundError(f"No book with id {id}")
+            return book  # type: ignore[return-value]
+        return books_repo.get(id, load=BookReadDTO.load_options(fields))
+
+    @get("/{id:int}/availability", return_dto=None)
+    async def get_book_availability(self, id: int, books_repo: BookRepository) -> BookAvailability:
+        """Current stock of a book, from the catalog snapshot when enabled."""
+        if catalog.ensure_loaded():
+            book = catalog.get(id)
+            if book is None:
+                raise NotFoundError(f"No book with id {id}")
+            stock = book.stock
+        else:
+            stock = books_repo.get(id).stock
+        return BookAvailability(book_id=id, stock=stock, available=stock > 0)
+
+    @post("/", dto=BookCreateDTO, sync_to_thread=True)
+    def create_book(
         self,
         data: DTOData[Book],
         books_repo: BookRepository,
@@ -68,10 +99,12 @@ class BookController(Controller):
         if language is not None and str(language) not in ALLOWED_LANGUAGES:
             raise HTTPException(detail="language debe ser uno de: es, en, fr", status_code=400)
 
-        return books_repo.add(Book(**payload))
+        book = books_repo.add(Book(**payload))
+        catalog.upsert_book(book)
+        return book
 
-    @patch("/{id:int}", dto=BookUpdateDTO)
-    async def update_book(
+    @patch("/{id:int}", dto=BookUpdateDTO, sync_to_thread=True)
+    def update_book(
         self,
         id: int,
         data: DTOData[Book],
@@ -89,46 +122,138 @@ class BookController(Controller):
                 raise HTTPException(detail="language debe ser uno de: es, en, fr", status_code=400)
 
         book, _ = books_repo.get_and_update(match_fields="id", id=id, **payload)
+        catalog.upsert_book(book)
         return book
 
-    @delete("/{id:int}")
-    async def delete_book(self, id: int, books_repo: BookRepository) -> None:
+    @delete("/{id:int}", sync_to_thread=True)
+    def delete_book(self, id: int, books_repo: BookRepository) -> None:
         """Delete a book by ID."""
         books_repo.delete(id)
+        catalog.remove_book(id)
+        trending.forget(id)
+
+    @put("/{id:int}/categories", return_dto=None, sync_to_thread=True)
+    def set_book_categories(
+        self,
+        id: int,
+        data: BookCategoriesUpdate,
+        books_repo: BookRepository,
+    ) -> AssignmentResult:
+        """Replace the categories of a book; only the difference with the current ones is written."""
+        try:
+            added, removed = books_repo.set_categories(id, data.category_ids)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        catalog.set_book_categories(id, set(data.category_ids))
+        return AssignmentResult(added=len(added), removed=len(removed))
+
+    @get("/browse", return_dto=None)
+    async def browse_books(
+        self,
+        books_repo: BookRepository,
+        category: Annotated[list[int] | None, Parameter(query="category", default=None)],
+        category_mode: Annotated[Literal["any", "all"], Parameter(query="category_mode", default="any")],
+        language: Annotated[str | None, Parameter(query="language", default=None)],
+        year_from: Annotated[int | None, Parameter(query="year_from", default=None)],
+        year_to: Annotated[int | None, Parameter(query="year_to", default=None)],
+        publisher: Annotated[str | None, Parameter(query="publisher", default=None)],
+        available: Annotated[bool | None, Parameter(query="available", default=None)],
+        limit: Annotated[int, Parameter(query="limit", default=20, ge=1, le=100)],
+        offset: Annotated[int, Parameter(query="offset", default=0, ge=0)],
+    ) -> BookBrowsePage:
+        """Browse books with combined filters; returns a page plus facet counts.
+
+        ``category`` may be repeated; ``category_mode=all`` requires every category.
+        """
+        if language is not None and language not in ALLOWED_LANGUAGES:
+            raise HTTPException(detail="language debe ser uno de: es, en, fr", status_code=400)
+        if year_from is not None and year_to is not None and year_from > year_to:
+            raise HTTPException(detail="year_from no puede ser mayor que year_to", status_code=400)
+
+        items, total, facets = books_repo.browse(
+            category_ids=category or (),
+            match_all_categories=category_mode == "all",
+            language=language,
+            year_from=year_from,
+            year_to=year_to,
+            publisher=publisher,
+            available=available,
+            limit=limit,
+            offset=offset,
+        )
+        return BookBrowsePage(items=items, total=total, limit=limit, offset=offset, facets=facets)
 
     # ---- Métodos requeridos por la tarea (repositorio + endpoints) ----
 
     @get("/available")
-    async def get_available_books(self, books_repo: BookRepository) -> Sequence[Book]:
+    async def get_available_books(self, books_repo: BookRepository, fields: FieldsParam) -> Sequence[Book]:
         """Return books with stock > 0."""
-        return books_repo.get_available_books()
+        if serves_fields(fields):
+            return catalog.available()  # type: ignore[return-value]
+        return books_repo.get_available_books(load=BookReadDTO.load_options(fields))
 
     @get("/by-category/{category_id:int}")
-    async def get_books_by_category(self, category_id: int, books_repo: BookRepository) -> Sequence[Book]:
-        return books_repo.find_by_category(category_id)
+    async def get_books_by_category(
+        self,
+        category_id: int,
+        books_repo: BookRepository,
+        fields: FieldsParam,
+    ) -> Sequence[Book]:
+        if serves_fields(fields):
+            return catalog.in_category(category_id)  # type: ignore[return-value]
+        return books_repo.find_by_category(category_id, load=BookReadDTO.load_options(fields))
 
-    @get("/most-reviewed")
-    async def get_most_reviewed_books(
+    @get("/most-reviewed", sync_to_thread=True)
+    def get_most_reviewed_books(
         self,
         limit: Annotated[int, Parameter(query="limit", default=10, ge=1, le=100)],
         books_repo: BookRepository,
     ) -> Sequence[Book]:
         return books_repo.get_most_reviewed_books(limit=limit)
 
-    @patch("/{id:int}/stock")
-    async def update_book_stock(
+    @get("/trending", return_dto=None)
+    async def get_trending_books(
+        self,
+        books_repo: BookRepository,
+        limit: Annotated[int, Parameter(query="limit", default=10, ge=1, le=100)],
+        category_id: Annotated[int | None, Parameter(query="category_id")] = None,
+    ) -> list[TrendingBook]:
+        """Books ranked by loan and review activity, halving every TRENDING_HALF_LIFE_HOURS."""
+        among = None
+        if category_id is not None:
+            if catalog.ensure_loaded():
+                among = catalog.by_category.get(category_id, set())
+            else:
+                among = books_repo.ids_in_category(category_id)
+        ranked = trending.top(limit, among=among)
+
+        if catalog.ensure_loaded():
+            books = {book_id: catalog.books[book_id] for book_id, _ in ranked if book_id in catalog.books}
+        else:
+            books = {book.id: book for book in books_repo.list(Book.id.in_([book_id for book_id, _ in ranked]))}
+        return [
+            TrendingBook(id=book_id, title=books[book_id].title, author=books[book_id].author, score=round(score, 4))
+            for book_id, score in ranked
+            if book_id in books
+        ]
+
+    @patch("/{id:int}/stock", sync_to_thread=True)
+    def update_book_stock(
         self,
         id: int,
         quantity: Annotated[int, Parameter(query="quantity")],
         books_repo: BookRepository,
     ) -> Book:
         try:
-            return books_repo.update_stock(book_id=id, quantity=quantity)
+            book = books_repo.update_stock(book_id=id, quantity=quantity)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e)) from e
+        catalog.set_stock(book.id, book.stock, book.updated_at)
+        live_events.publish("stock", "stock", {"book_id": book.id, "stock": book.stock})
+        return book
 
-    @get("/negative-reviews")
-    async def get_books_with_negative_reviews(
+    @get("/negative-reviews", sync_to_thread=True)
+    def get_books_with_negative_reviews(
         self,
         min_count: Annotated[int, Parameter(query="min_count", default=1, ge=1)],
         books_repo: BookRepository,
@@ -169,8 +294,8 @@ class BookController(Controller):
         """Get most recent books."""
         return books_repo.list(LimitOffset(offset=0, limit=limit), order_by=Book.created_at.desc())
 
-    @get("/stats")
-    async def get_book_stats(self, books_repo: BookRepository) -> BookStats:
+    @get("/stats", sync_to_thread=True)
+    def get_book_stats(self, books_repo: BookRepository) -> BookStats:
         """Get statistics about books."""
         total_books = books_repo.count()
         if total_books == 0:
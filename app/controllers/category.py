@@ -6,10 +6,13 @@ from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
 from litestar import Controller, delete, get, patch, post
 from litestar.di import Provide
 from litestar.dto import DTOData
+from litestar.exceptions import HTTPException
 
+from app.catalog import catalog
 from app.controllers import duplicate_error_handler, not_found_error_handler
 from app.dtos.category import CategoryCreateDTO, CategoryReadDTO, CategoryUpdateDTO
-from app.models import Category
+from app.models import AssignmentResult, Category, CategoryBooksUpdate
+from app.repositories.book import BookRepository, provide_book_repo
 from app.repositories.category import CategoryRepository, provide_category_repo
 
 
@@ -33,15 +36,35 @@ class CategoryController(Controller):
     async def get_category(self, id: int, categories_repo: CategoryRepository) -> Category:
         return categories_repo.get(id)
 
-    @post("/", dto=CategoryCreateDTO)
-    async def create_category(self, data: DTOData[Category], categories_repo: CategoryRepository) -> Category:
-        return categories_repo.add(data.create_instance())
+    @post("/", dto=CategoryCreateDTO, sync_to_thread=True)
+    def create_category(self, data: DTOData[Category], categories_repo: CategoryRepository) -> Category:
+        category = categories_repo.add(data.create_instance())
+        catalog.upsert_category(category)
+        return category
 
-    @patch("/{id:int}", dto=CategoryUpdateDTO)
-    async def update_category(self, id: int, data: DTOData[Category], categories_repo: CategoryRepository) -> Category:
+    @patch("/{id:int}", dto=CategoryUpdateDTO, sync_to_thread=True)
+    def update_category(self, id: int, data: DTOData[Category], categories_repo: CategoryRepository) -> Category:
         category, _ = categories_repo.get_and_update(match_fields="id", id=id, **data.as_builtins())
+        catalog.upsert_category(category)
         return category
 
-    @delete("/{id:int}")
-    async def delete_category(self, id: int, categories_repo: CategoryRepository) -> None:
+    @delete("/{id:int}", sync_to_thread=True)
+    def delete_category(self, id: int, categories_repo: CategoryRepository) -> None:
         categories_repo.delete(id)
+        catalog.remove_category(id)
+
+    @post(
+        "/{id:int}/books",
+        status_code=200,
+        return_dto=None,
+        dependencies={"books_repo": Provide(provide_book_repo)},
+        sync_to_thread=True,
+    )
+    def assign_books(self, id: int, data: CategoryBooksUpdate, books_repo: BookRepository) -> AssignmentResult:
+        """Add books to and remove books from a category; books already in place are left alone."""
+        try:
+            added, removed = books_repo.update_category_books(id, data.add, data.remove)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        catalog.update_category_books(id, added, removed)
+        return AssignmentResult(added=len(added), removed=len(removed))
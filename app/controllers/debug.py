@@ -0,0 +1,32 @@
+"""Controller for diagnostics endpoints."""
+
+from __future__ import annotations
+
+from typing import Annotated
+
+from litestar import Controller, delete, get
+from litestar.params import Parameter
+
+from app.models import SlowQuerySummary
+from app.slowlog import slow_queries
+
+
+class DebugController(Controller):
+    """Controller for the slow-query summary of this worker."""
+
+    path = "/debug"
+    tags = ["debug"]
+    return_dto = None
+
+    @get("/slow-queries")
+    async def get_slow_queries(
+        self,
+        limit: Annotated[int, Parameter(query="limit", default=50, ge=1, le=500)],
+    ) -> list[SlowQuerySummary]:
+        """Statements over SLOW_QUERY_THRESHOLD_MS, most total time first (since start or the last reset)."""
+        return slow_queries.summary(limit)
+
+    @delete("/slow-queries")
+    async def reset_slow_queries(self) -> None:
+        """Start the summary over."""
+        slow_queries.clear()
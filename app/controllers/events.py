@@ -0,0 +1,31 @@
+"""Controller for the live event streams (server-sent events)."""
+
+from __future__ import annotations
+
+from typing import Annotated
+
+from litestar import Controller, get
+from litestar.params import Parameter
+from litestar.response import ServerSentEvent
+
+from app.events import live_events
+
+LastEventId = Annotated[str | None, Parameter(header="Last-Event-ID")]
+
+
+class EventsController(Controller):
+    """Controller for stock and loan change streams."""
+
+    path = "/events"
+    tags = ["events"]
+    return_dto = None
+
+    @get("/stock")
+    async def stream_stock(self, last_event_id: LastEventId = None) -> ServerSentEvent:
+        """``stock`` events ``{"book_id", "stock"}`` whenever a book's stock changes."""
+        return ServerSentEvent(live_events.stream("stock", last_event_id))
+
+    @get("/loans")
+    async def stream_loans(self, last_event_id: LastEventId = None) -> ServerSentEvent:
+        """``created``, ``returned`` and ``overdue`` events with the loan's new status."""
+        return ServerSentEvent(live_events.stream("loans", last_event_id))
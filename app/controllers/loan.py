@@ -3,19 +3,41 @@
 from __future__ import annotations
 
 from datetime import date, timedelta
-from typing import Sequence
+from typing import Annotated, Any, Sequence
 
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
 from litestar import Controller, delete, get, patch, post
 from litestar.di import Provide
 from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
-
-from app.controllers import duplicate_error_handler, not_found_error_handler
+from litestar.pagination import OffsetPagination
+from litestar.params import Parameter
+from litestar.response import Stream
+
+from app.catalog import catalog
+from app.config import settings
+from app.controllers import change_feed_response, duplicate_error_handler, not_found_error_handler
+from app.dtos.fields import FieldsParam
 from app.dtos.loan import LoanCreateDTO, LoanReadDTO, LoanUpdateDTO
-from app.models import Book, Loan, LoanStatus
+from app.events import live_events
+from app.metrics import LOANS
+from app.models import Book, FineReportRow, Loan, LoanStatus
 from app.repositories.book import BookRepository, provide_book_repo
+from app.repositories.fine import FineRepository, provide_fine_repo
 from app.repositories.loan import LoanRepository, provide_loan_repo
+from app.repositories.outbox import LOAN_CREATED, OutboxRepository, provide_outbox_repo
+from app.trending import trending
+
+
+def _loan_event(loan: Loan) -> dict[str, Any]:
+    """Payload of a ``/events/loans`` event."""
+    return {
+        "loan_id": loan.id,
+        "user_id": loan.user_id,
+        "book_id": loan.book_id,
+        "status": loan.status,
+        "due_date": loan.due_date.isoformat(),
+    }
 
 
 class LoanController(Controller):
@@ -27,6 +49,7 @@ class LoanController(Controller):
     dependencies = {
         "loans_repo": Provide(provide_loan_repo),
         "books_repo": Provide(provide_book_repo),
+        "outbox_repo": Provide(provide_outbox_repo),
     }
     exception_handlers = {
         NotFoundError: not_found_error_handler,
@@ -34,19 +57,29 @@ class LoanController(Controller):
     }
 
     @get("/")
-    async def list_loans(self, loans_repo: LoanRepository) -> Sequence[Loan]:
-        return loans_repo.list()
+    async def list_loans(self, loans_repo: LoanRepository, fields: FieldsParam) -> Sequence[Loan]:
+        return loans_repo.list(load=LoanReadDTO.load_options(fields))
+
+    @get("/changes", return_dto=None)
+    async def list_loan_changes(
+        self,
+        since: Annotated[str | None, Parameter(query="since", default=None)],
+        limit: Annotated[int, Parameter(query="limit", default=1000, ge=1, le=10000)],
+    ) -> Stream:
+        """Stream loans changed or deleted after the ``since`` cursor (NDJSON)."""
+        return change_feed_response("loans", since, limit)
 
     @get("/{id:int}")
-    async def get_loan(self, id: int, loans_repo: LoanRepository) -> Loan:
-        return loans_repo.get(id)
+    async def get_loan(self, id: int, loans_repo: LoanRepository, fields: FieldsParam) -> Loan:
+        return loans_repo.get(id, load=LoanReadDTO.load_options(fields))
 
-    @post("/", dto=LoanCreateDTO)
-    async def create_loan(
+    @post("/", dto=LoanCreateDTO, sync_to_thread=True)
+    def create_loan(
         self,
         data: DTOData[Loan],
         loans_repo: LoanRepository,
         books_repo: BookRepository,
+        outbox_repo: OutboxRepository,
     ) -> Loan:
         """Create a new loan. Sets due_date = loan_dt + 14 days and decrements book stock."""
         payload = data.as_builtins()
@@ -72,14 +105,25 @@ class LoanController(Controller):
             return_dt=None,
         )
 
-        # decrement stock
+        # Stock, loan and outbox event are committed together
         book.stock = (book.stock or 0) - 1
-        books_repo.update(book)
+        books_repo.update(book, auto_commit=False)
 
-        return loans_repo.add(loan)
+        loan = loans_repo.add(loan, auto_commit=False)
+        outbox_repo.emit(
+            LOAN_CREATED,
+            {"loan_id": loan.id, "user_id": loan.user_id, "book_id": loan.book_id, "due_date": loan.due_date.isoformat()},
+        )
+        loans_repo.session.commit()
+        catalog.set_stock(book.id, book.stock, book.updated_at)
+        trending.record(book.id, settings.trending_loan_weight)
+        live_events.publish("stock", "stock", {"book_id": book.id, "stock": book.stock})
+        live_events.publish("loans", "created", _loan_event(loan))
+        LOANS.labels("created").inc()
+        return loan
 
-    @patch("/{id:int}", dto=LoanUpdateDTO)
-    async def update_loan(self, id: int, data: DTOData[Loan], loans_repo: LoanRepository) -> Loan:
+    @patch("/{id:int}", dto=LoanUpdateDTO, sync_to_thread=True)
+    def update_loan(self, id: int, data: DTOData[Loan], loans_repo: LoanRepository) -> Loan:
         payload = data.as_builtins()
 
         # Only status is allowed by DTO, but we still validate values
@@ -89,12 +133,11 @@ class LoanController(Controller):
             except ValueError as e:
                 raise HTTPException(status_code=400, detail="status inválido") from e
 
-        loan, _ = loans_repo.get_and_update(match_fields="id", id=id, **payload)
-        return loan
+        return loans_repo.update_loan(id, **payload)
 
-    @delete("/{id:int}")
-    async def delete_loan(self, id: int, loans_repo: LoanRepository) -> None:
-        loans_repo.delete(id)
+    @delete("/{id:int}", sync_to_thread=True)
+    def delete_loan(self, id: int, loans_repo: LoanRepository) -> None:
+        loans_repo.delete_loan(id)
 
     # ---- Métodos requeridos por la tarea (LoanRepository + endpoints) ----
 
@@ -102,14 +145,41 @@ class LoanController(Controller):
     async def get_active_loans(self, user_id: int, loans_repo: LoanRepository) -> Sequence[Loan]:
         return loans_repo.get_active_loans(user_id=user_id)
 
-    @get("/overdue")
-    async def get_overdue_loans(self, loans_repo: LoanRepository) -> Sequence[Loan]:
-        return loans_repo.get_overdue_loans()
+    @get("/overdue", sync_to_thread=True)
+    def get_overdue_loans(self, loans_repo: LoanRepository) -> Sequence[Loan]:
+        for loan_id, user_id, book_id in loans_repo.mark_overdue_loans():
+            live_events.publish(
+                "loans", "overdue", {"loan_id": loan_id, "user_id": user_id, "book_id": book_id, "status": LoanStatus.OVERDUE}
+            )
+        return loans_repo.get_overdue_loans(mark=False)
+
+    @post("/{loan_id:int}/return", sync_to_thread=True)
+    def return_book(self, loan_id: int, loans_repo: LoanRepository) -> Loan:
+        loan = loans_repo.return_book(loan_id=loan_id)
+        book = loans_repo.session.get(Book, loan.book_id)
+        if book is not None:
+            catalog.set_stock(book.id, book.stock, book.updated_at)
+            live_events.publish("stock", "stock", {"book_id": book.id, "stock": book.stock})
+        live_events.publish("loans", "returned", _loan_event(loan))
+        LOANS.labels("returned").inc()
+        return loan
 
-    @post("/{loan_id:int}/return")
-    async def return_book(self, loan_id: int, loans_repo: LoanRepository) -> Loan:
-        return loans_repo.return_book(loan_id=loan_id)
+    @get("/fines-report", return_dto=None, dependencies={"fines_repo": Provide(provide_fine_repo)})
+    async def get_fines_report(
+        self,
+        fines_repo: FineRepository,
+        limit: Annotated[int, Parameter(query="limit", default=50, ge=1, le=500)],
+        offset: Annotated[int, Parameter(query="offset", default=0, ge=0)],
+    ) -> OffsetPagination[FineReportRow]:
+        """Users owing fines (assessed + accrued), highest total first."""
+        items, total = fines_repo.fines_report(limit=limit, offset=offset)
+        return OffsetPagination(items=items, limit=limit, offset=offset, total=total)
 
     @get("/user/{user_id:int}/history")
-    async def get_user_loan_history(self, user_id: int, loans_repo: LoanRepository) -> Sequence[Loan]:
-        return loans_repo.get_user_loan_history(user_id=user_id)
+    async def get_user_loan_history(
+        self,
+        user_id: int,
+        loans_repo: LoanRepository,
+        include_archived: Annotated[bool, Parameter(query="include_archived", default=False)],
+    ) -> Sequence[Loan]:
+        return loans_repo.get_user_loan_history(user_id=user_id, include_archived=include_archived)
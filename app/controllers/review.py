@@ -9,10 +9,13 @@ from litestar.di import Provide
 from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
 
+from app.config import settings
 from app.controllers import duplicate_error_handler, not_found_error_handler
+from app.dtos.fields import FieldsParam
 from app.dtos.review import ReviewCreateDTO, ReviewReadDTO, ReviewUpdateDTO
 from app.models import Review
 from app.repositories.review import ReviewRepository, provide_review_repo
+from app.trending import trending
 
 
 class ReviewController(Controller):
@@ -28,15 +31,15 @@ class ReviewController(Controller):
     }
 
     @get("/")
-    async def list_reviews(self, reviews_repo: ReviewRepository) -> Sequence[Review]:
-        return reviews_repo.list()
+    async def list_reviews(self, reviews_repo: ReviewRepository, fields: FieldsParam) -> Sequence[Review]:
+        return reviews_repo.list(load=ReviewReadDTO.load_options(fields))
 
     @get("/{id:int}")
-    async def get_review(self, id: int, reviews_repo: ReviewRepository) -> Review:
-        return reviews_repo.get(id)
+    async def get_review(self, id: int, reviews_repo: ReviewRepository, fields: FieldsParam) -> Review:
+        return reviews_repo.get(id, load=ReviewReadDTO.load_options(fields))
 
-    @post("/", dto=ReviewCreateDTO)
-    async def create_review(self, data: DTOData[Review], reviews_repo: ReviewRepository) -> Review:
+    @post("/", dto=ReviewCreateDTO, sync_to_thread=True)
+    def create_review(self, data: DTOData[Review], reviews_repo: ReviewRepository) -> Review:
         built = data.as_builtins()
         rating = built.get("rating")
         if rating is None or not (1 <= int(rating) <= 5):
@@ -46,10 +49,12 @@ class ReviewController(Controller):
         if built.get("review_date") is None:
             built["review_date"] = date.today()
 
-        return reviews_repo.add(Review(**built))
+        review = reviews_repo.add(Review(**built))
+        trending.record(review.book_id, settings.trending_review_weight)
+        return review
 
-    @patch("/{id:int}", dto=ReviewUpdateDTO)
-    async def update_review(self, id: int, data: DTOData[Review], reviews_repo: ReviewRepository) -> Review:
+    @patch("/{id:int}", dto=ReviewUpdateDTO, sync_to_thread=True)
+    def update_review(self, id: int, data: DTOData[Review], reviews_repo: ReviewRepository) -> Review:
         built = data.as_builtins()
         if "rating" in built and built["rating"] is not None:
             if not (1 <= int(built["rating"]) <= 5):
@@ -58,6 +63,6 @@ class ReviewController(Controller):
         review, _ = reviews_repo.get_and_update(match_fields="id", id=id, **built)
         return review
 
-    @delete("/{id:int}")
-    async def delete_review(self, id: int, reviews_repo: ReviewRepository) -> None:
+    @delete("/{id:int}", sync_to_thread=True)
+    def delete_review(self, id: int, reviews_repo: ReviewRepository) -> None:
         reviews_repo.delete(id)
@@ -1,18 +1,26 @@
 """Controller for User endpoints."""
 
 import re
-from typing import Sequence
+from typing import Annotated, Sequence
 
 from advanced_alchemy.exceptions import DuplicateKeyError, NotFoundError
 from litestar import Controller, delete, get, patch, post
 from litestar.di import Provide
 from litestar.dto import DTOData
 from litestar.exceptions import HTTPException
+from litestar.params import Parameter
+from litestar.response import Stream
 
-from app.controllers import duplicate_error_handler, not_found_error_handler
+from app.controllers import change_feed_response, duplicate_error_handler, not_found_error_handler
+from app.dashboard import build_dashboard
+from app.dtos.fields import FieldsParam
 from app.dtos.user import UserCreateDTO, UserReadDTO, UserUpdateDTO
-from app.models import PasswordUpdate, User
-from app.repositories.user import UserRepository, password_hasher, provide_user_repo
+from app.models import PasswordUpdate, User, UserDashboard, UserFines
+from app.passwords import passwords
+from app.repositories.dashboard import DashboardRepository, provide_dashboard_repo
+from app.repositories.fine import FineRepository, provide_fine_repo
+from app.repositories.user import UserRepository, provide_user_repo
+from app.security import token_versions
 
 EMAIL_RE = re.compile(r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$")
 
@@ -30,17 +38,47 @@ class UserController(Controller):
     }
 
     @get("/")
-    async def list_users(self, users_repo: UserRepository) -> Sequence[User]:
-        """Get all users."""
-        return users_repo.list()
+    async def list_users(self, users_repo: UserRepository, fields: FieldsParam) -> Sequence[User]:
+        """Get all users (``?fields=`` limits the columns fetched and returned)."""
+        return users_repo.list(load=UserReadDTO.load_options(fields))
+
+    @get("/changes", return_dto=None)
+    async def list_user_changes(
+        self,
+        since: Annotated[str | None, Parameter(query="since", default=None)],
+        limit: Annotated[int, Parameter(query="limit", default=1000, ge=1, le=10000)],
+    ) -> Stream:
+        """Stream users changed or deleted after the ``since`` cursor (NDJSON)."""
+        return change_feed_response("users", since, limit)
 
     @get("/{id:int}")
-    async def get_user(self, id: int, users_repo: UserRepository) -> User:
+    async def get_user(self, id: int, users_repo: UserRepository, fields: FieldsParam) -> User:
         """Get a user by ID."""
-        return users_repo.get(id)
+        return users_repo.get(id, load=UserReadDTO.load_options(fields))
 
-    @post("/", dto=UserCreateDTO)
-    async def create_user(
+    @get("/{id:int}/fines", return_dto=None, dependencies={"fines_repo": Provide(provide_fine_repo)})
+    async def get_user_fines(
+        self,
+        id: int,
+        users_repo: UserRepository,
+        fines_repo: FineRepository,
+    ) -> UserFines:
+        """Get fines assessed on returns plus fines accrued on open overdue loans."""
+        users_repo.get(id)
+        return fines_repo.get_user_fines(user_id=id)
+
+    @get("/{id:int}/dashboard", return_dto=None, dependencies={"dashboard_repo": Provide(provide_dashboard_repo)})
+    async def get_user_dashboard(
+        self,
+        id: int,
+        dashboard_repo: DashboardRepository,
+        reviews: Annotated[int, Parameter(query="reviews", default=5, ge=0, le=50)],
+    ) -> UserDashboard:
+        """Profile, active and overdue loans, fines and recent reviews in one call."""
+        return await build_dashboard(id, reviews_limit=reviews, repo=dashboard_repo)
+
+    @post("/", dto=UserCreateDTO, sync_to_thread=True)
+    def create_user(
         self,
         data: DTOData[User],
         users_repo: UserRepository,
@@ -53,8 +91,8 @@ class UserController(Controller):
 
         return users_repo.add_with_hashed_password(data)
 
-    @patch("/{id:int}", dto=UserUpdateDTO)
-    async def update_user(
+    @patch("/{id:int}", dto=UserUpdateDTO, sync_to_thread=True)
+    def update_user(
         self,
         id: int,
         data: DTOData[User],
@@ -69,8 +107,8 @@ class UserController(Controller):
         user, _ = users_repo.get_and_update(match_fields="id", id=id, **payload)
         return user
 
-    @post("/{id:int}/update-password", status_code=204)
-    async def update_password(
+    @post("/{id:int}/update-password", status_code=204, sync_to_thread=True)
+    def update_password(
         self,
         id: int,
         data: PasswordUpdate,
@@ -79,13 +117,17 @@ class UserController(Controller):
         """Update a user's password."""
         user = users_repo.get(id)
 
-        if not password_hasher.verify(data.current_password, user.password):
+        if not passwords.verify(data.current_password, user.password):
             raise HTTPException(detail="Contraseña incorrecta", status_code=401)
 
-        user.password = password_hasher.hash(data.new_password)
+        user.password = passwords.hash(data.new_password)
+        # Revoke tokens issued with the old password
+        user.token_version += 1
         users_repo.update(user)
+        token_versions.bump(user.id, user.token_version)
 
-    @delete("/{id:int}")
-    async def delete_user(self, id: int, users_repo: UserRepository) -> None:
+    @delete("/{id:int}", sync_to_thread=True)
+    def delete_user(self, id: int, users_repo: UserRepository) -> None:
         """Delete a user by ID."""
         users_repo.delete(id)
+        token_versions.revoke(id)
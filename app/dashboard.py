@@ -0,0 +1,91 @@
+"""User dashboard (``GET /users/{id}/dashboard``) built from a fixed number of queries.
+
+Profile + fine balance, open loans and recent reviews are one query each
+(:class:`~app.repositories.dashboard.DashboardRepository`), whatever the number
+of loans or reviews. On server databases the three run concurrently, each in a
+worker thread with its own session; SQLite runs them one after another on the
+request session.
+
+Every call is counted with :func:`app.db.count_queries`: going over
+:data:`DASHBOARD_QUERY_BUDGET` (an N+1 creeping back in) increments
+``library_query_budget_exceeded_total``; ``tests/test_dashboard.py`` holds the
+budget in CI.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Callable, TypeVar
+
+import anyio
+from advanced_alchemy.exceptions import NotFoundError
+
+from app.db import count_queries
+from app.metrics import QUERY_BUDGET_EXCEEDED
+from app.models import UserDashboard, UserFines
+from app.repositories.dashboard import DashboardRepository
+from app.repositories.fine import _money
+
+DASHBOARD_QUERY_BUDGET = 3
+
+T = TypeVar("T")
+
+
+def _in_own_session(section: Callable[[DashboardRepository], T]) -> T:
+    from app.db import sqlalchemy_config
+
+    with sqlalchemy_config.get_session() as session:
+        return section(DashboardRepository(session=session))
+
+
+async def build_dashboard(user_id: int, reviews_limit: int, repo: DashboardRepository) -> UserDashboard:
+    """Assemble the dashboard of ``user_id``; raise ``NotFoundError`` if the user doesn't exist."""
+    today = date.today()
+    sections: dict[str, Callable[[DashboardRepository], Any]] = {
+        "profile": lambda r: r.profile(user_id),
+        "loans": lambda r: r.open_loans(user_id, today),
+        "reviews": lambda r: r.recent_reviews(user_id, reviews_limit),
+    }
+    results: dict[str, Any] = {}
+
+    with count_queries() as counter:
+        if repo.session.get_bind().dialect.name == "sqlite":
+            for name, section in sections.items():
+                results[name] = section(repo)
+        else:
+
+            async def run(name: str, section: Callable[[DashboardRepository], Any]) -> None:
+                results[name] = await anyio.to_thread.run_sync(_in_own_session, section)
+
+            async with anyio.create_task_group() as tg:
+                for name, section in sections.items():
+                    tg.start_soon(run, name, section)
+
+    if counter.count > DASHBOARD_QUERY_BUDGET:
+        QUERY_BUDGET_EXCEEDED.labels("users.dashboard").inc()
+
+    profile = results["profile"]
+    if profile is None:
+        raise NotFoundError(f"user {user_id}")
+
+    loans = results["loans"]
+    overdue = [loan for loan in loans if loan.due_date < today]
+    assessed = _money(profile.assessed_amount)
+    accrued = _money(sum(loan.accrued_fine for loan in overdue))
+    return UserDashboard(
+        user_id=profile.id,
+        username=profile.username,
+        fullname=profile.fullname,
+        email=profile.email,
+        is_active=profile.is_active,
+        active_loans=[loan for loan in loans if loan.due_date >= today],
+        overdue_loans=overdue,
+        fines=UserFines(
+            user_id=profile.id,
+            assessed_amount=assessed,
+            accrued_amount=accrued,
+            total_amount=assessed + accrued,
+            overdue_loans=len(overdue),
+        ),
+        recent_reviews=results["reviews"],
+    )
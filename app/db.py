@@ -1,9 +1,71 @@
 """Database configuration with SQLAlchemy."""
 
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from advanced_alchemy.config import EngineConfig
 from advanced_alchemy.extensions.litestar import SQLAlchemyPlugin, SQLAlchemySyncConfig
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
 
 from app.config import settings
 
-sqlalchemy_config = SQLAlchemySyncConfig(connection_string=settings.database_url)
+
+def _engine_config() -> EngineConfig:
+    connect_args: dict[str, Any] = {}
+    # Server-side prepared statements are a psycopg 3 feature
+    if make_url(settings.database_url).get_driver_name() == "psycopg":
+        connect_args["prepare_threshold"] = settings.db_prepare_threshold
+    return EngineConfig(query_cache_size=settings.db_query_cache_size, connect_args=connect_args)
+
+
+sqlalchemy_config = SQLAlchemySyncConfig(connection_string=settings.database_url, engine_config=_engine_config())
 
 sqlalchemy_plugin = SQLAlchemyPlugin(config=sqlalchemy_config)
+
+if make_url(settings.database_url).get_backend_name() == "sqlite":
+    from app.sqlite import is_tuned, tune_engine
+
+    if is_tuned(sqlalchemy_config.get_engine()):
+        tune_engine(sqlalchemy_config.get_engine())
+
+
+class QueryCounter:
+    """Number of statements executed inside :func:`count_queries` (worker threads included)."""
+
+    def __init__(self, parent: "QueryCounter | None" = None) -> None:
+        self.count = 0
+        self.parent = parent
+        self._lock = threading.Lock()
+
+    def add(self) -> None:
+        with self._lock:
+            self.count += 1
+        if self.parent is not None:
+            self.parent.add()
+
+
+_query_counter: ContextVar[QueryCounter | None] = ContextVar("query_counter", default=None)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count the statements executed in this context, including ``anyio.to_thread`` calls made from it.
+
+    Nested counters also add to the enclosing one.
+    """
+    counter = QueryCounter(_query_counter.get())
+    token = _query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_counter.reset(token)
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_query(*_: Any) -> None:
+    counter = _query_counter.get()
+    if counter is not None:
+        counter.add()
@@ -0,0 +1,44 @@
+"""Base DTO sharing generated backends between route handlers."""
+
+from __future__ import annotations
+
+from typing import Any, ClassVar, TypeVar
+
+from advanced_alchemy.extensions.litestar import SQLAlchemyDTO
+from litestar.dto._backend import DTOBackend
+from litestar.typing import FieldDefinition
+
+T = TypeVar("T")
+
+
+class SharedBackendDTO(SQLAlchemyDTO[T]):
+    """``SQLAlchemyDTO`` that builds one backend per (DTO, annotation) instead of per handler.
+
+    Litestar code-generates a transfer backend for every handler using a DTO, which
+    is most of the app start-up time (``BookReadDTO`` alone is used by a dozen
+    handlers). Handlers with the same DTO and annotation get identical backends,
+    so the first one built is reused.
+
+    This relies on Litestar's private backend registry, so Litestar is pinned
+    in ``pyproject.toml``; ``tests/test_startup.py`` fails if the sharing stops.
+    """
+
+    _shared_backends: ClassVar[dict[tuple[Any, ...], Any]] = {}
+
+    @classmethod
+    def create_for_field_definition(
+        cls,
+        field_definition: FieldDefinition,
+        handler_id: str,
+        backend_cls: type[DTOBackend] | None = None,
+    ) -> None:
+        is_data = field_definition.name == "data"
+        backend_key = "data_backend" if is_data else "return_backend"
+        cache_key = (cls, field_definition.annotation, is_data, backend_cls)
+
+        if (backend := cls._shared_backends.get(cache_key)) is not None:
+            cls._dto_backends.setdefault(handler_id, {})[backend_key] = backend  # type: ignore[typeddict-unknown-key]
+            return
+
+        super().create_for_field_definition(field_definition, handler_id, backend_cls)
+        cls._shared_backends[cache_key] = cls._dto_backends[handler_id][backend_key]  # type: ignore[literal-required]
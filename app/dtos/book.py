@@ -1,17 +1,19 @@
 """Data Transfer Objects for Book endpoints."""
 
-from advanced_alchemy.extensions.litestar import SQLAlchemyDTO, SQLAlchemyDTOConfig
+from advanced_alchemy.extensions.litestar import SQLAlchemyDTOConfig
 
+from app.dtos.base import SharedBackendDTO
+from app.dtos.fields import SparseFieldsDTOMixin
 from app.models import Book
 
 
-class BookReadDTO(SQLAlchemyDTO[Book]):
+class BookReadDTO(SparseFieldsDTOMixin, SharedBackendDTO[Book]):
     """DTO for reading book data."""
 
     config = SQLAlchemyDTOConfig()
 
 
-class BookCreateDTO(SQLAlchemyDTO[Book]):
+class BookCreateDTO(SharedBackendDTO[Book]):
     """DTO for creating books."""
 
     config = SQLAlchemyDTOConfig(
@@ -26,7 +28,7 @@ class BookCreateDTO(SQLAlchemyDTO[Book]):
     )
 
 
-class BookUpdateDTO(SQLAlchemyDTO[Book]):
+class BookUpdateDTO(SharedBackendDTO[Book]):
     """DTO for updating books with partial data."""
 
     config = SQLAlchemyDTOConfig(
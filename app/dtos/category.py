@@ -1,23 +1,24 @@
 """Data Transfer Objects for Category endpoints."""
 
-from advanced_alchemy.extensions.litestar import SQLAlchemyDTO, SQLAlchemyDTOConfig
+from advanced_alchemy.extensions.litestar import SQLAlchemyDTOConfig
 
+from app.dtos.base import SharedBackendDTO
 from app.models import Category
 
 
-class CategoryReadDTO(SQLAlchemyDTO[Category]):
+class CategoryReadDTO(SharedBackendDTO[Category]):
     """DTO for reading categories."""
 
     config = SQLAlchemyDTOConfig()
 
 
-class CategoryCreateDTO(SQLAlchemyDTO[Category]):
+class CategoryCreateDTO(SharedBackendDTO[Category]):
     """DTO for creating categories."""
 
     config = SQLAlchemyDTOConfig(exclude={"id", "created_at", "updated_at", "books"})
 
 
-class CategoryUpdateDTO(SQLAlchemyDTO[Category]):
+class CategoryUpdateDTO(SharedBackendDTO[Category]):
     """DTO for updating categories."""
 
     config = SQLAlchemyDTOConfig(exclude={"id", "created_at", "updated_at", "books"}, partial=True)
@@ -0,0 +1,112 @@
+"""Sparse fieldsets (``?fields=a,b,c``) for read DTOs."""
+
+from __future__ import annotations
+
+from dataclasses import fields as dataclass_fields, is_dataclass
+from functools import cache
+from typing import Annotated, Any, Collection
+
+from litestar.exceptions import HTTPException
+from litestar.params import Parameter
+from sqlalchemy import inspect
+from sqlalchemy.orm import lazyload, load_only, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+FieldsParam = Annotated[
+    str | None,
+    Parameter(
+        query="fields",
+        default=None,
+        description="Comma separated list of fields to return, e.g. id,title,author,stock",
+    ),
+]
+
+
+# Never serialized when a related row is inlined
+NESTED_EXCLUDED_COLUMNS = {"password", "token_version"}
+
+
+def _columns_dict(obj: Any) -> dict[str, Any]:
+    """Shallow representation of a related row: its column values only."""
+    if is_dataclass(obj):
+        # Catalog snapshot rows (app.catalog) mirror the model's columns
+        return {f.name: getattr(obj, f.name) for f in dataclass_fields(obj)}
+    return {
+        attr.key: getattr(obj, attr.key)
+        for attr in inspect(obj).mapper.column_attrs
+        if attr.key not in NESTED_EXCLUDED_COLUMNS
+    }
+
+
+class SparseFieldsDTOMixin:
+    """Serialize only the fields requested through ``?fields=``.
+
+    Without the parameter the DTO behaves exactly as before. Handlers should pass
+    :meth:`load_options` to the repository so that the SELECT only fetches the
+    requested columns (heavy ones such as ``description`` or ``comment`` stay
+    deferred) and relationships are not eagerly loaded unless asked for.
+    """
+
+    asgi_connection: Any
+    config: Any
+    model_type: Any
+
+    @classmethod
+    @cache
+    def allowed_fields(cls) -> frozenset[str]:
+        """Fields exposed by this DTO (mapper attributes minus the DTO's exclusions)."""
+        keys = {attr.key for attr in inspect(cls.model_type).attrs}
+        if cls.config.include:
+            keys &= set(cls.config.include)
+        return frozenset(keys - set(cls.config.exclude))
+
+    @classmethod
+    def parse_fields(cls, raw: str | None) -> tuple[str, ...] | None:
+        """Parse ``?fields=``; ``None`` means "all fields".
+
+        Raises:
+            HTTPException: If an unknown field is requested.
+        """
+        if not raw:
+            return None
+        names = tuple(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+        unknown = [name for name in names if name not in cls.allowed_fields()]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"fields desconocidos: {', '.join(unknown)}")
+        return names or None
+
+    @classmethod
+    def load_options(cls, raw: str | None) -> list[LoaderOption] | None:
+        """Loader options restricting the SELECT to the requested fields."""
+        fields = cls.parse_fields(raw)
+        if fields is None:
+            return None
+
+        mapper = inspect(cls.model_type)
+        columns = [getattr(cls.model_type, name) for name in fields if name in mapper.column_attrs]
+        relationships = [getattr(cls.model_type, name) for name in fields if name in mapper.relationships]
+
+        options: list[LoaderOption] = [load_only(*columns) if columns else load_only(mapper.primary_key[0])]
+        options.extend(selectinload(rel).lazyload("*") for rel in relationships)
+        options.append(lazyload("*"))
+        return options
+
+    def data_to_encodable_type(self, data: Any) -> Any:
+        fields = self.parse_fields(self.asgi_connection.query_params.get("fields"))
+        if fields is None:
+            return super().data_to_encodable_type(data)  # type: ignore[misc]
+        if isinstance(data, Collection) and not isinstance(data, (str, bytes, dict)):
+            return [self._pick(item, fields) for item in data]
+        return self._pick(data, fields)
+
+    @staticmethod
+    def _pick(obj: Any, fields: tuple[str, ...]) -> dict[str, Any]:
+        picked: dict[str, Any] = {}
+        for name in fields:
+            value = getattr(obj, name)
+            if isinstance(value, list):
+                value = [_columns_dict(item) for item in value]
+            elif hasattr(value, "__mapper__") or is_dataclass(value):
+                value = _columns_dict(value)
+            picked[name] = value
+        return picked
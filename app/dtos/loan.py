@@ -1,17 +1,19 @@
 """Data Transfer Objects for Loan endpoints."""
 
-from advanced_alchemy.extensions.litestar import SQLAlchemyDTO, SQLAlchemyDTOConfig
+from advanced_alchemy.extensions.litestar import SQLAlchemyDTOConfig
 
+from app.dtos.base import SharedBackendDTO
+from app.dtos.fields import NESTED_EXCLUDED_COLUMNS, SparseFieldsDTOMixin
 from app.models import Loan
 
 
-class LoanReadDTO(SQLAlchemyDTO[Loan]):
+class LoanReadDTO(SparseFieldsDTOMixin, SharedBackendDTO[Loan]):
     """DTO for reading loan data."""
 
-    config = SQLAlchemyDTOConfig()
+    config = SQLAlchemyDTOConfig(exclude={f"user.{column}" for column in NESTED_EXCLUDED_COLUMNS})
 
 
-class LoanCreateDTO(SQLAlchemyDTO[Loan]):
+class LoanCreateDTO(SharedBackendDTO[Loan]):
     """DTO for creating loans."""
 
     config = SQLAlchemyDTOConfig(
@@ -28,7 +30,7 @@ class LoanCreateDTO(SQLAlchemyDTO[Loan]):
     )
 
 
-class LoanUpdateDTO(SQLAlchemyDTO[Loan]):
+class LoanUpdateDTO(SharedBackendDTO[Loan]):
     """DTO for updating loans. Only status is editable."""
 
     config = SQLAlchemyDTOConfig(
@@ -1,17 +1,19 @@
 """Data Transfer Objects for Review endpoints."""
 
-from advanced_alchemy.extensions.litestar import SQLAlchemyDTO, SQLAlchemyDTOConfig
+from advanced_alchemy.extensions.litestar import SQLAlchemyDTOConfig
 
+from app.dtos.base import SharedBackendDTO
+from app.dtos.fields import NESTED_EXCLUDED_COLUMNS, SparseFieldsDTOMixin
 from app.models import Review
 
 
-class ReviewReadDTO(SQLAlchemyDTO[Review]):
+class ReviewReadDTO(SparseFieldsDTOMixin, SharedBackendDTO[Review]):
     """DTO for reading reviews (includes user and book relationships)."""
 
-    config = SQLAlchemyDTOConfig()
+    config = SQLAlchemyDTOConfig(exclude={f"user.{column}" for column in NESTED_EXCLUDED_COLUMNS})
 
 
-class ReviewCreateDTO(SQLAlchemyDTO[Review]):
+class ReviewCreateDTO(SharedBackendDTO[Review]):
     """DTO for creating reviews."""
 
     config = SQLAlchemyDTOConfig(
@@ -19,7 +21,7 @@ class ReviewCreateDTO(SQLAlchemyDTO[Review]):
     )
 
 
-class ReviewUpdateDTO(SQLAlchemyDTO[Review]):
+class ReviewUpdateDTO(SharedBackendDTO[Review]):
     """DTO for updating reviews."""
 
     config = SQLAlchemyDTOConfig(
@@ -1,34 +1,36 @@
 """Data Transfer Objects for User endpoints."""
 
-from advanced_alchemy.extensions.litestar import SQLAlchemyDTO, SQLAlchemyDTOConfig
+from advanced_alchemy.extensions.litestar import SQLAlchemyDTOConfig
 
+from app.dtos.base import SharedBackendDTO
+from app.dtos.fields import SparseFieldsDTOMixin
 from app.models import User
 
 
-class UserReadDTO(SQLAlchemyDTO[User]):
+class UserReadDTO(SparseFieldsDTOMixin, SharedBackendDTO[User]):
     """DTO for reading user data without password and loans."""
 
-    config = SQLAlchemyDTOConfig(exclude={"password", "loans"})
+    config = SQLAlchemyDTOConfig(exclude={"password", "loans", "token_version"})
 
 
-class UserCreateDTO(SQLAlchemyDTO[User]):
+class UserCreateDTO(SharedBackendDTO[User]):
     """DTO for creating users."""
 
     config = SQLAlchemyDTOConfig(
-        exclude={"id", "created_at", "updated_at", "loans", "is_active"},
+        exclude={"id", "created_at", "updated_at", "loans", "is_active", "token_version"},
     )
 
 
-class UserUpdateDTO(SQLAlchemyDTO[User]):
+class UserUpdateDTO(SharedBackendDTO[User]):
     """DTO for updating users with partial data."""
 
     config = SQLAlchemyDTOConfig(
-        exclude={"id", "created_at", "updated_at", "password", "loans", "is_active"},
+        exclude={"id", "created_at", "updated_at", "password", "loans", "is_active", "token_version"},
         partial=True,
     )
 
 
-class UserLoginDTO(SQLAlchemyDTO[User]):
+class UserLoginDTO(SharedBackendDTO[User]):
     """DTO for user login."""
 
     config = SQLAlchemyDTOConfig(include={"username", "password"})
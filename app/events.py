@@ -0,0 +1,262 @@
+"""Live stock and loan changes pushed to clients over server-sent events.
+
+``GET /events/stock`` and ``GET /events/loans`` stream the changes made by
+``create_loan``, ``return_book``, ``update_stock`` and the overdue sweep, so
+kiosks and staff screens don't need to poll. Events carry the new state (the
+book's stock, the loan's status), never a relative change, so receiving one
+twice is harmless.
+
+Handlers call :meth:`Broadcaster.publish` after their commit. The event goes
+through the backplane (``EVENTS_BACKPLANE``) to every worker, and each worker's
+broadcaster fans it out to the streams open on it:
+
+* ``local``: this process only, for a single worker;
+* ``postgres``: ``NOTIFY`` on the application database, ``LISTEN`` in every
+  worker, so any number of workers stay in sync with no extra infrastructure.
+
+Each worker keeps the last ``EVENTS_REPLAY_SIZE`` events per stream. A client
+reconnecting with ``Last-Event-ID`` (browsers' ``EventSource`` does it on its
+own) gets the events it missed, or a ``reset`` event when its id is no longer
+in the buffer, meaning it should reload the full state. A client that can't
+keep up has at most ``EVENTS_CLIENT_BUFFER`` events queued; past that its stream
+is closed and it resumes from its last event on reconnect, so a slow client
+never holds back the handlers or the other clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Protocol
+
+import anyio
+from litestar.response import ServerSentEventMessage
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from litestar import Litestar
+    from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+STREAMS = ("stock", "loans")
+
+_NOTIFY_CHANNEL = "library_live_events"
+
+
+@dataclass(slots=True)
+class LiveEvent:
+    """A change as sent to the clients of one stream."""
+
+    id: str
+    stream: str
+    type: str
+    data: dict[str, Any]
+
+
+class Backplane(Protocol):
+    """Delivers published events to the broadcaster of every worker."""
+
+    def publish(self, event: LiveEvent) -> None:
+        """Send ``event`` to all workers (called from any thread, without blocking it)."""
+
+    async def run(self) -> None:
+        """Receive events until cancelled."""
+
+
+class LocalBackplane:
+    """In-process delivery: enough for one worker."""
+
+    def __init__(self, deliver: Callable[[LiveEvent], None]) -> None:
+        self.deliver = deliver
+
+    def publish(self, event: LiveEvent) -> None:
+        self.deliver(event)
+
+    async def run(self) -> None:
+        await anyio.sleep_forever()
+
+
+class PostgresBackplane:
+    """``NOTIFY``/``LISTEN`` on the application database; the publisher receives its own events too.
+
+    :meth:`publish` never waits on the database: it queues the event for
+    :meth:`run`, which sends it with ``NOTIFY`` on a connection of its own.
+    """
+
+    def __init__(self, deliver: Callable[[LiveEvent], None], engine: Engine) -> None:
+        self.deliver = deliver
+        self.engine = engine
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._outgoing: asyncio.Queue[LiveEvent] | None = None
+
+    def publish(self, event: LiveEvent) -> None:
+        loop, outgoing = self._loop, self._outgoing
+        if loop is not None and outgoing is not None:
+            loop.call_soon_threadsafe(self._enqueue, outgoing, event)
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._outgoing = asyncio.Queue(maxsize=settings.events_replay_size)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(self._listen)
+            tg.start_soon(self._notify, self._outgoing)
+
+    @property
+    def _dsn(self) -> str:
+        return self.engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+    @staticmethod
+    def _enqueue(outgoing: asyncio.Queue[LiveEvent], event: LiveEvent) -> None:
+        # Database unavailable for a while: newer events are dropped; clients get ``reset`` on resume
+        with suppress(asyncio.QueueFull):
+            outgoing.put_nowait(event)
+
+    async def _listen(self) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._dsn, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {_NOTIFY_CHANNEL}")
+                    async for notify in conn.notifies():
+                        self.deliver(LiveEvent(**json.loads(notify.payload)))
+            except Exception:
+                # Database unavailable: events published meanwhile are lost; clients get ``reset`` on resume
+                logger.exception("Se perdió la conexión LISTEN de eventos en vivo; reconectando")
+                await anyio.sleep(1)
+
+    async def _notify(self, outgoing: asyncio.Queue[LiveEvent]) -> None:
+        import psycopg
+
+        event = await outgoing.get()
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._dsn, autocommit=True) as conn:
+                    while True:
+                        await conn.execute(
+                            "SELECT pg_notify(%s, %s)", (_NOTIFY_CHANNEL, json.dumps(asdict(event)))
+                        )
+                        event = await outgoing.get()
+            except Exception:
+                # Database unavailable: the event is lost; clients get ``reset`` on resume
+                logger.exception("No se pudo enviar un evento en vivo con NOTIFY; reconectando")
+                await anyio.sleep(1)
+                event = await outgoing.get()
+
+
+class _Subscriber:
+    """Events queued for one open stream."""
+
+    __slots__ = ("queue", "wakeup", "overflowed")
+
+    def __init__(self) -> None:
+        self.queue: deque[LiveEvent] = deque()
+        self.wakeup = anyio.Event()
+        self.overflowed = False
+
+
+class Broadcaster:
+    """Replay buffers and open streams of this worker."""
+
+    __slots__ = ("buffers", "subscribers", "backplane", "_loop")
+
+    def __init__(self) -> None:
+        self.buffers: dict[str, deque[LiveEvent]] = {s: deque(maxlen=settings.events_replay_size) for s in STREAMS}
+        self.subscribers: dict[str, set[_Subscriber]] = {s: set() for s in STREAMS}
+        self.backplane: Backplane = LocalBackplane(self.deliver)
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def publish(self, stream: str, type: str, data: dict[str, Any]) -> None:
+        """Send a change to every client of ``stream``; call after the change is committed."""
+        if self._loop is None:
+            # Not serving (CLI, events disabled)
+            return
+        event = LiveEvent(id=f"{time.time_ns()}-{os.getpid()}", stream=stream, type=type, data=data)
+        # Best effort: the change is already committed, and clients recover through ``reset``
+        with suppress(Exception):
+            self.backplane.publish(event)
+
+    def deliver(self, event: LiveEvent) -> None:
+        """Hand an event from the backplane to this worker's streams (from any thread)."""
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(self._fan_out, event)
+
+    async def stream(self, stream: str, last_event_id: str | None) -> AsyncIterator[ServerSentEventMessage]:
+        """Messages for one client: the missed events after ``last_event_id``, then live ones."""
+        subscriber = _Subscriber()
+        # Subscribed before anything is sent, so no event falls between the replay and the live ones
+        self.subscribers[stream].add(subscriber)
+        try:
+            if last_event_id is not None:
+                buffered = list(self.buffers[stream])
+                position = next((i for i, event in enumerate(buffered) if event.id == last_event_id), None)
+                if position is None:
+                    yield ServerSentEventMessage(event="reset", data="{}")
+                else:
+                    subscriber.queue.extend(buffered[position + 1 :])
+            while True:
+                while subscriber.queue:
+                    event = subscriber.queue.popleft()
+                    yield ServerSentEventMessage(event=event.type, data=json.dumps(event.data), id=event.id)
+                if subscriber.overflowed or self._loop is None:
+                    return
+                subscriber.wakeup = anyio.Event()
+                with anyio.move_on_after(settings.events_keepalive_seconds) as keepalive:
+                    await subscriber.wakeup.wait()
+                if keepalive.cancelled_caught:
+                    yield ServerSentEventMessage(comment="keepalive", data=None)
+        finally:
+            self.subscribers[stream].discard(subscriber)
+
+    # --- helpers (event loop thread) ---
+
+    def _fan_out(self, event: LiveEvent) -> None:
+        self.buffers[event.stream].append(event)
+        for subscriber in self.subscribers[event.stream]:
+            if len(subscriber.queue) >= settings.events_client_buffer:
+                subscriber.overflowed = True
+            else:
+                subscriber.queue.append(event)
+            subscriber.wakeup.set()
+
+    def _close_streams(self) -> None:
+        for subscribers in self.subscribers.values():
+            for subscriber in subscribers:
+                subscriber.wakeup.set()
+
+
+live_events = Broadcaster()
+
+
+@asynccontextmanager
+async def live_events_lifespan(_: Litestar) -> AsyncIterator[None]:
+    """Start receiving from the backplane; end the open streams on shutdown."""
+    if not settings.events_enabled:
+        yield
+        return
+
+    if settings.events_backplane == "postgres":
+        from app.db import sqlalchemy_config
+
+        live_events.backplane = PostgresBackplane(live_events.deliver, sqlalchemy_config.get_engine())
+    else:
+        live_events.backplane = LocalBackplane(live_events.deliver)
+
+    live_events._loop = asyncio.get_running_loop()
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(live_events.backplane.run)
+        try:
+            yield
+        finally:
+            tg.cancel_scope.cancel()
+            live_events._loop = None
+            live_events._close_streams()
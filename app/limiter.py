@@ -0,0 +1,169 @@
+"""Per-route-group concurrency limits with priorities and load shedding.
+
+Every request belongs to one group, in priority order:
+
+* ``circulation``: loans, returns and logins (``CONCURRENCY_CIRCULATION_ROUTES``);
+* ``writes``: every other non-GET request (catalog and user changes);
+* ``reads``: every other GET;
+* ``analytics``: reports and aggregates (``CONCURRENCY_ANALYTICS_ROUTES``).
+
+A worker runs at most ``CONCURRENCY_LIMIT`` requests at once (keep it near the
+database pool size, so requests wait here, in priority order, rather than for a
+connection). ``CONCURRENCY_RESERVED_CIRCULATION`` of those slots are only
+available to circulation, so a burst of reports or list reads can never take
+every connection, and ``CONCURRENCY_GROUP_MAX`` caps a group on its own.
+
+A request that can't start waits in its group's FIFO queue; a freed slot goes to
+the highest-priority group with a request waiting. When the queue is full
+(``CONCURRENCY_QUEUE_SIZE``) or the request has waited
+``CONCURRENCY_QUEUE_SECONDS``, it gets ``503`` with ``Retry-After``: when the
+database slows down, the queues of the low-priority groups are shed first and
+circulation keeps going.
+
+Limits are per worker process. The middleware is the innermost one, so it limits
+handler executions: requests coalesced by single-flight don't take a slot, and
+authentication runs before it (``JWT_CLAIMS_AUTH`` keeps that off the database).
+"""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import TYPE_CHECKING
+
+import anyio
+from litestar.enums import ScopeType
+from litestar.exceptions import ServiceUnavailableException
+from litestar.middleware import AbstractMiddleware
+
+from app.config import settings
+from app.metrics import CONCURRENCY_QUEUE_DEPTH, CONCURRENCY_REJECTED, CONCURRENCY_RUNNING
+
+if TYPE_CHECKING:
+    from litestar.types import Receive, Scope, Send
+
+# Highest priority first
+GROUPS = ("circulation", "writes", "reads", "analytics")
+
+# Never limited: the scrape must work precisely when the service is overloaded,
+# and event streams stay open (they don't use the database)
+_UNLIMITED_PREFIXES = ("/metrics", "/schema", "/events")
+
+
+class _Group:
+    """Running count and wait queue of one route group."""
+
+    __slots__ = ("name", "max_running", "queue_size", "queue_seconds", "running", "waiting")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.max_running = settings.concurrency_group_max.get(name, settings.concurrency_limit)
+        self.queue_size = settings.concurrency_queue_size.get(name, 0)
+        self.queue_seconds = settings.concurrency_queue_seconds.get(name, 0.0)
+        self.running = 0
+        self.waiting: deque[anyio.Event] = deque()
+
+
+class ConcurrencyLimiter:
+    """Slots shared by the route groups of this worker; the caller is on the event loop."""
+
+    __slots__ = ("groups", "running")
+
+    def __init__(self) -> None:
+        self.groups = {name: _Group(name) for name in GROUPS}
+        self.running = 0
+
+    def group_for(self, method: str, route: str) -> _Group | None:
+        """Group of a request by method and route template; ``None`` if it is not limited."""
+        if route.startswith(_UNLIMITED_PREFIXES):
+            return None
+        if f"{method} {route}" in settings.concurrency_circulation_routes:
+            return self.groups["circulation"]
+        if method not in ("GET", "HEAD"):
+            return self.groups["writes"]
+        if route in settings.concurrency_analytics_routes:
+            return self.groups["analytics"]
+        return self.groups["reads"]
+
+    async def acquire(self, group: _Group) -> str | None:
+        """Take a slot, waiting in the group's queue if needed; else the reason it was refused."""
+        if not group.waiting and self._can_run(group):
+            self._take(group)
+            return None
+        if len(group.waiting) >= group.queue_size:
+            return "queue_full"
+
+        turn = anyio.Event()
+        group.waiting.append(turn)
+        CONCURRENCY_QUEUE_DEPTH.labels(group.name).set(len(group.waiting))
+        try:
+            with anyio.move_on_after(group.queue_seconds):
+                await turn.wait()
+        except BaseException:
+            # Client went away: hand back a slot given to us meanwhile
+            if turn.is_set():
+                self.release(group)
+            else:
+                self._leave_queue(group, turn)
+            raise
+        if turn.is_set():
+            # ``release`` already took the slot on our behalf
+            return None
+        self._leave_queue(group, turn)
+        return "timeout"
+
+    def release(self, group: _Group) -> None:
+        """Free a slot and hand it to the highest-priority waiting request that may run."""
+        self.running -= 1
+        group.running -= 1
+        CONCURRENCY_RUNNING.labels(group.name).set(group.running)
+        for candidate in self.groups.values():
+            while candidate.waiting and self._can_run(candidate):
+                self._take(candidate)
+                candidate.waiting.popleft().set()
+                CONCURRENCY_QUEUE_DEPTH.labels(candidate.name).set(len(candidate.waiting))
+
+    # --- helpers ---
+
+    def _can_run(self, group: _Group) -> bool:
+        capacity = settings.concurrency_limit
+        if group.name != "circulation":
+            capacity -= settings.concurrency_reserved_circulation
+        return self.running < capacity and group.running < group.max_running
+
+    def _take(self, group: _Group) -> None:
+        self.running += 1
+        group.running += 1
+        CONCURRENCY_RUNNING.labels(group.name).set(group.running)
+
+    @staticmethod
+    def _leave_queue(group: _Group, turn: anyio.Event) -> None:
+        group.waiting.remove(turn)
+        CONCURRENCY_QUEUE_DEPTH.labels(group.name).set(len(group.waiting))
+
+
+limiter = ConcurrencyLimiter()
+
+
+class ConcurrencyLimitMiddleware(AbstractMiddleware):
+    """Run each request within its route group's share of the worker, or answer 503."""
+
+    scopes = {ScopeType.HTTP}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        group = limiter.group_for(scope["method"], scope.get("path_template", scope["path"]))
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        refused = await limiter.acquire(group)
+        if refused is not None:
+            CONCURRENCY_REJECTED.labels(group.name, refused).inc()
+            raise ServiceUnavailableException(
+                detail="Servicio saturado, inténtalo de nuevo en unos segundos",
+                headers={"Retry-After": str(max(1, math.ceil(group.queue_seconds)))},
+            )
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(group)
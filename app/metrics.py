@@ -0,0 +1,165 @@
+"""Prometheus metrics: per-route HTTP metrics, domain counters and DB pool gauges.
+
+HTTP request counts, latency histograms and in-flight gauges come from Litestar's
+:class:`~litestar.plugins.prometheus.PrometheusMiddleware`, labelled by route
+template (``/books/{id:int}``) rather than raw path to keep cardinality bounded.
+
+With several worker processes, export ``PROMETHEUS_MULTIPROC_DIR`` (an empty,
+writable directory, wiped on deploy) before starting them: every worker writes its
+samples to memory-mapped files there and ``GET /metrics`` aggregates all of them,
+whichever worker serves the scrape.
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+from litestar.plugins.prometheus import PrometheusConfig, PrometheusController
+from prometheus_client import Counter, Gauge
+from sqlalchemy import event
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from litestar import Litestar
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.pool import Pool
+
+prometheus_config = PrometheusConfig(
+    app_name="library",
+    prefix="library",
+    group_path=True,
+    exclude_unhandled_paths=True,
+    exclude=["^/metrics"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+
+
+class MetricsController(PrometheusController):
+    """``GET /metrics`` in Prometheus text format."""
+
+    path = "/metrics"
+    include_in_schema = False
+
+
+# --- domain counters ---
+
+LOANS = Counter("library_loans_total", "Loans created and returned", ["event"])
+LOGIN_ATTEMPTS = Counter(
+    "library_login_attempts_total",
+    "Login attempts by outcome (success, failure, throttled)",
+    ["result"],
+)
+CACHE_LOOKUPS = Counter(
+    "library_cache_lookups_total",
+    "In-process cache lookups by cache and result (hit, miss); hit ratio = hit / total",
+    ["cache", "result"],
+)
+
+OUTBOX_EVENTS = Counter(
+    "library_outbox_events_total",
+    "Outbox events processed by topic and result (done, retry, failed)",
+    ["topic", "result"],
+)
+
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "library_single_flight_requests_total",
+    "Requests to single-flight routes by role (leader runs the handler, coalesced reuses its response)",
+    ["route", "role"],
+)
+
+QUERY_BUDGET_EXCEEDED = Counter(
+    "library_query_budget_exceeded_total",
+    "Requests that ran more SQL statements than their endpoint's budget",
+    ["endpoint"],
+)
+
+
+CONCURRENCY_RUNNING = Gauge(
+    "library_concurrency_running",
+    "Requests running per route group (app/limiter.py)",
+    ["group"],
+    multiprocess_mode="livesum",
+)
+CONCURRENCY_QUEUE_DEPTH = Gauge(
+    "library_concurrency_queue_depth",
+    "Requests waiting for a slot per route group",
+    ["group"],
+    multiprocess_mode="livesum",
+)
+CONCURRENCY_REJECTED = Counter(
+    "library_concurrency_rejected_total",
+    "Requests answered 503 by route group and reason (queue_full, timeout)",
+    ["group", "reason"],
+)
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a lookup in one of the in-process caches."""
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+# --- database pool ---
+
+DB_POOL_CONNECTIONS = Gauge(
+    "library_db_pool_connections",
+    "Connections in the SQLAlchemy pool by state (checked_out, idle, overflow)",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "library_db_pool_size",
+    "Configured size of the SQLAlchemy pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUTS = Counter("library_db_pool_checkouts_total", "Connections checked out from the pool")
+
+
+def _observe_pool(pool: Pool) -> None:
+    # Only QueuePool (the default for server databases) reports its occupancy
+    size = getattr(pool, "size", None)
+    if size is None:
+        return
+    DB_POOL_SIZE.set(size())
+    DB_POOL_CONNECTIONS.labels("checked_out").set(pool.checkedout())  # type: ignore[attr-defined]
+    DB_POOL_CONNECTIONS.labels("idle").set(pool.checkedin())  # type: ignore[attr-defined]
+    DB_POOL_CONNECTIONS.labels("overflow").set(max(pool.overflow(), 0))  # type: ignore[attr-defined]
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Update the pool gauges on checkout/checkin and count compiled-cache hits per statement."""
+    pool = engine.pool
+
+    def on_checkout(*_: Any) -> None:
+        DB_POOL_CHECKOUTS.inc()
+        _observe_pool(pool)
+
+    def on_checkin(*_: Any) -> None:
+        _observe_pool(pool)
+
+    def on_execute(_conn: Any, _cursor: Any, _statement: Any, _params: Any, context: Any, _many: Any) -> None:
+        # SQLAlchemy compiled-statement cache; statements without a cache key are not counted
+        if context is not None and context.cache_hit in (engine.dialect.CACHE_HIT, engine.dialect.CACHE_MISS):
+            record_cache_lookup("sql_compiled", context.cache_hit == engine.dialect.CACHE_HIT)
+
+    event.listen(pool, "checkout", on_checkout)
+    event.listen(pool, "checkin", on_checkin)
+    event.listen(engine, "after_cursor_execute", on_execute)
+    _observe_pool(pool)
+
+
+@asynccontextmanager
+async def metrics_lifespan(_: Litestar) -> AsyncIterator[None]:
+    """Instrument the engine pool; drop this worker's live gauges on shutdown."""
+    from app.db import sqlalchemy_config
+
+    instrument_engine(sqlalchemy_config.get_engine())
+    try:
+        yield
+    finally:
+        multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        if multiproc_dir:
+            from prometheus_client import multiprocess
+
+            multiprocess.mark_process_dead(os.getpid(), multiproc_dir)
@@ -0,0 +1,189 @@
+"""Helpers for Alembic migrations that run while the API is serving traffic.
+
+Plain ``op.create_index`` and whole-table ``UPDATE`` statements hold locks on
+the table for as long as they take, and ``migrations/env.py`` runs every
+revision in a transaction, so on ``loans`` or ``users`` the API would stall for
+the whole migration. In the version scripts use instead:
+
+* :func:`create_index_concurrently` / :func:`drop_index_concurrently`:
+  ``CREATE/DROP INDEX CONCURRENTLY`` outside the transaction (PostgreSQL;
+  plain index operations elsewhere). An invalid index left by an interrupted
+  run is dropped and built again.
+* :func:`backfill`: ``UPDATE`` in primary-key ranges of
+  ``MIGRATION_BACKFILL_BATCH_SIZE`` rows, each committed on its own, with a
+  pause of ``MIGRATION_BACKFILL_PAUSE_SECONDS`` between batches and progress
+  logged as it goes.
+* :func:`set_not_null`: ``NOT NULL`` checked through a ``NOT VALID`` constraint
+  validated without blocking writes, instead of a table scan under an
+  exclusive lock.
+
+:func:`backfill`, :func:`set_not_null` and the concurrent index operations
+commit as they go, together with the DDL before them in the revision. Keep them
+in a revision of their own, after the one with the schema changes they need,
+or make that DDL idempotent (``if_not_exists=True``), so that running the
+upgrade again after a failure resumes where it stopped.
+
+``migrations/env.py`` also sets ``lock_timeout`` (``MIGRATION_LOCK_TIMEOUT``)
+on PostgreSQL: a DDL statement waiting for a lock fails after that long instead
+of queueing every request behind it; run the migration again later.
+
+Dry run: ``alembic -x dry-run=true upgrade head`` runs the migrations in one
+transaction that is rolled back at the end. Backfills and ``set_not_null`` log
+the planner's estimate of the rows they would touch and concurrent index
+operations log the table size, without running.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import TYPE_CHECKING, Sequence
+
+from alembic import context, op
+from sqlalchemy import text
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection
+
+logger = logging.getLogger("alembic.toolkit")
+
+
+def is_dry_run() -> bool:
+    """Whether the migration was started with ``-x dry-run=true``."""
+    return context.get_x_argument(as_dictionary=True).get("dry-run", "").lower() in ("1", "true", "yes")
+
+
+def _is_postgres() -> bool:
+    return op.get_bind().dialect.name == "postgresql"
+
+
+# --- indexes ---
+
+
+def create_index_concurrently(name: str, table: str, columns: Sequence[str], *, unique: bool = False) -> None:
+    """Build an index without blocking writes to ``table`` (PostgreSQL)."""
+    if not _is_postgres():
+        op.create_index(name, table, list(columns), unique=unique, if_not_exists=True)
+        return
+    if is_dry_run():
+        logger.info("[dry-run] CREATE INDEX CONCURRENTLY %s ON %s (~%d filas)", name, table, estimate_rows(table))
+        return
+
+    with op.get_context().autocommit_block():
+        # An interrupted CONCURRENTLY build leaves an INVALID index behind
+        if not context.is_offline_mode() and _is_invalid_index(name):
+            logger.info("Eliminando el índice inválido %s de una ejecución anterior", name)
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        op.create_index(name, table, list(columns), unique=unique, postgresql_concurrently=True, if_not_exists=True)
+
+
+def drop_index_concurrently(name: str, table: str) -> None:
+    """Drop an index without blocking writes to ``table`` (PostgreSQL)."""
+    if not _is_postgres():
+        op.drop_index(name, table_name=table, if_exists=True)
+        return
+    if is_dry_run():
+        logger.info("[dry-run] DROP INDEX CONCURRENTLY %s", name)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def _is_invalid_index(name: str) -> bool:
+    query = text("SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid")
+    return op.get_bind().execute(query, {"name": name}).scalar() is not None
+
+
+# --- data ---
+
+
+def backfill(
+    table: str,
+    assignments: str,
+    where: str,
+    *,
+    key: str = "id",
+    batch_size: int | None = None,
+    pause_seconds: float | None = None,
+) -> int:
+    """``UPDATE table SET assignments WHERE where`` in committed batches by ``key`` range; return the rows updated.
+
+    ``key`` must be an integer column with an index (the primary key). Each
+    batch commits on its own, so a failed backfill keeps the batches already
+    done and running it again only touches the rows still matching ``where``.
+    """
+    batch_size = batch_size or settings.migration_backfill_batch_size
+    pause_seconds = settings.migration_backfill_pause_seconds if pause_seconds is None else pause_seconds
+    statement = f"UPDATE {table} SET {assignments} WHERE {where}"
+
+    if context.is_offline_mode():
+        op.execute(statement)
+        return 0
+    if is_dry_run():
+        logger.info("[dry-run] %s (~%d filas)", statement, estimate_rows(table, where))
+        return 0
+
+    bind = op.get_bind()
+    low, high = bind.execute(text(f"SELECT min({key}), max({key}) FROM {table}")).one()
+    if low is None:
+        return 0
+
+    updated = 0
+    batch = text(f"UPDATE {table} SET {assignments} WHERE {key} BETWEEN :low AND :high AND ({where})")
+    with op.get_context().autocommit_block():
+        for start in range(low, high + 1, batch_size):
+            updated += bind.execute(batch, {"low": start, "high": start + batch_size - 1}).rowcount
+            done = min(start + batch_size - low, high - low + 1)
+            logger.info("%s: %d filas actualizadas (%d%% del rango de %s)", table, updated, done * 100 // (high - low + 1), key)
+            if pause_seconds:
+                time.sleep(pause_seconds)
+    return updated
+
+
+def set_not_null(table: str, column: str) -> None:
+    """``ALTER COLUMN ... SET NOT NULL`` without scanning ``table`` under an exclusive lock (PostgreSQL).
+
+    Each step commits on its own, so the ``ACCESS EXCLUSIVE`` lock of
+    ``ADD CONSTRAINT`` is released before the ``VALIDATE`` scan. Safe to run
+    again after an interruption.
+    """
+    if not _is_postgres():
+        op.alter_column(table, column, nullable=False)
+        return
+    if is_dry_run():
+        # The backfill that would fill the column didn't run either
+        logger.info("[dry-run] SET NOT NULL %s.%s (~%d filas con NULL)", table, column, estimate_rows(table, f"{column} IS NULL"))
+        return
+
+    check = f"ck_{table}_{column}_not_null"
+    with op.get_context().autocommit_block():
+        # Left behind by an interrupted run
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check}")
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({column} IS NOT NULL) NOT VALID")
+        # VALIDATE only takes SHARE UPDATE EXCLUSIVE; SET NOT NULL then trusts the constraint
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}")
+        op.alter_column(table, column, nullable=False)
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT {check}")
+
+
+# --- estimates ---
+
+
+def estimate_rows(table: str, where: str | None = None) -> int:
+    """Planner estimate of the rows of ``table`` matching ``where`` (all without it); exact count on SQLite."""
+    bind = op.get_bind()
+    query = f"SELECT 1 FROM {table}" + (f" WHERE {where}" if where else "")
+    if not _is_postgres():
+        return bind.execute(text(f"SELECT count(*) FROM ({query})")).scalar_one()
+    plan = bind.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar_one()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def apply_lock_timeout(connection: Connection) -> None:
+    """Make DDL give up after ``MIGRATION_LOCK_TIMEOUT`` waiting for a lock (PostgreSQL; used by env.py)."""
+    if connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET lock_timeout = '{settings.migration_lock_timeout}'")
+        # Session setting; leave no transaction open for Alembic to nest into
+        connection.commit()
@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from enum import StrEnum
+from typing import Any
 
 from advanced_alchemy.base import BigIntAuditBase
-from sqlalchemy import ForeignKey, Numeric, String, Table, Column, Enum as SAEnum
+from advanced_alchemy.types import DateTimeUTC, JsonB
+from sqlalchemy import BigInteger, Float, ForeignKey, Index, Integer, Numeric, String, Table, Column, UniqueConstraint, Enum as SAEnum, event, insert
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 
@@ -18,6 +20,8 @@ book_categories = Table(
     BigIntAuditBase.metadata,
     Column("book_id", ForeignKey("books.id", ondelete="CASCADE"), primary_key=True),
     Column("category_id", ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True),
+    # The primary key (book_id, category_id) doesn't serve lookups by category
+    Index("ix_book_categories_category_id", "category_id"),
 )
 
 
@@ -40,6 +44,7 @@ class User(BigIntAuditBase):
     """User model with audit fields."""
 
     __tablename__ = "users"
+    __table_args__ = (Index("ix_users_updated_at_id", "updated_at", "id"),)
 
     username: Mapped[str] = mapped_column(unique=True)
     fullname: Mapped[str]
@@ -49,6 +54,8 @@ class User(BigIntAuditBase):
     phone: Mapped[str | None] = mapped_column(nullable=True)
     address: Mapped[str | None] = mapped_column(nullable=True)
     is_active: Mapped[bool] = mapped_column(default=True)
+    # Bumped to revoke every token issued before (see app.security.token_versions)
+    token_version: Mapped[int] = mapped_column(default=0, server_default="0")
 
     loans: Mapped[list[Loan]] = relationship(back_populates="user")  # type: ignore[name-defined]
     reviews: Mapped[list[Review]] = relationship(back_populates="user")  # type: ignore[name-defined]
@@ -58,6 +65,13 @@ class Book(BigIntAuditBase):
     """Book model with audit fields."""
 
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_updated_at_id", "updated_at", "id"),
+        # Filters and facets of GET /books/browse
+        Index("ix_books_published_year", "published_year"),
+        Index("ix_books_language", "language"),
+        Index("ix_books_publisher", "publisher"),
+    )
 
     title: Mapped[str] = mapped_column(unique=True)
     author: Mapped[str]
@@ -89,6 +103,11 @@ class Loan(BigIntAuditBase):
     """Loan model with audit fields."""
 
     __tablename__ = "loans"
+    __table_args__ = (
+        Index("ix_loans_updated_at_id", "updated_at", "id"),
+        # Recomputing analytics rollups for a (day, book) / (month, book)
+        Index("ix_loans_book_id_loan_dt", "book_id", "loan_dt"),
+    )
 
     loan_dt: Mapped[date] = mapped_column(default=datetime.today)
     due_date: Mapped[date] = mapped_column(default=lambda: (date.today() + timedelta(days=14)))
@@ -107,6 +126,51 @@ class Loan(BigIntAuditBase):
     book: Mapped[Book] = relationship(back_populates="loans")
 
 
+class LoanArchive(BigIntAuditBase):
+    """Cold copy of a RETURNED loan moved out of ``loans`` by the archival job.
+
+    Keeps the original loan id so hot and archived rows can be unioned as ``Loan``.
+    """
+
+    __tablename__ = "loans_archive"
+    __table_args__ = (Index("ix_loans_archive_book_id_loan_dt", "book_id", "loan_dt"),)
+
+    loan_dt: Mapped[date]
+    due_date: Mapped[date]
+    return_dt: Mapped[date | None]
+
+    fine_amount: Mapped[Decimal | None] = mapped_column(Numeric(10, 2), nullable=True)
+    status: Mapped[LoanStatus] = mapped_column(SAEnum(LoanStatus, name="loanstatus"))
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id"))
+
+    archived_at: Mapped[datetime] = mapped_column(DateTimeUTC(timezone=True))
+
+
+class UserFineBalance(BigIntAuditBase):
+    """Running total of fines assessed on returned loans, one row per user."""
+
+    __tablename__ = "user_fine_balances"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), unique=True)
+    assessed_amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=Decimal("0"))
+    fined_loans: Mapped[int] = mapped_column(default=0)
+
+
+class BookTrendScore(BigIntAuditBase):
+    """Persisted trending score of a book, one row per book (see :mod:`app.trending`).
+
+    ``score`` is the sum of forward-decayed event weights relative to
+    ``TRENDING_EPOCH``, so deltas from several workers can simply be added.
+    """
+
+    __tablename__ = "book_trend_scores"
+
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), unique=True)
+    score: Mapped[float] = mapped_column(Float(precision=53), default=0.0)
+
+
 class Review(BigIntAuditBase):
     """Review model for book reviews."""
 
@@ -123,6 +187,135 @@ class Review(BigIntAuditBase):
     book: Mapped[Book] = relationship(back_populates="reviews", lazy="selectin")
 
 
+class Tombstone(BigIntAuditBase):
+    """Marker left behind by a deleted row so the change feed can report it."""
+
+    __tablename__ = "tombstones"
+    __table_args__ = (Index("ix_tombstones_resource_updated_at_id", "resource", "updated_at", "id"),)
+
+    resource: Mapped[str]
+    record_id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer(), "sqlite"))
+
+
+class OutboxStatus(StrEnum):
+    PENDING = "PENDING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+class OutboxEvent(BigIntAuditBase):
+    """Domain event written in the same transaction as the change that caused it.
+
+    Drained by the background worker in :mod:`app.outbox`.
+    """
+
+    __tablename__ = "outbox_events"
+    __table_args__ = (Index("ix_outbox_events_status_available_at_id", "status", "available_at", "id"),)
+
+    topic: Mapped[str]
+    payload: Mapped[dict[str, Any]] = mapped_column(JsonB)
+    status: Mapped[OutboxStatus] = mapped_column(
+        SAEnum(OutboxStatus, name="outboxstatus"),
+        default=OutboxStatus.PENDING,
+    )
+    attempts: Mapped[int] = mapped_column(default=0)
+    # Next attempt not before this time (retry backoff)
+    available_at: Mapped[datetime] = mapped_column(DateTimeUTC(timezone=True))
+    processed_at: Mapped[datetime | None] = mapped_column(DateTimeUTC(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(nullable=True)
+
+
+class LoanDailyRollup(BigIntAuditBase):
+    """Loans made on ``day`` for one book, by current status (see :mod:`app.analytics`)."""
+
+    __tablename__ = "loan_daily_rollups"
+    __table_args__ = (UniqueConstraint("day", "book_id", "status"),)
+
+    day: Mapped[date]
+    book_id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer(), "sqlite"))
+    status: Mapped[LoanStatus] = mapped_column(SAEnum(LoanStatus, name="loanstatus"))
+    loans: Mapped[int]
+    # Returned after due_date, or still out and marked OVERDUE
+    late: Mapped[int]
+
+
+class FineMonthlyRollup(BigIntAuditBase):
+    """Returns and fines of one book in the month of ``return_dt`` (first day of the month)."""
+
+    __tablename__ = "fine_monthly_rollups"
+    __table_args__ = (UniqueConstraint("month", "book_id"),)
+
+    month: Mapped[date]
+    book_id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer(), "sqlite"))
+    returns: Mapped[int]
+    late_returns: Mapped[int]
+    fines: Mapped[Decimal] = mapped_column(Numeric(12, 2))
+
+
+class AnalyticsWatermark(BigIntAuditBase):
+    """How far the rollups have consumed ``loans.updated_at``."""
+
+    __tablename__ = "analytics_watermarks"
+
+    name: Mapped[str] = mapped_column(unique=True)
+    watermark: Mapped[datetime] = mapped_column(DateTimeUTC(timezone=True))
+
+
+class AnalyticsDeletedLoan(BigIntAuditBase):
+    """Rollup keys of a deleted loan, left for the refresher (deletes don't show in ``updated_at``)."""
+
+    __tablename__ = "analytics_deleted_loans"
+
+    loan_dt: Mapped[date]
+    return_dt: Mapped[date | None]
+    book_id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer(), "sqlite"))
+
+
+class PasswordHashParams(BigIntAuditBase):
+    """An Argon2id calibration; the latest one is the target of new hashes (see :mod:`app.passwords`)."""
+
+    __tablename__ = "password_hash_params"
+
+    time_cost: Mapped[int]
+    memory_kib: Mapped[int]
+    parallelism: Mapped[int]
+    # Median time of one hash with these parameters on ``host``
+    hash_ms: Mapped[float] = mapped_column(Float)
+    target_ms: Mapped[float] = mapped_column(Float)
+    host: Mapped[str]
+    # Every combination measured: [{"t", "m", "p", "ms"}, ...]
+    trials: Mapped[list[dict[str, Any]]] = mapped_column(JsonB)
+
+
+# Resources exposed through the change feed (GET /{resource}/changes)
+CHANGE_FEED_MODELS: dict[str, type[BigIntAuditBase]] = {
+    "books": Book,
+    "users": User,
+    "loans": Loan,
+}
+
+
+def _record_tombstone(resource: str):
+    def listener(_mapper, connection, target) -> None:
+        # Same connection => same transaction as the DELETE itself
+        connection.execute(insert(Tombstone).values(resource=resource, record_id=target.id))
+
+    return listener
+
+
+for _resource, _model in CHANGE_FEED_MODELS.items():
+    event.listen(_model, "after_delete", _record_tombstone(_resource))
+
+
+def _record_deleted_loan(_mapper, connection, target) -> None:
+    connection.execute(
+        insert(AnalyticsDeletedLoan).values(loan_dt=target.loan_dt, return_dt=target.return_dt, book_id=target.book_id)
+    )
+
+
+event.listen(Loan, "after_delete", _record_deleted_loan)
+
+
 @dataclass
 class PasswordUpdate:
     """Password update request."""
@@ -131,6 +324,204 @@ class PasswordUpdate:
     new_password: str
 
 
+@dataclass
+class BookCategoriesUpdate:
+    """Body of ``PUT /books/{id}/categories``: the complete set of categories of the book."""
+
+    category_ids: list[int]
+
+
+@dataclass
+class CategoryBooksUpdate:
+    """Body of ``POST /categories/{id}/books``: books to add to and to remove from the category."""
+
+    add: list[int] = field(default_factory=list)
+    remove: list[int] = field(default_factory=list)
+
+
+@dataclass
+class AssignmentResult:
+    """Rows of ``book_categories`` actually inserted and deleted by a category assignment."""
+
+    added: int
+    removed: int
+
+
+@dataclass
+class UserFines:
+    """Fines owed by a user: assessed on returns plus accrued on open overdue loans."""
+
+    user_id: int
+    assessed_amount: Decimal
+    accrued_amount: Decimal
+    total_amount: Decimal
+    overdue_loans: int
+
+
+@dataclass
+class DashboardLoan:
+    """Open loan as shown on the user dashboard."""
+
+    id: int
+    book_id: int
+    title: str
+    loan_dt: date
+    due_date: date
+    status: LoanStatus
+    accrued_fine: Decimal
+
+
+@dataclass
+class DashboardReview:
+    """Review as shown on the user dashboard."""
+
+    id: int
+    book_id: int
+    title: str
+    rating: int
+    comment: str
+    review_date: date
+
+
+@dataclass
+class UserDashboard:
+    """Everything a member's home screen needs, in one response."""
+
+    user_id: int
+    username: str
+    fullname: str
+    email: str
+    is_active: bool
+    active_loans: list[DashboardLoan]
+    overdue_loans: list[DashboardLoan]
+    fines: UserFines
+    recent_reviews: list[DashboardReview]
+
+
+@dataclass
+class FineReportRow:
+    """One line of the fines report."""
+
+    user_id: int
+    username: str
+    assessed_amount: Decimal
+    accrued_amount: Decimal
+    total_amount: Decimal
+    overdue_loans: int
+
+
+@dataclass
+class BrowseBook:
+    """Book as listed by ``GET /books/browse``."""
+
+    id: int
+    title: str
+    author: str
+    published_year: int
+    language: str | None
+    publisher: str | None
+    stock: int
+
+
+@dataclass
+class FacetCount:
+    """Number of matching books for one facet value (``label`` names category ids)."""
+
+    value: str | int | None
+    count: int
+    label: str | None = None
+
+
+@dataclass
+class BookFacets:
+    """Facet counts over all the books matching the browse filters."""
+
+    categories: list[FacetCount] = field(default_factory=list)
+    languages: list[FacetCount] = field(default_factory=list)
+    years: list[FacetCount] = field(default_factory=list)
+    publishers: list[FacetCount] = field(default_factory=list)
+    availability: list[FacetCount] = field(default_factory=list)
+
+
+@dataclass
+class BookBrowsePage:
+    """A page of ``GET /books/browse`` results plus facet counts."""
+
+    items: list[BrowseBook]
+    total: int
+    limit: int
+    offset: int
+    facets: BookFacets
+
+
+@dataclass
+class BookAvailability:
+    """Stock of a single book."""
+
+    book_id: int
+    stock: int
+    available: bool
+
+
+@dataclass
+class TrendingBook:
+    """Book as listed by ``GET /books/trending``; ``score`` is decayed to the request time."""
+
+    id: int
+    title: str
+    author: str
+    score: float
+
+
+@dataclass
+class CirculationPoint:
+    """Loans made in a period and what became of them."""
+
+    period: date
+    loans: int
+    returned: int
+    overdue: int
+    overdue_rate: float
+
+
+@dataclass
+class CategoryCirculation:
+    """Loans and fines of a category over a date range."""
+
+    category_id: int
+    name: str
+    loans: int
+    returned: int
+    overdue: int
+    overdue_rate: float
+    fines: Decimal
+
+
+@dataclass
+class FineMonth:
+    """Returns and fines assessed in a month."""
+
+    month: date
+    returns: int
+    late_returns: int
+    fines: Decimal
+
+
+@dataclass
+class SlowQuerySummary:
+    """Slow executions of one statement from one caller (``GET /debug/slow-queries``)."""
+
+    statement: str
+    caller: str | None
+    routes: list[str] = field(default_factory=list)
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    last_seen: datetime | None = None
+    # Redacted: types and lengths only
+    last_parameters: Any = None
+
+
 @dataclass
 class BookStats:
     """Book statistics data."""
@@ -0,0 +1,127 @@
+"""Transactional outbox: domain events dispatched by a background worker.
+
+Request handlers only insert an :class:`~app.models.OutboxEvent` in the same
+transaction as the domain change (``OutboxRepository.emit``), so request latency
+doesn't depend on how many consumers there are. The worker started by
+:func:`outbox_worker` drains due events in batches and calls every handler
+registered for the topic; a failing event is retried with exponential backoff
+and marked ``FAILED`` after ``OUTBOX_MAX_ATTEMPTS``.
+
+Delivery is at-least-once: handlers must be idempotent. Topics are listed in
+:mod:`app.repositories.outbox`. Register a handler with::
+
+    from app.outbox import outbox_handler
+    from app.repositories.outbox import LOAN_RETURNED
+
+    @outbox_handler(LOAN_RETURNED)
+    def reindex_book(payload: dict[str, Any]) -> None: ...
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable
+
+import anyio
+
+from app.config import settings
+from app.metrics import OUTBOX_EVENTS
+from app.models import OutboxStatus
+from app.repositories.outbox import OutboxRepository
+
+if TYPE_CHECKING:
+    from litestar import Litestar
+
+logger = logging.getLogger(__name__)
+
+OutboxHandler = Callable[[dict[str, Any]], None]
+
+_handlers: dict[str, list[OutboxHandler]] = defaultdict(list)
+
+
+def outbox_handler(topic: str) -> Callable[[OutboxHandler], OutboxHandler]:
+    """Register a handler for ``topic`` (runs in a worker thread, outside any request)."""
+
+    def register(handler: OutboxHandler) -> OutboxHandler:
+        _handlers[topic].append(handler)
+        return handler
+
+    return register
+
+
+def _backoff(attempts: int) -> timedelta:
+    seconds = min(settings.outbox_backoff_base_seconds * 2 ** (attempts - 1), settings.outbox_backoff_max_seconds)
+    return timedelta(seconds=seconds)
+
+
+def drain_once(batch_size: int | None = None) -> int:
+    """Process one batch of due events; return how many were claimed."""
+    from app.db import sqlalchemy_config
+
+    with sqlalchemy_config.get_session() as session:
+        repo = OutboxRepository(session=session)
+        events = repo.claim_batch(batch_size or settings.outbox_batch_size)
+        for event in events:
+            try:
+                for handler in _handlers.get(event.topic, ()):
+                    handler(event.payload)
+            except Exception as e:
+                repo.mark_failed(
+                    event,
+                    error=f"{type(e).__name__}: {e}",
+                    max_attempts=settings.outbox_max_attempts,
+                    backoff=_backoff(event.attempts + 1),
+                )
+                result = "failed" if event.status == OutboxStatus.FAILED else "retry"
+                OUTBOX_EVENTS.labels(event.topic, result).inc()
+            else:
+                repo.mark_done(event)
+                OUTBOX_EVENTS.labels(event.topic, "done").inc()
+        session.commit()
+        return len(events)
+
+
+def purge_processed() -> int:
+    """Delete processed events past ``OUTBOX_RETENTION_HOURS``."""
+    from app.db import sqlalchemy_config
+
+    with sqlalchemy_config.get_session() as session:
+        older_than = datetime.now(timezone.utc) - timedelta(hours=settings.outbox_retention_hours)
+        purged = OutboxRepository(session=session).purge_done(older_than)
+        session.commit()
+        return purged
+
+
+@asynccontextmanager
+async def outbox_worker(_: Litestar) -> AsyncIterator[None]:
+    """Drain the outbox in the background while the app runs."""
+    if not settings.outbox_enabled:
+        yield
+        return
+
+    async def drain_forever() -> None:
+        last_purge = 0.0
+        while True:
+            try:
+                claimed = await anyio.to_thread.run_sync(drain_once)
+                if claimed < settings.outbox_batch_size and time.monotonic() - last_purge > 3600:
+                    await anyio.to_thread.run_sync(purge_processed)
+                    last_purge = time.monotonic()
+            except Exception:
+                # Database unavailable: events stay pending until the next poll
+                logger.exception("Fallo al procesar el outbox; se reintentará")
+                claimed = 0
+            # Keep going while batches come back full; otherwise wait for new events
+            if claimed < settings.outbox_batch_size:
+                await anyio.sleep(settings.outbox_poll_seconds)
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(drain_forever)
+        try:
+            yield
+        finally:
+            tg.cancel_scope.cancel()
@@ -0,0 +1,218 @@
+"""Argon2id password hashing with parameters calibrated on the deployment host.
+
+Every password hash is made and checked through :data:`passwords`. New hashes
+use the latest calibration stored in ``password_hash_params`` (written by
+``litestar password-calibrate``), or the ``PASSWORD_HASH_*`` settings when
+there is none: argon2-cffi's defaults, which are also those of the hashes in
+``initial_data.sql``.
+
+Calibration follows the Argon2 guidance (RFC 9106): fix the parallelism, give
+each hash as much memory as the budget allows, then take as many passes as fit
+in the target latency. If a single pass at the full budget is already over the
+target, the memory is halved down to ``PASSWORD_HASH_MIN_MEMORY_KIB``.
+
+A hash records the parameters it was made with, so old hashes keep verifying.
+On a successful login whose stored hash has other parameters than the current
+ones, the password just checked is hashed again and stored
+(``PASSWORD_REHASH_ON_LOGIN``): the stored hashes converge on the calibrated
+cost as users log in, with no password reset. Workers pick up a new
+calibration within ``PASSWORD_PARAMS_REFRESH_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import statistics
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, AsyncIterator
+
+import anyio
+from argon2.exceptions import InvalidHashError
+from pwdlib import PasswordHash
+from pwdlib.exceptions import UnknownHashError
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import select
+
+from app.config import settings
+from app.models import PasswordHashParams
+
+if TYPE_CHECKING:
+    from litestar import Litestar
+    from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_CALIBRATION_PASSWORD = "calibración de argon2"
+
+
+@dataclass(frozen=True, slots=True)
+class Argon2Params:
+    """Cost parameters of an Argon2id hash."""
+
+    time_cost: int
+    memory_kib: int
+    parallelism: int
+
+    @classmethod
+    def from_settings(cls) -> Argon2Params:
+        return cls(
+            time_cost=settings.password_hash_time_cost,
+            memory_kib=settings.password_hash_memory_kib,
+            parallelism=settings.password_hash_parallelism,
+        )
+
+    def hasher(self) -> Argon2Hasher:
+        return Argon2Hasher(time_cost=self.time_cost, memory_cost=self.memory_kib, parallelism=self.parallelism)
+
+
+class PasswordHashing:
+    """The process's password hasher, built from the current parameters."""
+
+    __slots__ = ("params", "_hash", "last_refresh")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Go back to the ``PASSWORD_HASH_*`` settings until the next refresh."""
+        self.use(Argon2Params.from_settings())
+        self.last_refresh = 0.0
+
+    def use(self, params: Argon2Params) -> None:
+        """Hash new passwords with ``params``."""
+        self.params = params
+        self._hash = PasswordHash((params.hasher(),))
+
+    def hash(self, password: str) -> str:
+        return self._hash.hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """Whether ``password`` matches ``hashed``, whatever parameters it was made with."""
+        try:
+            return self._hash.verify(password, hashed)
+        except UnknownHashError:
+            return False
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Whether ``hashed`` was made with other parameters than the current ones."""
+        try:
+            return self._hash.current_hasher.check_needs_rehash(hashed)
+        except InvalidHashError:
+            # Not an Argon2 hash: it can't be verified anyway
+            return False
+
+    def refresh(self) -> None:
+        """Switch to the latest stored calibration, if any."""
+        from app.db import sqlalchemy_config
+
+        with sqlalchemy_config.get_session() as session:
+            latest = latest_calibration(session)
+        if latest is not None:
+            self.use(Argon2Params(latest.time_cost, latest.memory_kib, latest.parallelism))
+        self.last_refresh = time.monotonic()
+
+
+passwords = PasswordHashing()
+
+
+def latest_calibration(session: Session) -> PasswordHashParams | None:
+    return session.scalars(select(PasswordHashParams).order_by(PasswordHashParams.id.desc()).limit(1)).first()
+
+
+# --- calibration ---
+
+
+def measure(params: Argon2Params, rounds: int) -> float:
+    """Median time of one hash with ``params``, in milliseconds."""
+    hasher = params.hasher()
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        hasher.hash(_CALIBRATION_PASSWORD)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def calibrate(
+    target_ms: float,
+    max_memory_kib: int,
+    parallelism: int,
+    rounds: int,
+) -> tuple[Argon2Params, float, list[tuple[Argon2Params, float]]]:
+    """Costliest parameters hashing within ``target_ms`` on this host: ``(chosen, its time, every trial)``."""
+    trials: list[tuple[Argon2Params, float]] = []
+
+    def trial(time_cost: int, memory_kib: int) -> float:
+        params = Argon2Params(time_cost, memory_kib, parallelism)
+        millis = measure(params, rounds)
+        trials.append((params, millis))
+        return millis
+
+    memory_kib = max_memory_kib
+    single_pass = trial(1, memory_kib)
+    while single_pass > target_ms and memory_kib // 2 >= settings.password_hash_min_memory_kib:
+        memory_kib //= 2
+        single_pass = trial(1, memory_kib)
+
+    # Time is linear in the passes: start from the estimate, step down until it fits
+    time_cost = max(1, int(target_ms // single_pass))
+    millis = single_pass if time_cost == 1 else trial(time_cost, memory_kib)
+    while millis > target_ms and time_cost > 1:
+        time_cost -= 1
+        millis = single_pass if time_cost == 1 else trial(time_cost, memory_kib)
+
+    return Argon2Params(time_cost, memory_kib, parallelism), millis, trials
+
+
+def save_calibration(
+    session: Session,
+    params: Argon2Params,
+    hash_ms: float,
+    target_ms: float,
+    trials: list[tuple[Argon2Params, float]],
+) -> PasswordHashParams:
+    """Record ``params`` as the current target, with the timings that led to it."""
+    row = PasswordHashParams(
+        time_cost=params.time_cost,
+        memory_kib=params.memory_kib,
+        parallelism=params.parallelism,
+        hash_ms=round(hash_ms, 1),
+        target_ms=target_ms,
+        host=f"{socket.gethostname()} ({os.cpu_count()} CPU)",
+        trials=[
+            {"t": trial.time_cost, "m": trial.memory_kib, "p": trial.parallelism, "ms": round(millis, 1)}
+            for trial, millis in trials
+        ],
+    )
+    session.add(row)
+    session.commit()
+    return row
+
+
+@asynccontextmanager
+async def password_params_refresher(_: Litestar) -> AsyncIterator[None]:
+    """Load the stored calibration at startup and keep following it."""
+
+    async def refresh() -> None:
+        try:
+            await anyio.to_thread.run_sync(passwords.refresh)
+        except Exception:
+            # Database unavailable or not migrated yet: keep hashing with the current parameters
+            logger.exception("No se pudo leer la calibración de Argon2; se mantienen los parámetros actuales")
+
+    async def refresh_forever() -> None:
+        while True:
+            await anyio.sleep(settings.password_params_refresh_seconds)
+            await refresh()
+
+    await refresh()
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(refresh_forever)
+        try:
+            yield
+        finally:
+            tg.cancel_scope.cancel()
@@ -0,0 +1,145 @@
+"""On-demand profiling of single requests with a sampling profiler (pyinstrument).
+
+The middleware is only installed when ``PROFILING_ENABLED=true``, so it has no
+overhead by default. Once installed, a request is profiled when:
+
+* it carries ``X-Profile: <PROFILING_TOKEN>`` (any value is accepted with ``DEBUG=true``), or
+* it is picked by ``PROFILING_SAMPLE_RATE`` (0.0 - 1.0).
+
+The profile is written as speedscope JSON (open it in https://www.speedscope.app)
+under ``PROFILING_DIR`` and the response carries a ``Server-Timing`` header with the
+time split into SQL, DTO serialization, handler code and the rest of the framework,
+plus ``X-Profile-File`` with the file name.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import secrets
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import anyio
+from litestar.datastructures import MutableScopeHeaders
+from litestar.enums import ScopeType
+from litestar.exceptions import MissingDependencyException
+from litestar.middleware import AbstractMiddleware
+
+from app.config import settings
+
+try:
+    from pyinstrument import Profiler
+    from pyinstrument.renderers import SpeedscopeRenderer
+except ImportError as e:
+    raise MissingDependencyException("pyinstrument", "pyinstrument", "profiling") from e
+
+if TYPE_CHECKING:
+    from litestar.types import Message, Receive, Scope, Send
+    from pyinstrument.frame import Frame
+    from pyinstrument.session import Session
+
+PROFILE_HEADER = "x-profile"
+
+_APP_DIR = str(Path(__file__).resolve().parent)
+
+# First match wins; a frame's category applies to everything below it unless a
+# deeper frame matches another one (e.g. a lazy load during serialization is SQL)
+_CATEGORIES: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("sql", ("/sqlalchemy/", "/psycopg", "/sqlite3/", "/advanced_alchemy/repository/")),
+    (
+        "serialization",
+        ("/litestar/dto/", "/advanced_alchemy/extensions/litestar/dto", "/msgspec/", "/litestar/serialization/"),
+    ),
+    ("handler", (_APP_DIR,)),
+)
+
+
+def _category(file_path: str | None) -> str | None:
+    if not file_path:
+        return None
+    for name, markers in _CATEGORIES:
+        if any(marker in file_path for marker in markers):
+            return name
+    return None
+
+
+def time_breakdown(session: Session) -> dict[str, float]:
+    """Seconds spent per category (``sql``, ``serialization``, ``handler``, ``framework``)."""
+    breakdown = {"sql": 0.0, "serialization": 0.0, "handler": 0.0, "framework": 0.0}
+    root = session.root_frame()
+    if root is None:
+        return breakdown
+
+    stack: list[tuple[Frame, str]] = [(root, "framework")]
+    while stack:
+        frame, inherited = stack.pop()
+        category = _category(frame.file_path) or inherited
+        if not frame.children:
+            breakdown[category] += frame.time
+        stack.extend((child, category) for child in frame.children)
+    return breakdown
+
+
+def _profile_path(method: str, path: str) -> Path:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+    name = f"{time.strftime('%Y%m%dT%H%M%S')}-{method}-{slug}-{secrets.token_hex(3)}.speedscope.json"
+    return Path(settings.profiling_dir) / name
+
+
+def _write_profile(session: Session, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(SpeedscopeRenderer().render(session), encoding="utf-8")
+
+
+class ProfilingMiddleware(AbstractMiddleware):
+    """Profile the requests selected by the debug header or the sampling rate."""
+
+    scopes = {ScopeType.HTTP}
+    exclude = ["^/metrics"]
+
+    # A sampling profiler per request is enough; concurrent ones would only add noise
+    _busy = False
+
+    def _wants_profile(self, scope: Scope) -> bool:
+        header = next((value for key, value in scope["headers"] if key == PROFILE_HEADER.encode()), None)
+        if header is not None:
+            if settings.debug:
+                return True
+            token = settings.profiling_token
+            if token and secrets.compare_digest(header.decode("latin-1"), token):
+                return True
+        return settings.profiling_sample_rate > 0 and random.random() < settings.profiling_sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if ProfilingMiddleware._busy or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        ProfilingMiddleware._busy = True
+        target = _profile_path(scope["method"], scope["path"])
+        profiler = Profiler(interval=settings.profiling_interval_seconds, async_mode="enabled")
+
+        async def send_wrapper(message: Message) -> None:
+            # Stop before the body is sent: routing, handler and serialization are done
+            if message["type"] == "http.response.start" and profiler.is_running:
+                session = profiler.stop()
+                headers = MutableScopeHeaders.from_message(message)
+                timings = {**time_breakdown(session), "total": session.duration}
+                headers.add(
+                    "Server-Timing",
+                    ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()),
+                )
+                headers.add("X-Profile-File", target.name)
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler.is_running:
+                profiler.stop()
+            ProfilingMiddleware._busy = False
+            if profiler.last_session is not None:
+                await anyio.to_thread.run_sync(_write_profile, profiler.last_session, target)
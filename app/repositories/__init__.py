@@ -1 +1,22 @@
 """Repository layer for database operations."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+_ON_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def on_conflict_insert(session: Session, table: Any) -> postgresql.Insert | sqlite.Insert:
+    """``INSERT`` into ``table`` supporting ``ON CONFLICT`` on the session's dialect.
+
+    Raises:
+        NotImplementedError: If the database is neither PostgreSQL nor SQLite.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect not in _ON_CONFLICT_INSERTS:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT is not supported on {dialect}")
+    return _ON_CONFLICT_INSERTS[dialect](table)
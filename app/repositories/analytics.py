@@ -0,0 +1,343 @@
+"""Repository for the circulation analytics rollups.
+
+Rollups are always recomputed per key from ``loans`` + ``loans_archive``
+(``DELETE`` the key's rows, ``INSERT ... SELECT ... GROUP BY`` them again), so
+refreshing a key twice is harmless and overlapping watermark windows are safe.
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Literal, Sequence
+
+from advanced_alchemy.repository import SQLAlchemySyncRepository
+from sqlalchemy import (
+    ColumnElement,
+    Date,
+    and_,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.models import (
+    AnalyticsDeletedLoan,
+    AnalyticsWatermark,
+    CategoryCirculation,
+    CirculationPoint,
+    Category,
+    FineMonth,
+    FineMonthlyRollup,
+    Loan,
+    LoanArchive,
+    LoanDailyRollup,
+    LoanStatus,
+    book_categories,
+)
+from app.repositories.fine import _money
+
+LOANS_WATERMARK = "loans"
+
+_SOURCE_COLUMNS = ("loan_dt", "due_date", "return_dt", "fine_amount", "status", "book_id", "updated_at")
+
+
+class month_start(FunctionElement[date]):
+    """First day of the month of a date, portable across dialects."""
+
+    type = Date()
+    name = "month_start"
+    inherit_cache = True
+
+
+@compiles(month_start)
+def _month_start(element: month_start, compiler: Any, **kw: Any) -> str:
+    return f"CAST(date_trunc('month', {compiler.process(element.clauses, **kw)}) AS DATE)"
+
+
+@compiles(month_start, "sqlite")
+def _month_start_sqlite(element: month_start, compiler: Any, **kw: Any) -> str:
+    return f"date({compiler.process(element.clauses, **kw)}, 'start of month')"
+
+
+def _all_loans(where: Callable[[Any], ColumnElement[bool]]) -> Any:
+    """Hot and archived loans matching ``where`` (applied to each table's columns)."""
+    return union_all(
+        *(
+            select(*(table.c[name] for name in _SOURCE_COLUMNS)).where(where(table.c))
+            for table in (Loan.__table__, LoanArchive.__table__)
+        )
+    ).subquery("all_loans")
+
+
+def _first_of_month(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _rate(part: int, total: int) -> float:
+    return round(part / total, 4) if total else 0.0
+
+
+class AnalyticsRepository(SQLAlchemySyncRepository[LoanDailyRollup]):
+    """Repository for maintaining and reading the circulation rollups."""
+
+    model_type = LoanDailyRollup
+
+    # --- maintenance ---
+
+    def refresh(self, overlap: timedelta, batch_size: int) -> int | None:
+        """Recompute the rollup keys touched since the watermark; return how many.
+
+        ``None`` means another worker holds the watermark (it is refreshing).
+        The first run, with no watermark yet, is a full :meth:`backfill`.
+        """
+        started = datetime.now(timezone.utc)
+        mark = self.session.scalars(
+            select(AnalyticsWatermark)
+            .where(AnalyticsWatermark.name == LOANS_WATERMARK)
+            .with_for_update(skip_locked=True)
+        ).one_or_none()
+        if mark is None:
+            exists = self.session.scalar(select(AnalyticsWatermark.id).where(AnalyticsWatermark.name == LOANS_WATERMARK))
+            if exists is not None:
+                return None
+            self.backfill()
+            return 0
+
+        # Rows committed late with an earlier updated_at are caught by the overlap
+        since = mark.watermark - overlap
+        source = _all_loans(lambda c: c.updated_at > since)
+        changed = list(self.session.execute(select(source.c.loan_dt, source.c.return_dt, source.c.book_id)).tuples())
+        deleted = list(self.session.scalars(select(AnalyticsDeletedLoan)))
+        changed += [(row.loan_dt, row.return_dt, row.book_id) for row in deleted]
+
+        day_keys = {(loan_dt, book_id) for loan_dt, _, book_id in changed}
+        month_keys = {(_first_of_month(return_dt), book_id) for _, return_dt, book_id in changed if return_dt is not None}
+        for batch in _batches(sorted(day_keys), batch_size):
+            self._recompute_days(batch)
+        for batch in _batches(sorted(month_keys), batch_size):
+            self._recompute_months(batch)
+
+        if deleted:
+            self.session.execute(delete(AnalyticsDeletedLoan).where(AnalyticsDeletedLoan.id.in_([row.id for row in deleted])))
+        mark.watermark = started
+        self.session.commit()
+        return len(day_keys) + len(month_keys)
+
+    def backfill(self, since: date | None = None) -> int:
+        """Rebuild the rollups month by month from ``since`` (default: the first loan); return months rebuilt.
+
+        Commits after each month so locks stay short, then moves the watermark to
+        the start of the backfill.
+        """
+        started = datetime.now(timezone.utc)
+        if since is None:
+            first = [self.session.scalar(select(func.min(model.loan_dt))) for model in (Loan, LoanArchive)]
+            since = min((day for day in first if day is not None), default=started.date())
+
+        months = 0
+        month = _first_of_month(since)
+        while month <= started.date():
+            end = _next_month(month)
+            self.session.execute(
+                delete(LoanDailyRollup).where(LoanDailyRollup.day >= month).where(LoanDailyRollup.day < end)
+            )
+            self._insert_days(lambda c, month=month, end=end: and_(c.loan_dt >= month, c.loan_dt < end))
+            self.session.execute(delete(FineMonthlyRollup).where(FineMonthlyRollup.month == month))
+            self._insert_months(lambda c, month=month, end=end: and_(c.return_dt >= month, c.return_dt < end))
+            self.session.commit()
+            month = end
+            months += 1
+
+        self.session.execute(delete(AnalyticsDeletedLoan).where(AnalyticsDeletedLoan.created_at <= started))
+        mark = self.session.scalars(
+            select(AnalyticsWatermark).where(AnalyticsWatermark.name == LOANS_WATERMARK)
+        ).one_or_none()
+        if mark is None:
+            self.session.add(AnalyticsWatermark(name=LOANS_WATERMARK, watermark=started))
+        else:
+            mark.watermark = started
+        self.session.commit()
+        return months
+
+    def _recompute_days(self, keys: Sequence[tuple[date, int]]) -> None:
+        self.session.execute(delete(LoanDailyRollup).where(tuple_(LoanDailyRollup.day, LoanDailyRollup.book_id).in_(keys)))
+        book_ids = {book_id for _, book_id in keys}
+        self._insert_days(lambda c: and_(c.book_id.in_(book_ids), tuple_(c.loan_dt, c.book_id).in_(keys)))
+
+    def _recompute_months(self, keys: Sequence[tuple[date, int]]) -> None:
+        self.session.execute(
+            delete(FineMonthlyRollup).where(tuple_(FineMonthlyRollup.month, FineMonthlyRollup.book_id).in_(keys))
+        )
+        book_ids = {book_id for _, book_id in keys}
+        self._insert_months(
+            lambda c: and_(c.book_id.in_(book_ids), tuple_(month_start(c.return_dt), c.book_id).in_(keys))
+        )
+
+    def _insert_days(self, where: Callable[[Any], ColumnElement[bool]]) -> None:
+        src = _all_loans(where)
+        now = literal(datetime.now(timezone.utc), LoanDailyRollup.created_at.type)
+        late = case((or_(src.c.return_dt > src.c.due_date, src.c.status == LoanStatus.OVERDUE), 1), else_=0)
+        rows = select(
+            src.c.loan_dt, src.c.book_id, src.c.status, func.count(), func.sum(late), now, now
+        ).group_by(src.c.loan_dt, src.c.book_id, src.c.status)
+        self.session.execute(
+            insert(LoanDailyRollup).from_select(
+                ["day", "book_id", "status", "loans", "late", "created_at", "updated_at"], rows
+            )
+        )
+
+    def _insert_months(self, where: Callable[[Any], ColumnElement[bool]]) -> None:
+        src = _all_loans(lambda c: and_(c.return_dt.is_not(None), where(c)))
+        now = literal(datetime.now(timezone.utc), FineMonthlyRollup.created_at.type)
+        month = month_start(src.c.return_dt)
+        rows = select(
+            month,
+            src.c.book_id,
+            func.count(),
+            func.sum(case((src.c.return_dt > src.c.due_date, 1), else_=0)),
+            func.coalesce(func.sum(src.c.fine_amount), 0),
+            now,
+            now,
+        ).group_by(month, src.c.book_id)
+        self.session.execute(
+            insert(FineMonthlyRollup).from_select(
+                ["month", "book_id", "returns", "late_returns", "fines", "created_at", "updated_at"], rows
+            )
+        )
+
+    # --- reports (rollups only) ---
+
+    def circulation(
+        self,
+        granularity: Literal["day", "month"],
+        date_from: date,
+        date_to: date,
+        category_id: int | None = None,
+    ) -> list[CirculationPoint]:
+        """Loans per day or month of ``loan_dt`` with how many were returned and how many went overdue."""
+        period = LoanDailyRollup.day if granularity == "day" else month_start(LoanDailyRollup.day)
+        returned = case((LoanDailyRollup.status == LoanStatus.RETURNED, LoanDailyRollup.loans), else_=0)
+        stmt = (
+            select(
+                period.label("period"),
+                func.sum(LoanDailyRollup.loans).label("loans"),
+                func.sum(returned).label("returned"),
+                func.sum(LoanDailyRollup.late).label("overdue"),
+            )
+            .where(LoanDailyRollup.day >= date_from)
+            .where(LoanDailyRollup.day <= date_to)
+            .group_by(period)
+            .order_by(period)
+        )
+        if category_id is not None:
+            stmt = stmt.where(LoanDailyRollup.book_id.in_(_books_in_category(category_id)))
+        return [
+            CirculationPoint(
+                period=row.period,
+                loans=int(row.loans),
+                returned=int(row.returned),
+                overdue=int(row.overdue),
+                overdue_rate=_rate(int(row.overdue), int(row.loans)),
+            )
+            for row in self.session.execute(stmt)
+        ]
+
+    def circulation_by_category(self, date_from: date, date_to: date) -> list[CategoryCirculation]:
+        """Loans (by ``loan_dt``) and fines (by return month) per category; a book counts in each of its categories."""
+        returned = case((LoanDailyRollup.status == LoanStatus.RETURNED, LoanDailyRollup.loans), else_=0)
+        loans = (
+            select(
+                book_categories.c.category_id,
+                func.sum(LoanDailyRollup.loans).label("loans"),
+                func.sum(returned).label("returned"),
+                func.sum(LoanDailyRollup.late).label("overdue"),
+            )
+            .join(book_categories, book_categories.c.book_id == LoanDailyRollup.book_id)
+            .where(LoanDailyRollup.day >= date_from)
+            .where(LoanDailyRollup.day <= date_to)
+            .group_by(book_categories.c.category_id)
+            .subquery("loans")
+        )
+        fines = (
+            select(book_categories.c.category_id, func.sum(FineMonthlyRollup.fines).label("fines"))
+            .join(book_categories, book_categories.c.book_id == FineMonthlyRollup.book_id)
+            .where(FineMonthlyRollup.month >= _first_of_month(date_from))
+            .where(FineMonthlyRollup.month <= date_to)
+            .group_by(book_categories.c.category_id)
+            .subquery("fines")
+        )
+        stmt = (
+            select(Category.id, Category.name, loans.c.loans, loans.c.returned, loans.c.overdue, fines.c.fines)
+            .outerjoin(loans, loans.c.category_id == Category.id)
+            .outerjoin(fines, fines.c.category_id == Category.id)
+            .order_by(Category.name)
+        )
+        return [
+            CategoryCirculation(
+                category_id=row.id,
+                name=row.name,
+                loans=int(row.loans or 0),
+                returned=int(row.returned or 0),
+                overdue=int(row.overdue or 0),
+                overdue_rate=_rate(int(row.overdue or 0), int(row.loans or 0)),
+                fines=_money(row.fines),
+            )
+            for row in self.session.execute(stmt)
+        ]
+
+    def fines(self, date_from: date, date_to: date, category_id: int | None = None) -> list[FineMonth]:
+        """Returns, late returns and fines per month of ``return_dt``."""
+        stmt = (
+            select(
+                FineMonthlyRollup.month,
+                func.sum(FineMonthlyRollup.returns).label("returns"),
+                func.sum(FineMonthlyRollup.late_returns).label("late_returns"),
+                func.sum(FineMonthlyRollup.fines).label("fines"),
+            )
+            .where(FineMonthlyRollup.month >= _first_of_month(date_from))
+            .where(FineMonthlyRollup.month <= date_to)
+            .group_by(FineMonthlyRollup.month)
+            .order_by(FineMonthlyRollup.month)
+        )
+        if category_id is not None:
+            stmt = stmt.where(FineMonthlyRollup.book_id.in_(_books_in_category(category_id)))
+        return [
+            FineMonth(
+                month=row.month,
+                returns=int(row.returns),
+                late_returns=int(row.late_returns),
+                fines=_money(row.fines),
+            )
+            for row in self.session.execute(stmt)
+        ]
+
+    def watermark(self) -> datetime | None:
+        """Time up to which loan changes are reflected in the rollups."""
+        return self.session.scalar(select(AnalyticsWatermark.watermark).where(AnalyticsWatermark.name == LOANS_WATERMARK))
+
+
+def _books_in_category(category_id: int) -> Any:
+    return select(book_categories.c.book_id).where(book_categories.c.category_id == category_id)
+
+
+def _batches(items: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+async def provide_analytics_repo(db_session: Session) -> AnalyticsRepository:
+    """Provide analytics repository instance."""
+    return AnalyticsRepository(session=db_session)
@@ -2,13 +2,43 @@
 
 from __future__ import annotations
 
-from typing import Sequence
+from typing import Any, Collection, Sequence
 
+from advanced_alchemy.exceptions import NotFoundError
 from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy import func, select
+from sqlalchemy import (
+    String,
+    bindparam,
+    case,
+    cast,
+    delete,
+    func,
+    insert,
+    literal_column,
+    null,
+    select,
+    tuple_,
+    union_all,
+)
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.interfaces import LoaderOption
+from sqlalchemy.sql import ColumnElement, FromClause, Select
 
-from app.models import Book, Category, Review, book_categories
+from app.models import Book, BookFacets, BrowseBook, Category, FacetCount, Review, book_categories
+from app.repositories import on_conflict_insert
+
+# Hot statements are built once: their cache key is memoized, so executing them
+# skips both construction and cache-key generation (see `litestar bench-statements`)
+AVAILABLE_BOOKS = select(Book).where(Book.stock > 0).order_by(Book.title.asc())
+BOOKS_BY_CATEGORY = (
+    select(Book)
+    .join(book_categories, book_categories.c.book_id == Book.id)
+    .where(book_categories.c.category_id == bindparam("category_id"))
+    .order_by(Book.title.asc())
+)
+
+# Ids per category assignment: keeps its single INSERT within the bind-parameter limits
+MAX_ASSIGNMENT_IDS = 10_000
 
 
 class BookRepository(SQLAlchemySyncRepository[Book]):
@@ -16,20 +46,15 @@ class BookRepository(SQLAlchemySyncRepository[Book]):
 
     model_type = Book
 
-    def get_available_books(self) -> Sequence[Book]:
+    def get_available_books(self, load: Sequence[LoaderOption] | None = None) -> Sequence[Book]:
         """Return books with stock > 0."""
-        stmt = select(Book).where(Book.stock > 0).order_by(Book.title.asc())
+        stmt = AVAILABLE_BOOKS.options(*load) if load else AVAILABLE_BOOKS
         return list(self.session.scalars(stmt).all())
 
-    def find_by_category(self, category_id: int) -> Sequence[Book]:
+    def find_by_category(self, category_id: int, load: Sequence[LoaderOption] | None = None) -> Sequence[Book]:
         """Return books belonging to a category."""
-        stmt = (
-            select(Book)
-            .join(book_categories, book_categories.c.book_id == Book.id)
-            .where(book_categories.c.category_id == category_id)
-            .order_by(Book.title.asc())
-        )
-        return list(self.session.scalars(stmt).all())
+        stmt = BOOKS_BY_CATEGORY.options(*load) if load else BOOKS_BY_CATEGORY
+        return list(self.session.scalars(stmt, {"category_id": category_id}).all())
 
     def get_most_reviewed_books(self, limit: int = 10) -> Sequence[Book]:
         """Return books ordered by number of reviews."""
@@ -42,6 +67,69 @@ class BookRepository(SQLAlchemySyncRepository[Book]):
         )
         return list(self.session.scalars(stmt).all())
 
+    def ids_in_category(self, category_id: int) -> set[int]:
+        """Ids of the books in a category (``book_categories``)."""
+        stmt = select(book_categories.c.book_id).where(book_categories.c.category_id == category_id)
+        return set(self.session.scalars(stmt).all())
+
+    def set_categories(self, book_id: int, category_ids: Collection[int]) -> tuple[set[int], set[int]]:
+        """Make ``category_ids`` the categories of a book; return the category ids ``(added, removed)``.
+
+        Raises:
+            NotFoundError: If the book doesn't exist.
+            ValueError: If a category doesn't exist or there are too many.
+        """
+        wanted = set(category_ids)
+        if len(wanted) > MAX_ASSIGNMENT_IDS:
+            raise ValueError(f"Máximo {MAX_ASSIGNMENT_IDS} categorías por asignación")
+        # Ids only: loading a Book would pull its selectin relationships
+        if self.session.scalar(select(Book.id).where(Book.id == book_id)) is None:
+            raise NotFoundError(f"No book with id {book_id}")
+        self._check_exist(Category, wanted, "Categorías inexistentes")
+
+        current = set(
+            self.session.scalars(select(book_categories.c.category_id).where(book_categories.c.book_id == book_id))
+        )
+        added, removed = self._apply_assignment(
+            [(book_id, category_id) for category_id in sorted(wanted - current)],
+            [(book_id, category_id) for category_id in current - wanted],
+        )
+        return {c for _, c in added}, {c for _, c in removed}
+
+    def update_category_books(
+        self,
+        category_id: int,
+        add: Collection[int],
+        remove: Collection[int],
+    ) -> tuple[set[int], set[int]]:
+        """Add books to and remove books from a category; return the book ids ``(added, removed)``.
+
+        Raises:
+            NotFoundError: If the category doesn't exist.
+            ValueError: If a book to add doesn't exist, a book is in both lists or there are too many.
+        """
+        add, remove = set(add), set(remove)
+        if len(add) + len(remove) > MAX_ASSIGNMENT_IDS:
+            raise ValueError(f"Máximo {MAX_ASSIGNMENT_IDS} libros por asignación")
+        if add & remove:
+            raise ValueError(f"Libros a la vez en add y remove: {sorted(add & remove)}")
+        if self.session.scalar(select(Category.id).where(Category.id == category_id)) is None:
+            raise NotFoundError(f"No category with id {category_id}")
+        self._check_exist(Book, add, "Libros inexistentes")
+
+        current = set(
+            self.session.scalars(
+                select(book_categories.c.book_id)
+                .where(book_categories.c.category_id == category_id)
+                .where(book_categories.c.book_id.in_(add | remove))
+            )
+        )
+        added, removed = self._apply_assignment(
+            [(book_id, category_id) for book_id in sorted(add - current)],
+            [(book_id, category_id) for book_id in remove & current],
+        )
+        return {b for b, _ in added}, {b for b, _ in removed}
+
     def update_stock(self, book_id: int, quantity: int) -> Book:
         """Add quantity to stock (can be negative). Stock can't go below 0."""
         book = self.get(book_id)
@@ -52,6 +140,50 @@ class BookRepository(SQLAlchemySyncRepository[Book]):
         self.update(book)
         return book
 
+    def _check_exist(self, model: type[Book] | type[Category], ids: set[int], message: str) -> None:
+        if not ids:
+            return
+        missing = ids - set(self.session.scalars(select(model.id).where(model.id.in_(ids))))
+        if missing:
+            raise ValueError(f"{message}: {sorted(missing)}")
+
+    def _apply_assignment(
+        self,
+        insert_pairs: list[tuple[int, int]],
+        delete_pairs: list[tuple[int, int]],
+    ) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+        """One multi-row INSERT and one DELETE of ``(book_id, category_id)`` pairs, committed; the pairs changed."""
+        pair = (book_categories.c.book_id, book_categories.c.category_id)
+        added: list[tuple[int, int]] = []
+        removed: list[tuple[int, int]] = []
+        if insert_pairs:
+            added = self._insert_pairs(insert_pairs)
+        if delete_pairs:
+            where = tuple_(*pair).in_(delete_pairs)
+            if self.session.get_bind().dialect.delete_returning:
+                removed = list(self.session.execute(delete(book_categories).where(where).returning(*pair)).tuples())
+            else:
+                removed = list(self.session.execute(select(*pair).where(where)).tuples())
+                self.session.execute(delete(book_categories).where(where))
+        self.session.commit()
+        return added, removed
+
+    def _insert_pairs(self, pairs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+        """Insert the ``(book_id, category_id)`` pairs not present yet; return those inserted."""
+        pair = (book_categories.c.book_id, book_categories.c.category_id)
+        try:
+            stmt = on_conflict_insert(self.session, book_categories)
+        except NotImplementedError:
+            # No ON CONFLICT: skip the pairs present now (a concurrent insert still hits the primary key)
+            present = set(self.session.execute(select(*pair).where(tuple_(*pair).in_(pairs))).tuples())
+            pairs = [p for p in pairs if p not in present]
+            if pairs:
+                self.session.execute(insert(book_categories), [{"book_id": b, "category_id": c} for b, c in pairs])
+            return pairs
+        # A concurrent assignment may have inserted some of them since they were read
+        stmt = stmt.values([{"book_id": b, "category_id": c} for b, c in pairs]).on_conflict_do_nothing()
+        return list(self.session.execute(stmt.returning(*pair)).tuples())
+
     def get_books_with_negative_reviews(self, min_count: int = 1) -> Sequence[Book]:
         """Return books that have at least `min_count` negative reviews (rating <= 2)."""
         stmt = (
@@ -69,6 +201,120 @@ class BookRepository(SQLAlchemySyncRepository[Book]):
         stmt = select(Book).where(Book.author.ilike(f"%{author_name}%")).order_by(Book.title.asc())
         return list(self.session.scalars(stmt).all())
 
+    def browse(
+        self,
+        *,
+        category_ids: Sequence[int] = (),
+        match_all_categories: bool = False,
+        language: str | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None,
+        publisher: str | None = None,
+        available: bool | None = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> tuple[list[BrowseBook], int, BookFacets]:
+        """Return a page of matching books, the total and the facet counts.
+
+        Facets are counted over every matching book (not only the page) with a
+        single ``UNION ALL`` of ``GROUP BY`` queries over the filtered set.
+        """
+        conditions = []
+        if category_ids:
+            if match_all_categories:
+                conditions.extend(
+                    Book.id.in_(select(book_categories.c.book_id).where(book_categories.c.category_id == category_id))
+                    for category_id in dict.fromkeys(category_ids)
+                )
+            else:
+                conditions.append(
+                    Book.id.in_(
+                        select(book_categories.c.book_id).where(book_categories.c.category_id.in_(category_ids))
+                    )
+                )
+        if language is not None:
+            conditions.append(Book.language == language)
+        if year_from is not None:
+            conditions.append(Book.published_year >= year_from)
+        if year_to is not None:
+            conditions.append(Book.published_year <= year_to)
+        if publisher is not None:
+            conditions.append(Book.publisher == publisher)
+        if available is not None:
+            conditions.append(Book.stock > 0 if available else Book.stock <= 0)
+
+        page_stmt = (
+            select(
+                Book.id,
+                Book.title,
+                Book.author,
+                Book.published_year,
+                Book.language,
+                Book.publisher,
+                Book.stock,
+            )
+            .where(*conditions)
+            .order_by(Book.title.asc(), Book.id.asc())
+            .limit(limit)
+            .offset(offset)
+        )
+        items = [BrowseBook(**row._mapping) for row in self.session.execute(page_stmt)]
+
+        hits = (
+            select(Book.id, Book.language, Book.publisher, Book.published_year, Book.stock)
+            .where(*conditions)
+            .cte("hits")
+        )
+        # Inline constants: PostgreSQL must see the same expression in SELECT and GROUP BY
+        in_stock = case(
+            (hits.c.stock > literal_column("0"), literal_column("'true'")),
+            else_=literal_column("'false'"),
+        )
+
+        def facet(
+            name: str,
+            value: ColumnElement[Any] | None,
+            label: ColumnElement[Any] | None = None,
+            source: FromClause = hits,
+        ) -> Select[Any]:
+            return select(
+                literal_column(f"'{name}'", String).label("facet"),
+                cast(value, String).label("value") if value is not None else null().label("value"),
+                (label if label is not None else null()).label("label"),
+                func.count().label("n"),
+            ).select_from(source)
+
+        facets_stmt = union_all(
+            facet("total", None),
+            facet("languages", hits.c.language).group_by(hits.c.language),
+            facet("publishers", hits.c.publisher).group_by(hits.c.publisher),
+            facet("years", hits.c.published_year).group_by(hits.c.published_year),
+            facet("availability", in_stock).group_by(in_stock),
+            facet(
+                "categories",
+                Category.id,
+                Category.name,
+                hits.join(book_categories, book_categories.c.book_id == hits.c.id).join(
+                    Category, Category.id == book_categories.c.category_id
+                ),
+            ).group_by(Category.id, Category.name),
+        )
+
+        total = 0
+        facets = BookFacets()
+        for name, value, label, count in self.session.execute(facets_stmt):
+            if name == "total":
+                total = count
+            elif name in ("categories", "years"):
+                getattr(facets, name).append(FacetCount(value=int(value), count=count, label=label))
+            else:
+                getattr(facets, name).append(FacetCount(value=value, count=count))
+
+        for values in (facets.categories, facets.languages, facets.publishers, facets.availability):
+            values.sort(key=lambda f: (-f.count, str(f.value)))
+        facets.years.sort(key=lambda f: f.value)  # type: ignore[arg-type, return-value]
+        return items, total, facets
+
 
 async def provide_book_repo(db_session: Session) -> BookRepository:
     """Provide book repository instance with auto-commit."""
@@ -0,0 +1,143 @@
+"""Repository for the incremental change feed (rows changed after a watermark)."""
+
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator
+
+from advanced_alchemy.repository import SQLAlchemySyncRepository
+from sqlalchemy import select, tuple_
+
+from app.models import CHANGE_FEED_MODELS, Tombstone
+
+# Columns never published through the change feed
+CHANGE_FEED_EXCLUDED_COLUMNS: dict[str, set[str]] = {
+    "users": {"password", "token_version"},
+}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class ChangeCursor:
+    """Keyset position for both upserts and tombstones: ``(updated_at, id)`` each."""
+
+    rows: tuple[datetime, int] = (_EPOCH, 0)
+    tombstones: tuple[datetime, int] = (_EPOCH, 0)
+
+    @classmethod
+    def decode(cls, raw: str | None) -> ChangeCursor:
+        """Parse an opaque cursor, or a plain ISO-8601 datetime watermark.
+
+        Raises:
+            ValueError: If ``raw`` is neither.
+        """
+        if not raw:
+            return cls()
+
+        try:
+            since = datetime.fromisoformat(raw)
+        except ValueError:
+            pass
+        else:
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return cls(rows=(since, 0), tombstones=(since, 0))
+
+        try:
+            padded = raw + "=" * (-len(raw) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded))
+            return cls(
+                rows=(datetime.fromisoformat(data["u"][0]), int(data["u"][1])),
+                tombstones=(datetime.fromisoformat(data["d"][0]), int(data["d"][1])),
+            )
+        except (ValueError, KeyError, IndexError, TypeError) as e:
+            raise ValueError("cursor inválido") from e
+
+    def encode(self) -> str:
+        """Serialize to an opaque, URL-safe string."""
+        data = {
+            "u": [self.rows[0].isoformat(), self.rows[1]],
+            "d": [self.tombstones[0].isoformat(), self.tombstones[1]],
+        }
+        raw = base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode())
+        return raw.decode().rstrip("=")
+
+
+@dataclass
+class ChangePage:
+    """Changes emitted so far plus the cursor to resume from."""
+
+    cursor: ChangeCursor
+    emitted: int = 0
+    exhausted: bool = False
+
+
+class ChangeFeedRepository(SQLAlchemySyncRepository[Tombstone]):
+    """Repository for reading changes and tombstones ordered by ``(updated_at, id)``."""
+
+    model_type = Tombstone
+
+    def iter_changes(
+        self,
+        resource: str,
+        page: ChangePage,
+        limit: int = 1000,
+        batch_size: int = 200,
+        lag: timedelta = timedelta(0),
+    ) -> Iterator[dict[str, Any]]:
+        """Yield upserts then tombstones after ``page.cursor``, at most ``limit`` in total.
+
+        ``updated_at`` is stamped before the commit, so a row may become visible
+        after the cursor has moved past it. Only rows stamped more than ``lag``
+        ago are served: a transaction committing within ``lag`` of its stamp is
+        never skipped. ``page`` is updated in place so callers can emit the
+        resume cursor at the end.
+        """
+        horizon = datetime.now(timezone.utc) - lag
+        model = CHANGE_FEED_MODELS[resource]
+        excluded = CHANGE_FEED_EXCLUDED_COLUMNS.get(resource, set())
+        columns = [c for c in model.__table__.columns if c.key not in excluded]
+
+        # --- upserts ---
+        while page.emitted < limit:
+            after_ts, after_id = page.cursor.rows
+            want = min(batch_size, limit - page.emitted)
+            stmt = (
+                select(*columns)
+                .where(tuple_(model.updated_at, model.id) > tuple_(after_ts, after_id))
+                .where(model.updated_at <= horizon)
+                .order_by(model.updated_at.asc(), model.id.asc())
+                .limit(want)
+            )
+            rows = self.session.execute(stmt).mappings().all()
+            for row in rows:
+                page.cursor.rows = (row["updated_at"], row["id"])
+                page.emitted += 1
+                yield {"op": "upsert", "id": row["id"], "updated_at": row["updated_at"], "data": dict(row)}
+            if len(rows) < want:
+                break
+
+        # --- tombstones ---
+        while page.emitted < limit:
+            after_ts, after_id = page.cursor.tombstones
+            want = min(batch_size, limit - page.emitted)
+            stmt = (
+                select(Tombstone.id, Tombstone.record_id, Tombstone.updated_at)
+                .where(Tombstone.resource == resource)
+                .where(tuple_(Tombstone.updated_at, Tombstone.id) > tuple_(after_ts, after_id))
+                .where(Tombstone.updated_at <= horizon)
+                .order_by(Tombstone.updated_at.asc(), Tombstone.id.asc())
+                .limit(want)
+            )
+            rows = self.session.execute(stmt).all()
+            for tombstone_id, record_id, updated_at in rows:
+                page.cursor.tombstones = (updated_at, tombstone_id)
+                page.emitted += 1
+                yield {"op": "delete", "id": record_id, "updated_at": updated_at}
+            if len(rows) < want:
+                page.exhausted = True
+                break
@@ -0,0 +1,90 @@
+"""Repository for the user dashboard: one query per section, no lazy loads."""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from advanced_alchemy.repository import SQLAlchemySyncRepository
+from sqlalchemy import Row, select
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Book,
+    DashboardLoan,
+    DashboardReview,
+    Loan,
+    LoanStatus,
+    Review,
+    User,
+    UserFineBalance,
+)
+from app.repositories.fine import OPEN_LOAN_STATUSES, _money, accrued_fine
+
+
+class DashboardRepository(SQLAlchemySyncRepository[User]):
+    """Repository for the sections of ``GET /users/{id}/dashboard``."""
+
+    model_type = User
+
+    def profile(self, user_id: int) -> Row[Any] | None:
+        """User columns plus the assessed fine balance."""
+        return self.session.execute(
+            select(
+                User.id,
+                User.username,
+                User.fullname,
+                User.email,
+                User.is_active,
+                UserFineBalance.assessed_amount,
+            )
+            .outerjoin(UserFineBalance, UserFineBalance.user_id == User.id)
+            .where(User.id == user_id)
+        ).one_or_none()
+
+    def open_loans(self, user_id: int, today: date) -> list[DashboardLoan]:
+        """ACTIVE and OVERDUE loans with the book title and the fine accrued so far."""
+        rows = self.session.execute(
+            select(
+                Loan.id,
+                Loan.book_id,
+                Book.title,
+                Loan.loan_dt,
+                Loan.due_date,
+                Loan.status,
+                accrued_fine(today).label("accrued_fine"),
+            )
+            .join(Book, Book.id == Loan.book_id)
+            .where(Loan.user_id == user_id)
+            .where(Loan.status.in_(OPEN_LOAN_STATUSES))
+            .order_by(Loan.due_date.asc(), Loan.id.asc())
+        )
+        return [
+            DashboardLoan(
+                id=row.id,
+                book_id=row.book_id,
+                title=row.title,
+                loan_dt=row.loan_dt,
+                due_date=row.due_date,
+                # Not yet swept by GET /loans/overdue, but already late
+                status=LoanStatus.OVERDUE if row.due_date < today else row.status,
+                accrued_fine=_money(row.accrued_fine),
+            )
+            for row in rows
+        ]
+
+    def recent_reviews(self, user_id: int, limit: int) -> list[DashboardReview]:
+        """The user's latest reviews with the book title."""
+        rows = self.session.execute(
+            select(Review.id, Review.book_id, Book.title, Review.rating, Review.comment, Review.review_date)
+            .join(Book, Book.id == Review.book_id)
+            .where(Review.user_id == user_id)
+            .order_by(Review.review_date.desc(), Review.id.desc())
+            .limit(limit)
+        )
+        return [DashboardReview(**row._mapping) for row in rows]
+
+
+async def provide_dashboard_repo(db_session: Session) -> DashboardRepository:
+    """Provide dashboard repository instance."""
+    return DashboardRepository(session=db_session)
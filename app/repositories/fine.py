@@ -0,0 +1,164 @@
+"""Repository for fine balances and set-based accrued fine queries."""
+
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from advanced_alchemy.repository import SQLAlchemySyncRepository
+from sqlalchemy import ColumnElement, Connection, Integer, Numeric, case, delete, func, insert, literal, or_, select, union_all
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.models import FineReportRow, Loan, LoanArchive, LoanStatus, User, UserFineBalance, UserFines
+from app.repositories.loan import FINE_PER_DAY
+
+OPEN_LOAN_STATUSES = (LoanStatus.ACTIVE, LoanStatus.OVERDUE)
+
+
+def _money(value: Any) -> Decimal:
+    """Normalize an aggregate result (Decimal, int or float depending on dialect) to 2 decimals."""
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+class days_between(FunctionElement[int]):
+    """Whole days from ``start`` to ``end`` (``end - start``), portable across dialects."""
+
+    type = Integer()
+    name = "days_between"
+    inherit_cache = True
+
+
+@compiles(days_between)
+def _days_between(element: days_between, compiler: Any, **kw: Any) -> str:
+    # PostgreSQL: date - date is an integer number of days
+    start, end = list(element.clauses)
+    return f"({compiler.process(end, **kw)} - {compiler.process(start, **kw)})"
+
+
+@compiles(days_between, "sqlite")
+def _days_between_sqlite(element: days_between, compiler: Any, **kw: Any) -> str:
+    start, end = list(element.clauses)
+    return f"CAST(julianday({compiler.process(end, **kw)}) - julianday({compiler.process(start, **kw)}) AS INTEGER)"
+
+
+def accrued_fine(today: date) -> ColumnElement[Decimal]:
+    """SQL expression for the fine accrued so far by an open loan (same rule as ``calculate_fine``)."""
+    days = days_between(Loan.due_date, literal(today))
+    return literal(FINE_PER_DAY, Numeric(12, 2)) * case((days > 0, days), else_=0)
+
+
+class FineRepository(SQLAlchemySyncRepository[UserFineBalance]):
+    """Repository for fine balances and fines reporting."""
+
+    model_type = UserFineBalance
+
+    def _accrued_by_user(self, today: date):
+        """Accrued fines and overdue loan count per user, computed in one aggregate."""
+        return (
+            select(
+                Loan.user_id.label("user_id"),
+                func.sum(accrued_fine(today)).label("accrued_amount"),
+                func.count(Loan.id).label("overdue_loans"),
+            )
+            .where(Loan.status.in_(OPEN_LOAN_STATUSES))
+            .where(Loan.due_date < today)
+            .group_by(Loan.user_id)
+            .subquery("accrued")
+        )
+
+    def get_user_fines(self, user_id: int, today: date | None = None) -> UserFines:
+        """Return assessed and accrued fines for a single user."""
+        today = today or date.today()
+        accrued_amount, overdue_loans = self.session.execute(
+            select(
+                func.coalesce(func.sum(accrued_fine(today)), 0),
+                func.count(Loan.id),
+            )
+            .where(Loan.user_id == user_id)
+            .where(Loan.status.in_(OPEN_LOAN_STATUSES))
+            .where(Loan.due_date < today)
+        ).one()
+        balance = self.get_one_or_none(user_id=user_id)
+
+        assessed = _money(balance.assessed_amount if balance is not None else 0)
+        accrued = _money(accrued_amount)
+        return UserFines(
+            user_id=user_id,
+            assessed_amount=assessed,
+            accrued_amount=accrued,
+            total_amount=assessed + accrued,
+            overdue_loans=int(overdue_loans),
+        )
+
+    def fines_report(self, limit: int, offset: int, today: date | None = None) -> tuple[list[FineReportRow], int]:
+        """Return a page of users owing fines, highest total first, and the total row count."""
+        today = today or date.today()
+        accrued = self._accrued_by_user(today)
+        assessed_amount = func.coalesce(UserFineBalance.assessed_amount, 0)
+        accrued_amount = func.coalesce(accrued.c.accrued_amount, 0)
+        total_amount = (assessed_amount + accrued_amount).label("total_amount")
+
+        base = (
+            select(
+                User.id,
+                User.username,
+                assessed_amount.label("assessed_amount"),
+                accrued_amount.label("accrued_amount"),
+                total_amount,
+                func.coalesce(accrued.c.overdue_loans, 0).label("overdue_loans"),
+            )
+            .outerjoin(UserFineBalance, UserFineBalance.user_id == User.id)
+            .outerjoin(accrued, accrued.c.user_id == User.id)
+            .where(or_(UserFineBalance.assessed_amount > 0, accrued.c.accrued_amount > 0))
+        )
+
+        total = self.session.execute(select(func.count()).select_from(base.subquery())).scalar_one()
+        rows = self.session.execute(base.order_by(total_amount.desc(), User.id.asc()).limit(limit).offset(offset))
+        items = [
+            FineReportRow(
+                user_id=row.id,
+                username=row.username,
+                assessed_amount=_money(row.assessed_amount),
+                accrued_amount=_money(row.accrued_amount),
+                total_amount=_money(row.total_amount),
+                overdue_loans=int(row.overdue_loans),
+            )
+            for row in rows
+        ]
+        return items, int(total)
+
+
+def rebuild_fine_balances(connection: Connection, user_id: int | None = None) -> int:
+    """Recompute ``user_fine_balances`` from the fines recorded on returned loans, hot and archived.
+
+    For data loaded with plain SQL (``initial_data.sql``), which bypasses the
+    running totals kept by ``LoanRepository``, and for loan changes that can't
+    be applied as a delta. ``user_id`` limits it to one user. Returns the number
+    of balances written.
+    """
+    hot = select(Loan.user_id, Loan.fine_amount).where(Loan.status == LoanStatus.RETURNED, Loan.fine_amount > 0)
+    archived = select(LoanArchive.user_id, LoanArchive.fine_amount).where(LoanArchive.fine_amount > 0)
+    clear = delete(UserFineBalance)
+    if user_id is not None:
+        hot = hot.where(Loan.user_id == user_id)
+        archived = archived.where(LoanArchive.user_id == user_id)
+        clear = clear.where(UserFineBalance.user_id == user_id)
+    fined = union_all(hot, archived).subquery("fined")
+    now = func.current_timestamp()
+    totals = select(fined.c.user_id, func.sum(fined.c.fine_amount), func.count(), now, now).group_by(fined.c.user_id)
+
+    connection.execute(clear)
+    result = connection.execute(
+        insert(UserFineBalance).from_select(
+            ["user_id", "assessed_amount", "fined_loans", "created_at", "updated_at"], totals
+        )
+    )
+    return result.rowcount
+
+
+async def provide_fine_repo(db_session: Session) -> FineRepository:
+    """Provide fine repository instance with auto-commit."""
+    return FineRepository(session=db_session, auto_commit=True)
@@ -2,19 +2,54 @@
 
 from __future__ import annotations
 
-from datetime import date
+from datetime import date, datetime, timezone
 from decimal import Decimal
-from typing import Sequence
+from typing import Any, Sequence
 
 from advanced_alchemy.repository import SQLAlchemySyncRepository
-from sqlalchemy import select, update
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, delete, insert, literal, select, union_all, update
+from sqlalchemy.orm import Session, aliased
 
-from app.models import Book, Loan, LoanStatus
+from app.models import Book, Loan, LoanArchive, LoanStatus, Tombstone, UserFineBalance
+from app.repositories import on_conflict_insert
+from app.repositories.outbox import LOAN_RETURNED, OutboxRepository
 
 
 FINE_PER_DAY = Decimal("5000")
 
+# Columns shared by ``loans`` and ``loans_archive``
+LOAN_COLUMNS = (
+    "id",
+    "loan_dt",
+    "due_date",
+    "return_dt",
+    "fine_amount",
+    "status",
+    "user_id",
+    "book_id",
+    "created_at",
+    "updated_at",
+)
+
+# Hot statements, built once (see app.repositories.book)
+ACTIVE_LOANS = (
+    select(Loan)
+    .where(Loan.user_id == bindparam("user_id"))
+    .where(Loan.status == LoanStatus.ACTIVE)
+    .order_by(Loan.loan_dt.desc())
+)
+LOAN_HISTORY = select(Loan).where(Loan.user_id == bindparam("user_id")).order_by(Loan.loan_dt.desc())
+_loan_history_union = aliased(
+    Loan,
+    union_all(
+        select(*(Loan.__table__.c[name] for name in LOAN_COLUMNS)).where(Loan.user_id == bindparam("user_id")),
+        select(*(LoanArchive.__table__.c[name] for name in LOAN_COLUMNS)).where(
+            LoanArchive.user_id == bindparam("user_id")
+        ),
+    ).subquery("loan_history"),
+)
+LOAN_HISTORY_WITH_ARCHIVE = select(_loan_history_union).order_by(_loan_history_union.loan_dt.desc())
+
 
 class LoanRepository(SQLAlchemySyncRepository[Loan]):
     """Repository for loan database operations."""
@@ -23,26 +58,24 @@ class LoanRepository(SQLAlchemySyncRepository[Loan]):
 
     def get_active_loans(self, user_id: int) -> Sequence[Loan]:
         """Return active loans for a user."""
-        stmt = (
-            select(Loan)
-            .where(Loan.user_id == user_id)
-            .where(Loan.status == LoanStatus.ACTIVE)
-            .order_by(Loan.loan_dt.desc())
-        )
-        return list(self.session.scalars(stmt).all())
-
-    def get_overdue_loans(self) -> Sequence[Loan]:
-        """Return overdue loans and mark ACTIVE loans as OVERDUE if due_date has passed."""
-        today = date.today()
+        return list(self.session.scalars(ACTIVE_LOANS, {"user_id": user_id}).all())
 
-        # Mark ACTIVE loans as OVERDUE where due_date < today
-        self.session.execute(
+    def mark_overdue_loans(self) -> list[tuple[int, int, int]]:
+        """Mark ACTIVE loans past their due_date as OVERDUE; return ``(loan_id, user_id, book_id)`` of those."""
+        marked = self.session.execute(
             update(Loan)
             .where(Loan.status == LoanStatus.ACTIVE)
-            .where(Loan.due_date < today)
+            .where(Loan.due_date < date.today())
             .values(status=LoanStatus.OVERDUE)
-        )
+            .returning(Loan.id, Loan.user_id, Loan.book_id)
+        ).tuples().all()
         self.session.commit()
+        return list(marked)
+
+    def get_overdue_loans(self, mark: bool = True) -> Sequence[Loan]:
+        """Return overdue loans, first marking ACTIVE loans as OVERDUE if due_date has passed (unless ``mark=False``)."""
+        if mark:
+            self.mark_overdue_loans()
 
         stmt = select(Loan).where(Loan.status == LoanStatus.OVERDUE).order_by(Loan.due_date.asc())
         return list(self.session.scalars(stmt).all())
@@ -68,6 +101,8 @@ class LoanRepository(SQLAlchemySyncRepository[Loan]):
         fine = self.calculate_fine(loan)
         loan.fine_amount = fine if fine > 0 else None
         loan.status = LoanStatus.RETURNED
+        if fine > 0:
+            self._add_assessed_fine(user_id=loan.user_id, amount=fine)
 
         # Increment book stock
         book = self.session.get(Book, loan.book_id)
@@ -76,13 +111,95 @@ class LoanRepository(SQLAlchemySyncRepository[Loan]):
             self.session.add(book)
 
         self.session.add(loan)
+        OutboxRepository(session=self.session).emit(
+            LOAN_RETURNED,
+            {
+                "loan_id": loan.id,
+                "user_id": loan.user_id,
+                "book_id": loan.book_id,
+                "fine_amount": str(loan.fine_amount) if loan.fine_amount is not None else None,
+            },
+        )
         self.session.commit()
         return loan
 
-    def get_user_loan_history(self, user_id: int) -> Sequence[Loan]:
-        """Return full loan history for a user ordered by loan date."""
-        stmt = select(Loan).where(Loan.user_id == user_id).order_by(Loan.loan_dt.desc())
-        return list(self.session.scalars(stmt).all())
+    def update_loan(self, loan_id: int, **values: Any) -> Loan:
+        """Update a loan; a status change re-derives the user's fine balance in the same transaction."""
+        loan, _ = self.get_and_update(match_fields="id", id=loan_id, auto_commit=False, **values)
+        if "status" in values:
+            # A loan moved out of RETURNED no longer counts as assessed (and accrues again while open)
+            self._rebuild_fine_balance(loan.user_id)
+        self.session.commit()
+        return loan
+
+    def delete_loan(self, loan_id: int) -> None:
+        """Delete a loan and drop its assessed fine from the user's balance."""
+        loan = self.delete(loan_id, auto_commit=False)
+        if loan.fine_amount:
+            self._rebuild_fine_balance(loan.user_id)
+        self.session.commit()
+
+    def _rebuild_fine_balance(self, user_id: int) -> None:
+        from app.repositories.fine import rebuild_fine_balances
+
+        self.session.flush()
+        rebuild_fine_balances(self.session.connection(), user_id=user_id)
+
+    def _add_assessed_fine(self, user_id: int, amount: Decimal) -> None:
+        """Add ``amount`` to the user's fine balance (same transaction as the return)."""
+        # Upsert: concurrent first fines of the same user can't both insert the row
+        balances = UserFineBalance.__table__.c
+        stmt = on_conflict_insert(self.session, UserFineBalance).values(
+            user_id=user_id, assessed_amount=amount, fined_loans=1
+        )
+        self.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[balances.user_id],
+                set_={
+                    "assessed_amount": balances.assessed_amount + stmt.excluded.assessed_amount,
+                    "fined_loans": balances.fined_loans + 1,
+                    "updated_at": datetime.now(timezone.utc),
+                },
+            )
+        )
+
+    def get_user_loan_history(self, user_id: int, include_archived: bool = False) -> Sequence[Loan]:
+        """Return loan history for a user ordered by loan date.
+
+        Only hot loans are read unless ``include_archived`` is set, in which case
+        archived rows are unioned in and returned as (read-only) ``Loan`` objects.
+        """
+        stmt = LOAN_HISTORY_WITH_ARCHIVE if include_archived else LOAN_HISTORY
+        return list(self.session.scalars(stmt, {"user_id": user_id}).all())
+
+    def archive_returned_loans(self, returned_before: date, batch_size: int = 1000) -> int:
+        """Move RETURNED loans with ``return_dt`` before ``returned_before`` to ``loans_archive``.
+
+        Works in batches of ``batch_size`` rows, committing after each one so locks
+        stay short. Returns the number of archived loans.
+        """
+        archived = 0
+        while True:
+            ids = list(
+                self.session.scalars(
+                    select(Loan.id)
+                    .where(Loan.status == LoanStatus.RETURNED)
+                    .where(Loan.return_dt < returned_before)
+                    .order_by(Loan.id.asc())
+                    .limit(batch_size)
+                ).all()
+            )
+            if not ids:
+                return archived
+
+            archived_at = literal(datetime.now(timezone.utc), LoanArchive.archived_at.type)
+            rows = select(*(Loan.__table__.c[name] for name in LOAN_COLUMNS), archived_at).where(Loan.id.in_(ids))
+            self.session.execute(insert(LoanArchive).from_select([*LOAN_COLUMNS, "archived_at"], rows))
+            self.session.execute(delete(Loan).where(Loan.id.in_(ids)))
+            # A Core DELETE skips the ORM after_delete listener: tell the change feed ourselves
+            self.session.execute(insert(Tombstone), [{"resource": "loans", "record_id": loan_id} for loan_id in ids])
+            self.session.commit()
+            archived += len(ids)
 
 
 async def provide_loan_repo(db_session: Session) -> LoanRepository:
@@ -0,0 +1,75 @@
+"""Repository for the transactional outbox (``outbox_events``)."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Sequence
+
+from advanced_alchemy.repository import SQLAlchemySyncRepository
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.models import OutboxEvent, OutboxStatus
+
+# Topics
+LOAN_CREATED = "loan.created"
+LOAN_RETURNED = "loan.returned"
+
+
+class OutboxRepository(SQLAlchemySyncRepository[OutboxEvent]):
+    """Repository for writing and claiming outbox events."""
+
+    model_type = OutboxEvent
+
+    def emit(self, topic: str, payload: dict[str, Any]) -> OutboxEvent:
+        """Add an event to the current transaction; it is committed with the caller's changes."""
+        event = OutboxEvent(
+            topic=topic,
+            payload=payload,
+            status=OutboxStatus.PENDING,
+            attempts=0,
+            available_at=datetime.now(timezone.utc),
+        )
+        self.session.add(event)
+        return event
+
+    def claim_batch(self, limit: int) -> Sequence[OutboxEvent]:
+        """Lock up to ``limit`` due events, skipping rows locked by other workers."""
+        stmt = (
+            select(OutboxEvent)
+            .where(OutboxEvent.status == OutboxStatus.PENDING)
+            .where(OutboxEvent.available_at <= datetime.now(timezone.utc))
+            .order_by(OutboxEvent.id.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list(self.session.scalars(stmt).all())
+
+    def mark_done(self, event: OutboxEvent) -> None:
+        event.status = OutboxStatus.DONE
+        event.processed_at = datetime.now(timezone.utc)
+        event.last_error = None
+
+    def mark_failed(self, event: OutboxEvent, error: str, max_attempts: int, backoff: timedelta) -> None:
+        """Schedule a retry after ``backoff``, or give up after ``max_attempts``."""
+        event.attempts += 1
+        event.last_error = error[:1000]
+        if event.attempts >= max_attempts:
+            event.status = OutboxStatus.FAILED
+            event.processed_at = datetime.now(timezone.utc)
+        else:
+            event.available_at = datetime.now(timezone.utc) + backoff
+
+    def purge_done(self, older_than: datetime) -> int:
+        """Delete processed events older than ``older_than``; failed ones are kept for inspection."""
+        result = self.session.execute(
+            delete(OutboxEvent)
+            .where(OutboxEvent.status == OutboxStatus.DONE)
+            .where(OutboxEvent.processed_at < older_than)
+        )
+        return result.rowcount
+
+
+async def provide_outbox_repo(db_session: Session) -> OutboxRepository:
+    """Provide outbox repository instance (shares the request transaction)."""
+    return OutboxRepository(session=db_session)
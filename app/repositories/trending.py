@@ -0,0 +1,58 @@
+"""Repository for persisted trending scores (``book_trend_scores``)."""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from typing import Iterator, Mapping
+
+from advanced_alchemy.repository import SQLAlchemySyncRepository
+from sqlalchemy import delete, literal_column, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models import BookTrendScore, Loan, LoanArchive, Review
+from app.repositories import on_conflict_insert
+
+
+class TrendScoreRepository(SQLAlchemySyncRepository[BookTrendScore]):
+    """Repository for reading and accumulating trending scores."""
+
+    model_type = BookTrendScore
+
+    def scores(self) -> dict[int, float]:
+        """All persisted scores by book id."""
+        return dict(self.session.execute(select(BookTrendScore.book_id, BookTrendScore.score)).tuples().all())
+
+    def add_deltas(self, deltas: Mapping[int, float]) -> None:
+        """Add score deltas (same units as the stored scores) without committing."""
+        if not deltas:
+            return
+        # Upsert: two workers flushing the first delta of a book can't both insert its row
+        scores = BookTrendScore.__table__.c
+        stmt = on_conflict_insert(self.session, BookTrendScore)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[scores.book_id],
+            set_={"score": scores.score + stmt.excluded.score, "updated_at": datetime.now(timezone.utc)},
+        )
+        # Same row order in every worker, so concurrent flushes can't deadlock
+        self.session.execute(stmt, [{"book_id": book_id, "score": deltas[book_id]} for book_id in sorted(deltas)])
+
+    def replace_all(self, scores: Mapping[int, float]) -> None:
+        """Replace every stored score without committing (used by the rebuild)."""
+        self.session.execute(delete(BookTrendScore))
+        self.session.add_all(BookTrendScore(book_id=book_id, score=score) for book_id, score in scores.items())
+        self.session.flush()
+
+    def activity_since(self, since: date) -> Iterator[tuple[int, date, str]]:
+        """Loans (hot and archived) and reviews since ``since`` as ``(book_id, day, kind)``."""
+        stmt = union_all(
+            select(Loan.book_id, Loan.loan_dt, literal_column("'loan'")).where(Loan.loan_dt >= since),
+            select(LoanArchive.book_id, LoanArchive.loan_dt, literal_column("'loan'")).where(LoanArchive.loan_dt >= since),
+            select(Review.book_id, Review.review_date, literal_column("'review'")).where(Review.review_date >= since),
+        )
+        for book_id, day, kind in self.session.execute(stmt):
+            yield book_id, day, kind
+
+
+async def provide_trend_score_repo(db_session: Session) -> TrendScoreRepository:
+    """Provide trending score repository instance."""
+    return TrendScoreRepository(session=db_session)
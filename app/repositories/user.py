@@ -2,12 +2,10 @@
 
 from advanced_alchemy.repository import SQLAlchemySyncRepository
 from litestar.dto import DTOData
-from pwdlib import PasswordHash
 from sqlalchemy.orm import Session
 
 from app.models import User
-
-password_hasher = PasswordHash.recommended()
+from app.passwords import passwords
 
 
 class UserRepository(SQLAlchemySyncRepository[User]):
@@ -18,7 +16,7 @@ class UserRepository(SQLAlchemySyncRepository[User]):
     def add_with_hashed_password(self, data: DTOData[User]):
         """Add user with hashed password."""
         data_dict = data.as_builtins()
-        data_dict["password"] = password_hasher.hash(data_dict["password"])
+        data_dict["password"] = passwords.hash(data_dict["password"])
 
         return self.add(User(**data_dict))
 
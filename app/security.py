@@ -1,29 +1,156 @@
 """OAuth2 authentication and security configuration."""
 
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, AsyncIterator
+
+import anyio
 from litestar.connection import ASGIConnection
 from litestar.security.jwt import OAuth2PasswordBearerAuth, Token
+from sqlalchemy import select
 
 from app.config import settings
-from app.models import User
+from app.models import Tombstone, User
 from app.repositories.user import UserRepository
 
+if TYPE_CHECKING:
+    from litestar import Litestar
+
+logger = logging.getLogger(__name__)
+
+
+class TokenVersionTable:
+    """In-memory ``user_id -> token_version`` map used to revoke self-contained tokens.
+
+    Only users whose version was ever bumped are kept, plus the ids of deleted
+    users. The table is refreshed incrementally (rows with a newer ``updated_at``
+    and new ``users`` tombstones) and updated locally on bumps so the worker
+    that handled the change revokes immediately.
+    """
+
+    __slots__ = ("versions", "revoked", "last_refresh", "_users_watermark", "_tombstones_watermark")
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every version and deletion; the next refresh reads them all again."""
+        self.versions: dict[int, int] = {}
+        self.revoked: set[int] = set()
+        self.last_refresh = 0.0
+        epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+        self._users_watermark = epoch
+        self._tombstones_watermark = epoch
+
+    def is_current(self, user_id: int, token_version: int) -> bool:
+        """Return whether a token carrying ``token_version`` is still valid."""
+        return user_id not in self.revoked and token_version >= self.versions.get(user_id, 0)
+
+    def bump(self, user_id: int, token_version: int) -> None:
+        """Record a new version for ``user_id`` (tokens below it are rejected)."""
+        self.versions[user_id] = token_version
+
+    def revoke(self, user_id: int) -> None:
+        """Reject every token of ``user_id`` (deleted user)."""
+        self.revoked.add(user_id)
+        self.versions.pop(user_id, None)
+
+    def refresh(self) -> None:
+        """Pull versions and deletions that changed since the previous refresh."""
+        from app.db import sqlalchemy_config
+
+        with sqlalchemy_config.get_session() as session:
+            users = session.execute(
+                select(User.id, User.token_version, User.updated_at)
+                .where(User.updated_at > self._users_watermark)
+                .where(User.token_version > 0)
+            ).all()
+            for user_id, token_version, updated_at in users:
+                self.bump(user_id, max(token_version, self.versions.get(user_id, 0)))
+                self._users_watermark = max(self._users_watermark, updated_at)
+
+            deleted = session.execute(
+                select(Tombstone.record_id, Tombstone.updated_at)
+                .where(Tombstone.resource == "users")
+                .where(Tombstone.updated_at > self._tombstones_watermark)
+            ).all()
+            for user_id, updated_at in deleted:
+                self.revoke(user_id)
+                self._tombstones_watermark = max(self._tombstones_watermark, updated_at)
+
+        self.last_refresh = time.monotonic()
+
+
+token_versions = TokenVersionTable()
+
+
+@asynccontextmanager
+async def token_version_refresher(_: Litestar) -> AsyncIterator[None]:
+    """Keep ``token_versions`` fresh while the app runs (claims mode only)."""
+    if not settings.jwt_claims_auth:
+        yield
+        return
+
+    async def refresh_forever() -> None:
+        while True:
+            await anyio.sleep(settings.token_version_refresh_seconds)
+            try:
+                await anyio.to_thread.run_sync(token_versions.refresh)
+            except Exception:
+                # Database unavailable: revocations made elsewhere wait for the next refresh
+                logger.exception("No se pudieron actualizar las versiones de token; se reintentará")
+
+    try:
+        await anyio.to_thread.run_sync(token_versions.refresh)
+    except Exception as e:
+        # Serving without the table would accept every revoked token
+        raise RuntimeError("No se pudieron cargar las versiones de token (JWT_CLAIMS_AUTH)") from e
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(refresh_forever)
+        try:
+            yield
+        finally:
+            tg.cancel_scope.cancel()
+
 
 async def retrieve_user_handler(token: Token, _: ASGIConnection) -> User | None:
     """Retrieve user based on JWT token."""
+    token_version = int(token.extras.get("tv", 0))
+
+    if settings.jwt_claims_auth and "uid" in token.extras:
+        # Claims mode: no database access, only the in-memory revocation table
+        user_id = int(token.extras["uid"])
+        if not token_versions.is_current(user_id, token_version):
+            return None
+        return User(id=user_id, username=token.sub, is_active=bool(token.extras.get("active", True)))
+
     from app.db import sqlalchemy_config
 
     with sqlalchemy_config.get_session() as session:
         users_repo = UserRepository(session=session)
 
         try:
-            return users_repo.get_one(username=token.sub)
+            user = users_repo.get_one(username=token.sub)
         except Exception:
             return None
 
+    if "tv" in token.extras and token_version < user.token_version:
+        return None
+    return user
+
+
+def token_claims(user: User) -> dict[str, int | bool]:
+    """Extra JWT claims embedded at login for claims mode."""
+    return {"uid": user.id, "active": user.is_active, "tv": user.token_version}
+
 
 oauth2_auth = OAuth2PasswordBearerAuth[User](
     retrieve_user_handler=retrieve_user_handler,
     token_secret=settings.jwt_secret,
     token_url="/auth/login",
-    exclude=["/auth/login", "/schema"],
+    exclude=["/auth/login", "/schema", "/metrics"],
 )
@@ -0,0 +1,88 @@
+"""Single-flight coalescing of identical concurrent GET requests.
+
+For the routes listed in ``SINGLE_FLIGHT_ROUTES`` (route templates such as
+``/books/stats``), requests with the same method, path and query parameters
+(in any order) that arrive while one of them is running don't run the handler
+again: they wait for that first request (the *leader*) and get a copy of its
+response. Nothing is cached once the leader has answered, so data is never
+staler than the request that was already in flight.
+
+Only list routes whose response doesn't depend on who is asking; authentication
+still runs for every request, before coalescing. Coalescing is per worker
+process. If the leader fails (an exception or a 5xx response), one of the
+waiting requests takes over.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+from urllib.parse import parse_qsl, urlencode
+
+import anyio
+from litestar.enums import ScopeType
+from litestar.middleware import AbstractMiddleware
+
+from app.config import settings
+from app.metrics import SINGLE_FLIGHT_REQUESTS
+
+if TYPE_CHECKING:
+    from litestar.types import Message, Receive, Scope, Send
+
+
+class _Flight:
+    """A leader's response as it is sent, for the requests waiting on it."""
+
+    __slots__ = ("done", "messages", "failed")
+
+    def __init__(self) -> None:
+        self.done = anyio.Event()
+        self.messages: list[Message] = []
+        self.failed = False
+
+
+def flight_key(scope: Scope) -> tuple[str, str, str]:
+    """Method, path and query string with its parameters sorted."""
+    query = scope.get("query_string", b"").decode("latin-1")
+    return scope["method"], scope["path"], urlencode(sorted(parse_qsl(query, keep_blank_values=True)))
+
+
+class SingleFlightMiddleware(AbstractMiddleware):
+    """Run one handler per set of identical concurrent requests on the opted-in routes."""
+
+    scopes = {ScopeType.HTTP}
+
+    _flights: dict[tuple[str, str, str], _Flight] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        route = scope.get("path_template", scope["path"])
+        if scope["method"] not in ("GET", "HEAD") or route not in settings.single_flight_routes:
+            await self.app(scope, receive, send)
+            return
+
+        key = flight_key(scope)
+        while (flight := self._flights.get(key)) is not None:
+            await flight.done.wait()
+            if not flight.failed:
+                SINGLE_FLIGHT_REQUESTS.labels(route, "coalesced").inc()
+                for message in flight.messages:
+                    await send(message)
+                return
+
+        flight = self._flights[key] = _Flight()
+        SINGLE_FLIGHT_REQUESTS.labels(route, "leader").inc()
+
+        async def send_wrapper(message: Message) -> None:
+            # Handler exceptions reach us as 500 responses: don't hand those to the waiters
+            if message["type"] == "http.response.start" and message["status"] >= 500:
+                flight.failed = True
+            flight.messages.append(message)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            del self._flights[key]
+            flight.done.set()
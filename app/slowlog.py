@@ -0,0 +1,263 @@
+"""Slow-query log: statements over ``SLOW_QUERY_THRESHOLD_MS`` with where they came from.
+
+Engine events time every statement. A slow one is recorded with:
+
+* its SQL (``IN (...)`` lists collapsed so variants group together) and its
+  parameters redacted to type and length (``<str:12>``), never their values;
+* the calling repository method (first ``app.repositories`` frame, else the
+  first ``app`` frame), e.g. ``BookRepository.browse``;
+* the route that issued it (``GET /books/browse``), set by
+  :class:`SlowQueryRouteMiddleware`.
+
+Records go to a rotating JSON-lines file (``SLOW_QUERY_LOG_FILE``) and to an
+in-process summary served by ``GET /debug/slow-queries``. On PostgreSQL a
+``SLOW_QUERY_EXPLAIN_SAMPLE_RATE`` share of slow ``SELECT`` statements is
+re-run as ``EXPLAIN (ANALYZE, BUFFERS)`` in a background thread on its own
+connection (rolled back) and the plan is logged with the record.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import re
+import sys
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+from litestar.enums import ScopeType
+from litestar.middleware import AbstractMiddleware
+from sqlalchemy import event
+
+from app.config import settings
+from app.models import SlowQuerySummary
+
+if TYPE_CHECKING:
+    from litestar import Litestar
+    from litestar.types import Receive, Scope, Send
+    from sqlalchemy.engine import Engine
+
+# Distinct (statement, caller) pairs kept in the summary
+MAX_SUMMARY_ENTRIES = 500
+
+_current_route: ContextVar[str | None] = ContextVar("slow_query_route", default=None)
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%s|%\([^)]+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%s|%\([^)]+\)s|\$\d+|:\w+)\s*\)")
+
+_logger = logging.getLogger("app.slow_queries")
+_logger.propagate = False
+
+
+class SlowQueryRouteMiddleware(AbstractMiddleware):
+    """Remember the route of the current request for the statements it issues."""
+
+    scopes = {ScopeType.HTTP}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        token = _current_route.set(f"{scope['method']} {scope.get('path_template', scope['path'])}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_route.reset(token)
+
+
+def fingerprint(statement: str) -> str:
+    """Statement with whitespace normalized and bound ``IN`` lists collapsed to ``(...)``."""
+    return _IN_LIST.sub("(...)", " ".join(statement.split()))
+
+
+def redact(parameters: Any) -> Any:
+    """Parameters with every value replaced by its type (and length for strings and bytes)."""
+    if isinstance(parameters, dict):
+        return {key: _redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+def _redact_value(value: Any) -> Any:
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)):
+        return f"<{type(value).__name__}:{len(value)}>"
+    if isinstance(value, (list, tuple)):
+        return [_redact_value(item) for item in value]
+    return f"<{type(value).__name__}>"
+
+
+def calling_method() -> str | None:
+    """Qualified name of the innermost repository method (or app function) on the stack."""
+    fallback = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.repositories."):
+            return frame.f_code.co_qualname
+        if fallback is None and module.startswith("app.") and module != __name__:
+            fallback = f"{module}.{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return fallback
+
+
+class SlowQueryLog:
+    """Summary of slow statements by (statement, caller), plus the file log and EXPLAIN sampling."""
+
+    __slots__ = ("entries", "_lock", "_explainer", "_explaining")
+
+    def __init__(self) -> None:
+        self.entries: dict[tuple[str, str | None], SlowQuerySummary] = {}
+        self._lock = threading.Lock()
+        self._explainer: ThreadPoolExecutor | None = None
+        self._explaining = threading.Semaphore(2)
+
+    def record(self, engine: Engine, statement: str, parameters: Any, seconds: float) -> None:
+        """Add a slow statement to the summary and the log; maybe schedule an EXPLAIN."""
+        sql = fingerprint(statement)
+        caller = calling_method()
+        route = _current_route.get()
+        millis = round(seconds * 1000, 1)
+        now = datetime.now(timezone.utc)
+        redacted = redact(parameters)
+
+        with self._lock:
+            entry = self.entries.get((sql, caller))
+            if entry is None:
+                if len(self.entries) >= MAX_SUMMARY_ENTRIES:
+                    # Drop the entry seen longest ago
+                    del self.entries[min(self.entries, key=lambda k: self.entries[k].last_seen)]
+                entry = self.entries[(sql, caller)] = SlowQuerySummary(statement=sql, caller=caller)
+            entry.count += 1
+            entry.total_ms = round(entry.total_ms + millis, 1)
+            entry.max_ms = max(entry.max_ms, millis)
+            entry.last_seen = now
+            entry.last_parameters = redacted
+            if route is not None and route not in entry.routes:
+                entry.routes.append(route)
+
+        record = {
+            "at": now.isoformat(),
+            "duration_ms": millis,
+            "caller": caller,
+            "route": route,
+            "statement": sql,
+            "parameters": redacted,
+        }
+        if self._should_explain(engine, statement, parameters):
+            self._explainer.submit(self._explain, engine, statement, parameters, record)  # type: ignore[union-attr]
+        else:
+            _logger.info(json.dumps(record, default=str))
+
+    def summary(self, limit: int) -> list[SlowQuerySummary]:
+        """Entries with the most total time first."""
+        with self._lock:
+            return sorted(self.entries.values(), key=lambda e: e.total_ms, reverse=True)[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.entries.clear()
+
+    # --- EXPLAIN sampling (PostgreSQL) ---
+
+    def _should_explain(self, engine: Engine, statement: str, parameters: Any) -> bool:
+        return (
+            self._explainer is not None
+            and engine.dialect.name == "postgresql"
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and isinstance(parameters, (dict, tuple, list))
+            and random.random() < settings.slow_query_explain_sample_rate
+            # Skip rather than queue up when EXPLAINs are already running
+            and self._explaining.acquire(blocking=False)
+        )
+
+    def _explain(self, engine: Engine, statement: str, parameters: Any, record: dict[str, Any]) -> None:
+        try:
+            with engine.connect() as conn:
+                conn.info["slow_query_explain"] = True
+                try:
+                    rows = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters).all()
+                    record["explain"] = "\n".join(row[0] for row in rows)
+                finally:
+                    conn.rollback()
+        except Exception as e:
+            record["explain_error"] = f"{type(e).__name__}: {e}"
+        finally:
+            self._explaining.release()
+            _logger.info(json.dumps(record, default=str))
+
+    # --- lifecycle ---
+
+    def start(self) -> None:
+        if self._explainer is None:
+            self._explainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+
+    def stop(self) -> None:
+        if self._explainer is not None:
+            self._explainer.shutdown(wait=False, cancel_futures=True)
+            self._explainer = None
+
+
+slow_queries = SlowQueryLog()
+
+_instrumented: weakref.WeakSet[Engine] = weakref.WeakSet()
+
+
+def _configure_file_log() -> None:
+    if _logger.handlers:
+        return
+    path = Path(settings.slow_query_log_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=settings.slow_query_log_max_bytes,
+        backupCount=settings.slow_query_log_backups,
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _logger.addHandler(handler)
+    _logger.setLevel(logging.INFO)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement on ``engine`` and record the ones over the threshold."""
+    if engine in _instrumented:
+        return
+    _instrumented.add(engine)
+    threshold = settings.slow_query_threshold_ms / 1000
+
+    def before_execute(conn: Any, *_: Any) -> None:
+        conn.info["slow_query_started"] = time.perf_counter()
+
+    def after_execute(conn: Any, _cursor: Any, statement: str, parameters: Any, _context: Any, _many: Any) -> None:
+        started = conn.info.get("slow_query_started")
+        if started is None:
+            # Already running when the listeners were added
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed >= threshold and not conn.info.get("slow_query_explain"):
+            slow_queries.record(engine, statement, parameters, elapsed)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    event.listen(engine, "after_cursor_execute", after_execute)
+
+
+@asynccontextmanager
+async def slow_query_lifespan(_: Litestar) -> AsyncIterator[None]:
+    """Instrument the engine, open the log file and start the EXPLAIN worker."""
+    from app.db import sqlalchemy_config
+
+    _configure_file_log()
+    instrument_engine(sqlalchemy_config.get_engine())
+    slow_queries.start()
+    try:
+        yield
+    finally:
+        slow_queries.stop()
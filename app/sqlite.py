@@ -0,0 +1,150 @@
+"""Tuned SQLite mode for single-box deployments (small branches without PostgreSQL).
+
+Applies when ``DATABASE_URL`` is a ``sqlite:///<file>`` URL and ``SQLITE_TUNED``
+is on (the default):
+
+* every connection sets ``journal_mode=WAL`` (readers and the writer don't block
+  each other), ``synchronous=NORMAL`` (fsync at checkpoints only: a power cut
+  can lose the last commits but never corrupts the file), ``busy_timeout``,
+  ``mmap_size``, a larger page cache and ``foreign_keys=ON``;
+* writes go through a single-writer queue: the first write statement of a
+  transaction takes a process-wide lock, released at commit or rollback, so the
+  worker's threads wait their turn in order instead of retrying on
+  ``SQLITE_BUSY``; reads never take it;
+* writes never run on the event loop thread, where waiting for the queue would
+  stall every request of the worker (and never end if the writer holding it is
+  a coroutine of the same loop): write handlers are ``sync_to_thread=True`` and
+  background jobs use ``anyio.to_thread``; a write issued from the loop fails
+  at once;
+* :func:`sqlite_maintenance` runs ``PRAGMA optimize`` every
+  ``SQLITE_OPTIMIZE_SECONDS`` and on shutdown.
+
+Run a single worker process: the queue is per process (more workers still work,
+but contend through ``busy_timeout``). Create the database with
+``litestar sqlite-init``, since the Alembic baseline alters columns, which SQLite
+can't do. ``litestar db-benchmark`` measures throughput against whatever
+``DATABASE_URL`` points to, to compare with PostgreSQL on the same data.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sqlite3
+import threading
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator
+
+import anyio
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from litestar import Litestar
+    from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_WRITE_PREFIXES = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+
+# The single writer: held from a transaction's first write until it ends
+_writer = threading.Lock()
+
+
+def is_tuned(engine: Engine) -> bool:
+    """Whether ``engine`` is a file SQLite database run in the tuned mode."""
+    database = engine.url.database
+    return settings.sqlite_tuned and engine.dialect.name == "sqlite" and database not in (None, "", ":memory:")
+
+
+def _set_pragmas(dbapi_connection: sqlite3.Connection, _record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+        cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+        # Negative: size in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{settings.sqlite_cache_size_kib}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+    finally:
+        cursor.close()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def _take_writer(conn: Any, _cursor: Any, statement: str, parameters: Any, context: Any, _many: bool) -> None:
+    if conn.info.get("sqlite_writer"):
+        return
+    is_write = context is not None and (context.isinsert or context.isupdate or context.isdelete)
+    if not is_write and not statement.lstrip()[:7].upper().startswith(_WRITE_PREFIXES):
+        return
+    if _on_event_loop():
+        raise OperationalError(
+            statement, parameters, sqlite3.OperationalError("write on the event loop thread (use sync_to_thread=True)")
+        )
+    if not _writer.acquire(timeout=settings.sqlite_busy_timeout_ms / 1000):
+        raise OperationalError(statement, parameters, sqlite3.OperationalError("database is locked (write queue)"))
+    conn.info["sqlite_writer"] = True
+
+
+def _release_writer(info: dict[str, Any]) -> None:
+    if info.pop("sqlite_writer", False):
+        _writer.release()
+
+
+def tune_engine(engine: Engine) -> None:
+    """Set the pragmas on every new connection and queue the writers of ``engine``."""
+    event.listen(engine, "connect", _set_pragmas)
+    event.listen(engine, "before_cursor_execute", _take_writer)
+    # Released just before the COMMIT itself; the next writer covers that gap with busy_timeout
+    event.listen(engine, "commit", lambda conn: _release_writer(conn.info))
+    event.listen(engine, "rollback", lambda conn: _release_writer(conn.info))
+    # A connection returned to the pool without commit/rollback events (e.g. closed mid-transaction)
+    event.listen(engine.pool, "checkin", lambda _dbapi, record: _release_writer(record.info))
+
+
+def optimize(engine: Engine) -> None:
+    """``PRAGMA optimize``: refresh the statistics the planner needs, when they are stale."""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA optimize")
+
+
+@asynccontextmanager
+async def sqlite_maintenance(_: Litestar) -> AsyncIterator[None]:
+    """Run ``PRAGMA optimize`` periodically and on shutdown (tuned SQLite mode only)."""
+    from app.db import sqlalchemy_config
+
+    engine = sqlalchemy_config.get_engine()
+    if not is_tuned(engine):
+        yield
+        return
+
+    async def optimize_forever() -> None:
+        while True:
+            await anyio.sleep(settings.sqlite_optimize_seconds)
+            try:
+                await anyio.to_thread.run_sync(optimize, engine)
+            except Exception:
+                logger.exception("Fallo en PRAGMA optimize; se reintentará")
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(optimize_forever)
+        try:
+            yield
+        finally:
+            tg.cancel_scope.cancel()
+            with anyio.CancelScope(shield=True):
+                try:
+                    await anyio.to_thread.run_sync(optimize, engine)
+                except Exception:
+                    logger.exception("Fallo en PRAGMA optimize al parar")
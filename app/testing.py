@@ -0,0 +1,254 @@
+"""Database fixtures for integration tests and benchmarks: build once, reset per test.
+
+:class:`TemplateDatabase` migrates and seeds the database named by
+``DATABASE_URL`` once, keeps a copy of it as a template, and restores that copy
+before each test. The database URL never changes, so the module-level engine and
+the ``app`` object keep working without reconfiguration:
+
+* SQLite: the template is a sibling file; a reset copies it back with the
+  SQLite backup API (milliseconds). The schema comes from the models
+  (``metadata.create_all``): the baseline Alembic migration alters columns,
+  which SQLite can't do.
+* PostgreSQL: the schema comes from ``alembic upgrade head``; the template is a
+  ``<name>_template`` database and a reset is ``DROP DATABASE`` +
+  ``CREATE DATABASE ... TEMPLATE`` (a file-level copy, no SQL replay).
+
+Only databases whose name contains ``test`` are accepted, since they get dropped.
+Typical ``conftest.py``::
+
+    import pytest
+    from app.testing import TemplateDatabase, client
+
+    @pytest.fixture(scope="session")
+    def template_db():
+        db = TemplateDatabase()
+        db.build()
+        yield db
+        db.drop()
+
+    @pytest.fixture
+    def api(template_db):
+        template_db.reset()
+        with client() as c:
+            yield c
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import subprocess
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from litestar.testing import TestClient
+from sqlalchemy import Integer, create_engine, text
+from sqlalchemy.engine import URL, make_url
+
+from app.config import settings
+from app.repositories.fine import rebuild_fine_balances
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SEED_FILE = PROJECT_ROOT / "initial_data.sql"
+
+
+class TemplateDatabase:
+    """Migrated and seeded template of the test database, restored on demand."""
+
+    def __init__(self, database_url: str | None = None, seed_file: Path | None = SEED_FILE) -> None:
+        self.url: URL = make_url(database_url or settings.database_url)
+        self.seed_file = seed_file
+        name = self.url.database or ""
+        if "test" not in Path(name).name:
+            raise RuntimeError(f"{name!r} no parece una base de datos de pruebas (el nombre debe contener 'test')")
+        self.is_sqlite = self.url.get_backend_name() == "sqlite"
+
+    # --- public API ---
+
+    def build(self) -> None:
+        """Create the schema, load the seed data and save the result as the template."""
+        self._dispose_app_engine()
+        if self.is_sqlite:
+            self._build_sqlite()
+        else:
+            self._build_postgres()
+
+    def reset(self) -> None:
+        """Restore the database from the template and clear in-process state."""
+        self._dispose_app_engine()
+        if self.is_sqlite:
+            with sqlite3.connect(self._sqlite_template) as source, sqlite3.connect(self.url.database) as target:
+                source.backup(target)
+        else:
+            with self._admin() as conn:
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{self.url.database}" WITH (FORCE)'))
+                conn.execute(text(f'CREATE DATABASE "{self.url.database}" TEMPLATE "{self._pg_template}"'))
+        reset_process_state()
+
+    def drop(self) -> None:
+        """Remove the template (the working database is left as is)."""
+        if self.is_sqlite:
+            Path(self._sqlite_template).unlink(missing_ok=True)
+        else:
+            with self._admin() as conn:
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{self._pg_template}" WITH (FORCE)'))
+
+    # --- SQLite ---
+
+    @property
+    def _sqlite_template(self) -> str:
+        return f"{self.url.database}.template"
+
+    def _build_sqlite(self) -> None:
+        from advanced_alchemy.base import orm_registry
+
+        # Registers every table on the metadata
+        import app.models
+
+        for suffix in ("", "-wal", "-shm"):
+            # A leftover WAL file would be replayed onto the new database
+            Path(f"{self.url.database}{suffix}").unlink(missing_ok=True)
+        engine = create_engine(self.url)
+        try:
+            orm_registry.metadata.create_all(engine)
+            if self.seed_file is not None:
+                with sqlite3.connect(self.url.database) as conn:
+                    conn.executescript(self.seed_file.read_text(encoding="utf-8"))
+                with engine.begin() as conn:
+                    rebuild_fine_balances(conn)
+                    _normalize_sqlite_datetimes(conn)
+        finally:
+            engine.dispose()
+        Path(self._sqlite_template).unlink(missing_ok=True)
+        with sqlite3.connect(self.url.database) as source, sqlite3.connect(self._sqlite_template) as target:
+            source.backup(target)
+
+    # --- PostgreSQL ---
+
+    @property
+    def _pg_template(self) -> str:
+        return f"{self.url.database}_template"
+
+    @contextmanager
+    def _admin(self) -> Iterator[Any]:
+        engine = create_engine(self.url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+        try:
+            with engine.connect() as conn:
+                yield conn
+        finally:
+            engine.dispose()
+
+    def _build_postgres(self) -> None:
+        with self._admin() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{self._pg_template}" WITH (FORCE)'))
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{self.url.database}" WITH (FORCE)'))
+            conn.execute(text(f'CREATE DATABASE "{self.url.database}"'))
+
+        subprocess.run(
+            [sys.executable, "-m", "alembic", "upgrade", "head"],
+            cwd=PROJECT_ROOT,
+            env={**os.environ, "DATABASE_URL": self.url.render_as_string(hide_password=False)},
+            check=True,
+        )
+
+        engine = create_engine(self.url)
+        try:
+            with engine.begin() as conn:
+                if self.seed_file is not None:
+                    conn.exec_driver_sql(self.seed_file.read_text(encoding="utf-8"))
+                    # The migrations ran on an empty database: their data steps had nothing to fill
+                    rebuild_fine_balances(conn)
+                _sync_sequences(conn)
+        finally:
+            engine.dispose()
+
+        with self._admin() as conn:
+            conn.execute(text(f'CREATE DATABASE "{self._pg_template}" TEMPLATE "{self.url.database}"'))
+
+    # --- helpers ---
+
+    @staticmethod
+    def _dispose_app_engine() -> None:
+        # Pooled connections would keep the old file open / block DROP DATABASE
+        from app.db import sqlalchemy_config
+
+        sqlalchemy_config.get_engine().dispose()
+
+
+def _normalize_sqlite_datetimes(conn: Any) -> None:
+    """Rewrite seeded timestamps in the format SQLAlchemy stores and binds on SQLite.
+
+    The seed file writes ISO-8601 literals (``2025-11-20T03:21:00+00:00``) while
+    ``DateTimeUTC`` stores naive UTC text (``2025-11-20 03:21:00.000000``); SQLite
+    compares them as strings, so keyset pagination (``(updated_at, id) > cursor``)
+    would mis-order seeded rows against rows written by the app.
+    """
+    from advanced_alchemy.base import orm_registry
+    from sqlalchemy import DateTime
+
+    for table in orm_registry.metadata.sorted_tables:
+        for column in table.columns:
+            # DateTimeUTC is a TypeDecorator over DateTime
+            if not isinstance(getattr(column.type, "impl", column.type), DateTime):
+                continue
+            conn.execute(
+                text(
+                    f'UPDATE "{table.name}" SET "{column.name}" = '
+                    f"strftime('%Y-%m-%d %H:%M:%f', \"{column.name}\") || '000' "
+                    f'WHERE "{column.name}" IS NOT NULL'
+                )
+            )
+
+
+def _sync_sequences(conn: Any) -> None:
+    """Move id sequences past the ids inserted explicitly by the seed file."""
+    from advanced_alchemy.base import orm_registry
+
+    for table in orm_registry.metadata.sorted_tables:
+        id_column = table.columns.get("id")
+        if id_column is None or not isinstance(id_column.type, Integer):
+            continue
+        conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+            )
+        )
+
+
+def reset_process_state() -> None:
+    """Forget in-process caches that would outlive a database reset."""
+    from app.catalog import catalog
+    from app.events import live_events
+    from app.passwords import passwords
+    from app.security import token_versions
+    from app.slowlog import slow_queries
+    from app.throttle import login_throttle
+    from app.trending import trending
+
+    catalog.reset()
+    passwords.reset()
+    token_versions.reset()
+    trending.reset()
+    slow_queries.clear()
+    for buffer in live_events.buffers.values():
+        buffer.clear()
+    login_throttle.reset()
+
+
+@contextmanager
+def client() -> Iterator[TestClient]:
+    """Litestar test client for ``app.app`` (runs the lifespan)."""
+    from app import app
+
+    with TestClient(app=app) as test_client:
+        yield test_client
+
+
+def login(test_client: TestClient, username: str, password: str) -> None:
+    """Log in and send the bearer token on every following request."""
+    response = test_client.post("/auth/login", data={"username": username, "password": password})
+    response.raise_for_status()
+    test_client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
@@ -0,0 +1,262 @@
+"""Login throttling: token buckets per client IP, escalating backoff per (username, IP).
+
+Attempts are checked *before* any Argon2 work so that credential-stuffing bursts
+are rejected cheaply. Only failed attempts consume tokens, so a user typing the
+right password is never slowed down by their own successful logins.
+
+Only the IP bucket and the (username, IP) backoff ever refuse an attempt. The
+per-username bucket is a signal, not a limit: when it runs dry the account is
+under attack, and failures from IPs that never logged in to it start backing
+off from the first one instead of after ``LOGIN_BACKOFF_AFTER``. An attacker
+spraying passwords at a known username therefore can't lock its owner out, and
+IPs the owner logged in from (remembered ``LOGIN_KNOWN_IP_DAYS``) keep the
+normal allowance.
+
+State is per worker by default, or shared by every worker in Redis when
+``LOGIN_THROTTLE_REDIS_URL`` is set. Every read-modify-write is atomic: a
+WATCH/MULTI transaction retried on conflict in Redis, a single step without
+awaits on the event loop in memory.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Protocol
+
+from litestar.exceptions import MissingDependencyException
+from litestar.serialization import decode_json, encode_json
+
+from app.config import settings
+
+# ``change(state) -> (new state, seconds to keep it)``
+Change = Callable[[list[float] | None], tuple[list[float], int]]
+
+
+@dataclass
+class ThrottleStats:
+    """Counters exposed through ``GET /auth/throttle-stats``."""
+
+    attempts: int = 0
+    rejected: int = 0
+    failures: int = 0
+    verify_seconds_avg: float = 0.0
+
+    @property
+    def cpu_seconds_saved(self) -> float:
+        """Argon2 time not spent thanks to rejected attempts (estimate)."""
+        return self.rejected * self.verify_seconds_avg
+
+
+class ThrottleState(Protocol):
+    """Keyed throttle state with atomic updates."""
+
+    async def get(self, key: str) -> list[float] | None: ...
+
+    async def update(self, key: str, change: Change) -> list[float]:
+        """Apply ``change`` to the state of ``key`` atomically; return the new state."""
+
+    async def delete(self, key: str) -> None: ...
+
+    def reset(self) -> None:
+        """Forget the state held by this process."""
+
+
+class MemoryThrottleState:
+    """State of this worker; no operation awaits, so each one is atomic on the event loop."""
+
+    # Expired entries are swept every this many writes
+    SWEEP_EVERY = 1000
+
+    __slots__ = ("entries", "_writes")
+
+    def __init__(self) -> None:
+        self.entries: dict[str, tuple[list[float], float]] = {}
+        self._writes = 0
+
+    async def get(self, key: str) -> list[float] | None:
+        entry = self.entries.get(key)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    async def update(self, key: str, change: Change) -> list[float]:
+        state, expires_in = change(await self.get(key))
+        self.entries[key] = (state, time.monotonic() + expires_in)
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            now = time.monotonic()
+            self.entries = {k: entry for k, entry in self.entries.items() if entry[1] > now}
+        return state
+
+    async def delete(self, key: str) -> None:
+        self.entries.pop(key, None)
+
+    def reset(self) -> None:
+        self.entries.clear()
+        self._writes = 0
+
+
+class RedisThrottleState:
+    """State shared by every worker in Redis; updates are WATCH/MULTI transactions retried on conflict."""
+
+    __slots__ = ("redis",)
+
+    def __init__(self, url: str) -> None:
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise MissingDependencyException("redis", "redis", "redis") from e
+
+        self.redis = Redis.from_url(url)
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return f"login_throttle:{key}"
+
+    async def get(self, key: str) -> list[float] | None:
+        raw = await self.redis.get(self._name(key))
+        return decode_json(raw) if raw is not None else None
+
+    async def update(self, key: str, change: Change) -> list[float]:
+        from redis.exceptions import WatchError
+
+        name = self._name(key)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(name)
+                    raw = await pipe.get(name)
+                    state, expires_in = change(decode_json(raw) if raw is not None else None)
+                    pipe.multi()
+                    pipe.set(name, encode_json(state), ex=max(1, expires_in))
+                    await pipe.execute()
+                    return state
+                except WatchError:
+                    # Another worker changed the key between WATCH and EXEC
+                    continue
+
+    async def delete(self, key: str) -> None:
+        await self.redis.delete(self._name(key))
+
+    def reset(self) -> None:
+        # Shared state outlives the process
+        pass
+
+
+class LoginThrottle:
+    """Token buckets keyed by IP and username, escalating backoff keyed by (username, IP)."""
+
+    __slots__ = ("state", "stats")
+
+    def __init__(self, state: ThrottleState) -> None:
+        self.state = state
+        self.stats = ThrottleStats()
+
+    @staticmethod
+    def _keys(username: str, client_ip: str) -> tuple[str, str, str, str]:
+        user = username.strip().lower()
+        return f"ip:{client_ip}", f"user:{user}", f"pair:{user}:{client_ip}", f"known:{user}:{client_ip}"
+
+    @staticmethod
+    def _refill(state: list[float] | None, burst: int, per_minute: float, now: float) -> float:
+        """Tokens available in a bucket at ``now`` (``state`` is ``[tokens, updated_at]``)."""
+        if state is None:
+            return float(burst)
+        tokens, updated_at = state
+        return min(float(burst), tokens + (now - updated_at) * per_minute / 60)
+
+    @classmethod
+    def _take(cls, burst: int, per_minute: float, now: float) -> Change:
+        def change(state: list[float] | None) -> tuple[list[float], int]:
+            # Floored at -burst: a bucket drained by an attack is full again within 2 x burst / rate
+            tokens = max(cls._refill(state, burst, per_minute, now) - 1, -float(burst))
+            return [tokens, now], math.ceil((burst - tokens) * 60 / per_minute)
+
+        return change
+
+    @staticmethod
+    def _fail(backoff_after: int, now: float) -> Change:
+        def change(state: list[float] | None) -> tuple[list[float], int]:
+            failures = int(state[0]) + 1 if state is not None else 1
+            blocked_until = now
+            if failures >= backoff_after:
+                blocked_until = now + min(2 ** (failures - backoff_after), settings.login_backoff_max_seconds)
+            return [failures, blocked_until], settings.login_backoff_max_seconds
+
+        return change
+
+    async def check(self, username: str, client_ip: str) -> int:
+        """Return 0 if the attempt may proceed, otherwise the seconds to wait."""
+        self.stats.attempts += 1
+        if not settings.login_throttle_enabled:
+            return 0
+
+        now = time.time()
+        ip_key, _, pair_key, _ = self._keys(username, client_ip)
+        waits = [0.0]
+
+        tokens = self._refill(await self.state.get(ip_key), settings.login_ip_burst, settings.login_ip_per_minute, now)
+        if tokens < 1:
+            waits.append((1 - tokens) * 60 / settings.login_ip_per_minute)
+
+        pair = await self.state.get(pair_key)
+        if pair is not None:
+            waits.append(pair[1] - now)
+
+        retry_after = max(waits)
+        if retry_after > 0:
+            self.stats.rejected += 1
+            return math.ceil(retry_after)
+        return 0
+
+    async def record_failure(self, username: str, client_ip: str, verify_seconds: float | None = None) -> None:
+        """Consume a token from both buckets and extend the (username, IP) backoff."""
+        self.stats.failures += 1
+        if verify_seconds is not None:
+            self._observe_verify(verify_seconds)
+        if not settings.login_throttle_enabled:
+            return
+
+        now = time.time()
+        ip_key, user_key, pair_key, known_key = self._keys(username, client_ip)
+
+        await self.state.update(ip_key, self._take(settings.login_ip_burst, settings.login_ip_per_minute, now))
+        user_tokens, _ = await self.state.update(
+            user_key, self._take(settings.login_user_burst, settings.login_user_per_minute, now)
+        )
+
+        backoff_after = settings.login_backoff_after
+        if user_tokens < 0 and await self.state.get(known_key) is None:
+            # Account under attack and an IP its owner never used: back off from the first failure
+            backoff_after = 1
+        await self.state.update(pair_key, self._fail(backoff_after, now))
+
+    async def record_success(self, username: str, client_ip: str, verify_seconds: float) -> None:
+        """Clear the (username, IP) backoff, remember the IP and update the Argon2 timing average."""
+        self._observe_verify(verify_seconds)
+        if not settings.login_throttle_enabled:
+            return
+        _, _, pair_key, known_key = self._keys(username, client_ip)
+        await self.state.delete(pair_key)
+        known_seconds = settings.login_known_ip_days * 86400
+        await self.state.update(known_key, lambda _: ([time.time()], known_seconds))
+
+    def reset(self) -> None:
+        """Forget the counters and the state held by this process."""
+        self.stats = ThrottleStats()
+        self.state.reset()
+
+    def _observe_verify(self, seconds: float) -> None:
+        avg = self.stats.verify_seconds_avg
+        self.stats.verify_seconds_avg = seconds if avg == 0 else avg * 0.9 + seconds * 0.1
+
+
+def _default_state() -> ThrottleState:
+    if settings.login_throttle_redis_url:
+        return RedisThrottleState(settings.login_throttle_redis_url)
+    return MemoryThrottleState()
+
+
+login_throttle = LoginThrottle(state=_default_state())
@@ -0,0 +1,206 @@
+"""Trending books: exponentially decayed loan and review activity, kept in memory.
+
+Every loan and review adds its weight to the book's score, and the score halves
+every ``TRENDING_HALF_LIFE_HOURS``. Scores use *forward decay*: an event at
+time ``t`` adds ``weight * 2 ** ((t - epoch) / half_life)`` and nothing is ever
+decayed in place, so:
+
+* recording an event is ``O(1)`` plus an insertion in the top-K list;
+* a score only grows, so the top ``TRENDING_CAPACITY`` list can be maintained
+  exactly by insertion, without rescanning all books;
+* the current score is the stored one times ``2 ** (-(now - epoch) / half_life)``,
+  the same factor for every book, so rankings never need recomputing;
+* scores recorded by different workers add up.
+
+Each worker accumulates the deltas recorded by its own requests and, every
+``TRENDING_FLUSH_SECONDS``, adds them to ``book_trend_scores`` and reloads the
+totals, which also picks up the other workers' activity. A restart only reads
+that table; ``litestar trending-rebuild`` recomputes it from the loan and review
+history (needed after changing the half-life or the epoch).
+
+Weights grow by a factor of 2 per half-life since ``TRENDING_EPOCH``; doubles
+overflow after about 1000 half-lives (~19 years with the default week), so move
+the epoch forward and rebuild long before that.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+from bisect import insort
+from contextlib import asynccontextmanager
+from datetime import datetime, time, timedelta, timezone
+from typing import TYPE_CHECKING, AsyncIterator, Collection
+
+import anyio
+
+from app.config import settings
+from app.repositories.trending import TrendScoreRepository
+
+if TYPE_CHECKING:
+    from litestar import Litestar
+    from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Activity older than this many half-lives weighs less than 1e-6 of a new event
+_REBUILD_HALF_LIVES = 20
+
+
+def _epoch() -> datetime:
+    return datetime.combine(settings.trending_epoch, time(), tzinfo=timezone.utc)
+
+
+def _half_lives_since_epoch(at: datetime) -> float:
+    return (at - _epoch()).total_seconds() / (settings.trending_half_life_hours * 3600)
+
+
+def forward_weight(weight: float, at: datetime) -> float:
+    """``weight`` of an event at ``at`` in stored (forward-decayed) units."""
+    return weight * 2.0 ** _half_lives_since_epoch(at)
+
+
+def decayed(score: float, now: datetime | None = None) -> float:
+    """Stored score as seen at ``now``: the sum of each event weight halved per half-life since."""
+    return score * 2.0 ** -_half_lives_since_epoch(now or datetime.now(timezone.utc))
+
+
+class TrendingScores:
+    """Forward-decayed score per book, the top-K book ids, and deltas not yet persisted."""
+
+    __slots__ = ("scores", "pending", "top_ids", "_lock")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every score and pending delta (the next sync reloads the stored ones)."""
+        with self._lock:
+            self.scores: dict[int, float] = {}
+            self.pending: dict[int, float] = {}
+            # Book ids by score, highest first; at most TRENDING_CAPACITY entries
+            self.top_ids: list[int] = []
+
+    def record(self, book_id: int, weight: float, at: datetime | None = None) -> None:
+        """Add an event (a loan, a review) to the book's score."""
+        delta = forward_weight(weight, at or datetime.now(timezone.utc))
+        with self._lock:
+            self.pending[book_id] = self.pending.get(book_id, 0.0) + delta
+            self._add(book_id, delta)
+
+    def top(self, limit: int, among: Collection[int] | None = None) -> list[tuple[int, float]]:
+        """Up to ``limit`` ``(book_id, current score)`` pairs, highest first.
+
+        ``among`` restricts the ranking to those book ids (e.g. a category).
+        """
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            if among is None and (limit <= len(self.top_ids) or len(self.top_ids) == len(self.scores)):
+                ids = self.top_ids[:limit]
+            else:
+                candidates = self.scores if among is None else [i for i in among if i in self.scores]
+                ids = heapq.nlargest(limit, candidates, key=self.scores.__getitem__)
+            return [(book_id, decayed(self.scores[book_id], now)) for book_id in ids]
+
+    def forget(self, book_id: int) -> None:
+        """Drop a deleted book (its persisted row goes with the book)."""
+        with self._lock:
+            self.scores.pop(book_id, None)
+            self.pending.pop(book_id, None)
+            if book_id in self.top_ids:
+                self.top_ids.remove(book_id)
+
+    def sync(self, session: Session) -> None:
+        """Persist the pending deltas and reload the totals of every worker."""
+        with self._lock:
+            deltas, self.pending = self.pending, {}
+        repo = TrendScoreRepository(session=session)
+        try:
+            repo.add_deltas(deltas)
+            totals = repo.scores()
+            session.commit()
+        except Exception:
+            session.rollback()
+            with self._lock:
+                for book_id, delta in deltas.items():
+                    self.pending[book_id] = self.pending.get(book_id, 0.0) + delta
+            raise
+
+        with self._lock:
+            # Events recorded while the flush ran are not in ``totals`` yet
+            for book_id, delta in self.pending.items():
+                totals[book_id] = totals.get(book_id, 0.0) + delta
+            self.scores = totals
+            self.top_ids = heapq.nlargest(settings.trending_capacity, totals, key=totals.__getitem__)
+
+    # --- helpers (caller holds the lock) ---
+
+    def _add(self, book_id: int, delta: float) -> None:
+        scores = self.scores
+        score = scores[book_id] = scores.get(book_id, 0.0) + delta
+        top = self.top_ids
+        if book_id in top:
+            top.remove(book_id)
+        elif len(top) >= settings.trending_capacity:
+            if score <= scores[top[-1]]:
+                return
+            top.pop()
+        insort(top, book_id, key=lambda i: -scores[i])
+
+
+trending = TrendingScores()
+
+
+def rebuild_scores(session: Session) -> int:
+    """Recompute ``book_trend_scores`` from the loan and review history; return the number of books."""
+    half_life = timedelta(hours=settings.trending_half_life_hours)
+    since = (datetime.now(timezone.utc) - half_life * _REBUILD_HALF_LIVES).date()
+    weights = {"loan": settings.trending_loan_weight, "review": settings.trending_review_weight}
+
+    repo = TrendScoreRepository(session=session)
+    scores: dict[int, float] = {}
+    for book_id, day, kind in repo.activity_since(since):
+        at = datetime.combine(day, time(), tzinfo=timezone.utc)
+        scores[book_id] = scores.get(book_id, 0.0) + forward_weight(weights[kind], at)
+    repo.replace_all(scores)
+    session.commit()
+    return len(scores)
+
+
+@asynccontextmanager
+async def trending_flusher(_: Litestar) -> AsyncIterator[None]:
+    """Load the scores at startup, persist them periodically and once more on shutdown."""
+    if not settings.trending_enabled:
+        yield
+        return
+
+    from app.db import sqlalchemy_config
+
+    def sync() -> None:
+        with sqlalchemy_config.get_session() as session:
+            trending.sync(session)
+
+    async def sync_forever() -> None:
+        while True:
+            await anyio.sleep(settings.trending_flush_seconds)
+            try:
+                await anyio.to_thread.run_sync(sync)
+            except Exception:
+                # Database unavailable: deltas stay pending until the next flush
+                logger.exception("No se pudieron guardar las puntuaciones de tendencia; se reintentará")
+
+    await anyio.to_thread.run_sync(sync)
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(sync_forever)
+        try:
+            yield
+        finally:
+            tg.cancel_scope.cancel()
+            # Last flush; if the database is gone these deltas are lost (rebuild recovers them)
+            with anyio.CancelScope(shield=True):
+                try:
+                    await anyio.to_thread.run_sync(sync)
+                except Exception:
+                    logger.exception("No se pudieron guardar las últimas puntuaciones de tendencia")
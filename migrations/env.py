@@ -5,6 +5,7 @@ from alembic import context
 from sqlalchemy import engine_from_config, pool
 
 from app.config import settings
+from app.migration_toolkit import apply_lock_timeout, is_dry_run
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -66,7 +67,18 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        apply_lock_timeout(connection)
+        # One transaction per revision: a long migration doesn't keep the
+        # locks of the ones before it (see app/migration_toolkit.py)
+        context.configure(connection=connection, target_metadata=target_metadata, transaction_per_migration=True)
+
+        if is_dry_run():
+            # Everything runs in this outer transaction and is rolled back
+            with connection.begin() as transaction:
+                with context.begin_transaction():
+                    context.run_migrations()
+                transaction.rollback()
+            return
 
         with context.begin_transaction():
             context.run_migrations()
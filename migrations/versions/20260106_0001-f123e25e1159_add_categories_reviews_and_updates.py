@@ -57,15 +57,13 @@ def upgrade() -> None:
     op.create_index(op.f("ix_book_categories_category_id"), "book_categories", ["category_id"])
 
     # --- users ---
-    op.add_column("users", sa.Column("email", sa.String(), nullable=False))
+    op.add_column("users", sa.Column("email", sa.String(), nullable=True))
     op.add_column("users", sa.Column("phone", sa.String(), nullable=True))
     op.add_column("users", sa.Column("address", sa.String(), nullable=True))
     op.add_column("users", sa.Column("is_active", sa.Boolean(), nullable=False, server_default=sa.true()))
     op.create_unique_constraint(op.f("uq_users_email"), "users", ["email"])
     op.alter_column("users", "is_active", server_default=None)
-
-    # For existing rows, populate a placeholder email if needed (avoid nulls)
-    op.execute("UPDATE users SET email = username || '@example.com' WHERE email IS NULL OR email = ''")
+    # users.email is filled and made NOT NULL by the next revision (e7a3c5d1b948)
 
     # --- loan status enum ---
     loan_status_enum = sa.Enum("ACTIVE", "RETURNED", "OVERDUE", name="loanstatus")
@@ -76,15 +74,8 @@ def upgrade() -> None:
     op.add_column("loans", sa.Column("due_date", sa.Date(), nullable=True))
     op.add_column("loans", sa.Column("fine_amount", sa.Numeric(10, 2), nullable=True))
     op.add_column("loans", sa.Column("status", loan_status_enum, nullable=False, server_default="ACTIVE"))
-
-    # Set due_date for existing rows: loan_dt + 14 days
-    if dialect == "sqlite":
-        op.execute("UPDATE loans SET due_date = date(loan_dt, '+14 day') WHERE due_date IS NULL")
-    else:
-        op.execute("UPDATE loans SET due_date = loan_dt + INTERVAL '14 day' WHERE due_date IS NULL")
-
-    op.alter_column("loans", "due_date", nullable=False)
     op.alter_column("loans", "status", server_default=None)
+    # loans.due_date is filled and made NOT NULL by the next revision (e7a3c5d1b948)
 
     # --- reviews ---
     op.create_table(
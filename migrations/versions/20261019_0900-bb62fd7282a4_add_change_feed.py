@@ -0,0 +1,51 @@
+"""Add change feed indexes and tombstones
+
+Revision ID: bb62fd7282a4
+Revises: e7a3c5d1b948
+Create Date: 2026-10-19
+
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bb62fd7282a4"
+down_revision: Union[str, Sequence[str], None] = "e7a3c5d1b948"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # --- keyset indexes for GET /{resource}/changes ---
+    op.create_index("ix_books_updated_at_id", "books", ["updated_at", "id"])
+    op.create_index("ix_users_updated_at_id", "users", ["updated_at", "id"])
+    op.create_index("ix_loans_updated_at_id", "loans", ["updated_at", "id"])
+
+    # --- tombstones for deleted rows ---
+    op.create_table(
+        "tombstones",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("resource", sa.String(), nullable=False),
+        sa.Column("record_id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_tombstones")),
+    )
+    op.create_index("ix_tombstones_resource_updated_at_id", "tombstones", ["resource", "updated_at", "id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_tombstones_resource_updated_at_id", table_name="tombstones")
+    op.drop_table("tombstones")
+
+    op.drop_index("ix_loans_updated_at_id", table_name="loans")
+    op.drop_index("ix_users_updated_at_id", table_name="users")
+    op.drop_index("ix_books_updated_at_id", table_name="books")
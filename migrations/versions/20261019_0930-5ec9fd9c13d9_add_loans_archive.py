@@ -0,0 +1,59 @@
+"""Add loans_archive for cold RETURNED loans
+
+Revision ID: 5ec9fd9c13d9
+Revises: bb62fd7282a4
+Create Date: 2026-10-19
+
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5ec9fd9c13d9"
+down_revision: Union[str, Sequence[str], None] = "bb62fd7282a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+
+    # Reuse the existing loanstatus type so hot and archived rows can be UNIONed
+    if dialect == "postgresql":
+        loan_status_enum = postgresql.ENUM("ACTIVE", "RETURNED", "OVERDUE", name="loanstatus", create_type=False)
+    else:
+        loan_status_enum = sa.Enum("ACTIVE", "RETURNED", "OVERDUE", name="loanstatus")
+
+    op.create_table(
+        "loans_archive",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("loan_dt", sa.Date(), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("return_dt", sa.Date(), nullable=True),
+        sa.Column("fine_amount", sa.Numeric(10, 2), nullable=True),
+        sa.Column("status", loan_status_enum, nullable=False),
+        sa.Column("user_id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("book_id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("archived_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"], name=op.f("fk_loans_archive_book_id_books")),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name=op.f("fk_loans_archive_user_id_users")),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_loans_archive")),
+    )
+    op.create_index(op.f("ix_loans_archive_user_id"), "loans_archive", ["user_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_loans_archive_user_id"), table_name="loans_archive")
+    op.drop_table("loans_archive")
@@ -0,0 +1,52 @@
+"""Add user_fine_balances ledger
+
+Revision ID: 82542a57cb81
+Revises: 5ec9fd9c13d9
+Create Date: 2026-10-19
+
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "82542a57cb81"
+down_revision: Union[str, Sequence[str], None] = "5ec9fd9c13d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_fine_balances",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("user_id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("assessed_amount", sa.Numeric(12, 2), nullable=False),
+        sa.Column("fined_loans", sa.Integer(), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], name=op.f("fk_user_fine_balances_user_id_users"), ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_user_fine_balances")),
+        sa.UniqueConstraint("user_id", name=op.f("uq_user_fine_balances_user_id")),
+    )
+
+    # Seed balances from fines already assessed on returned loans, hot and archived
+    # (same rule as app.repositories.fine.rebuild_fine_balances)
+    op.execute(
+        "INSERT INTO user_fine_balances (user_id, assessed_amount, fined_loans, created_at, updated_at) "
+        "SELECT user_id, SUM(fine_amount), COUNT(*), CURRENT_TIMESTAMP, CURRENT_TIMESTAMP FROM ("
+        "SELECT user_id, fine_amount FROM loans WHERE status = 'RETURNED' AND fine_amount > 0 "
+        "UNION ALL SELECT user_id, fine_amount FROM loans_archive WHERE fine_amount > 0"
+        ") AS fined GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_fine_balances")
@@ -0,0 +1,31 @@
+"""Add users.token_version for JWT revocation
+
+Revision ID: 9f873ef9e398
+Revises: 82542a57cb81
+Create Date: 2026-10-19
+
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9f873ef9e398"
+down_revision: Union[str, Sequence[str], None] = "82542a57cb81"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("token_version", sa.Integer(), nullable=False, server_default="0"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "token_version")
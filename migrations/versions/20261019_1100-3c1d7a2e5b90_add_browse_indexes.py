@@ -0,0 +1,35 @@
+"""Add indexes for the /books/browse filters and facets
+
+Revision ID: 3c1d7a2e5b90
+Revises: 9f873ef9e398
+Create Date: 2026-10-19
+
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+from app.migration_toolkit import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3c1d7a2e5b90"
+down_revision: Union[str, Sequence[str], None] = "9f873ef9e398"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    create_index_concurrently("ix_books_published_year", "books", ["published_year"])
+    create_index_concurrently("ix_books_language", "books", ["language"])
+    create_index_concurrently("ix_books_publisher", "books", ["publisher"])
+    create_index_concurrently("ix_book_categories_category_id", "book_categories", ["category_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently("ix_book_categories_category_id", "book_categories")
+    drop_index_concurrently("ix_books_publisher", "books")
+    drop_index_concurrently("ix_books_language", "books")
+    drop_index_concurrently("ix_books_published_year", "books")
@@ -0,0 +1,54 @@
+"""Add outbox_events for the transactional outbox
+
+Revision ID: 7d2b4f81c6e3
+Revises: 3c1d7a2e5b90
+Create Date: 2026-10-19
+
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7d2b4f81c6e3"
+down_revision: Union[str, Sequence[str], None] = "3c1d7a2e5b90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+outbox_status = sa.Enum("PENDING", "DONE", "FAILED", name="outboxstatus")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "outbox_events",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("topic", sa.String(), nullable=False),
+        sa.Column("payload", advanced_alchemy.types.json.JsonB(), nullable=False),
+        sa.Column("status", outbox_status, nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("available_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("processed_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=True),
+        sa.Column("last_error", sa.String(), nullable=True),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_outbox_events")),
+    )
+    op.create_index(
+        "ix_outbox_events_status_available_at_id",
+        "outbox_events",
+        ["status", "available_at", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_outbox_events_status_available_at_id", table_name="outbox_events")
+    op.drop_table("outbox_events")
+    outbox_status.drop(op.get_bind(), checkfirst=True)
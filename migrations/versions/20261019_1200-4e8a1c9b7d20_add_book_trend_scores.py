@@ -0,0 +1,41 @@
+"""Add book_trend_scores for trending books
+
+Revision ID: 4e8a1c9b7d20
+Revises: 7d2b4f81c6e3
+Create Date: 2026-10-19
+
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4e8a1c9b7d20"
+down_revision: Union[str, Sequence[str], None] = "7d2b4f81c6e3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "book_trend_scores",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("book_id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("score", sa.Float(precision=53), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["book_id"], ["books.id"], name=op.f("fk_book_trend_scores_book_id_books"), ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_book_trend_scores")),
+        sa.UniqueConstraint("book_id", name=op.f("uq_book_trend_scores_book_id")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("book_trend_scores")
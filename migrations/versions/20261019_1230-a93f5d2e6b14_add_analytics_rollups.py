@@ -0,0 +1,99 @@
+"""Add circulation analytics rollups
+
+Revision ID: a93f5d2e6b14
+Revises: 4e8a1c9b7d20
+Create Date: 2026-10-19
+
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+from app.migration_toolkit import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a93f5d2e6b14"
+down_revision: Union[str, Sequence[str], None] = "4e8a1c9b7d20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The loanstatus type already exists (created with the loans table)
+loan_status = postgresql.ENUM("ACTIVE", "RETURNED", "OVERDUE", name="loanstatus", create_type=False)
+
+
+def _audit_columns() -> list[sa.Column]:
+    return [
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    big_int = sa.BigInteger().with_variant(sa.Integer(), "sqlite")
+
+    # The concurrent index builds below commit these tables first: IF NOT EXISTS lets a failed run be resumed
+    op.create_table(
+        "loan_daily_rollups",
+        sa.Column("id", big_int, nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("book_id", big_int, nullable=False),
+        sa.Column("status", loan_status, nullable=False),
+        sa.Column("loans", sa.Integer(), nullable=False),
+        sa.Column("late", sa.Integer(), nullable=False),
+        *_audit_columns(),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_loan_daily_rollups")),
+        sa.UniqueConstraint("day", "book_id", "status", name=op.f("uq_loan_daily_rollups_day")),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "fine_monthly_rollups",
+        sa.Column("id", big_int, nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("book_id", big_int, nullable=False),
+        sa.Column("returns", sa.Integer(), nullable=False),
+        sa.Column("late_returns", sa.Integer(), nullable=False),
+        sa.Column("fines", sa.Numeric(12, 2), nullable=False),
+        *_audit_columns(),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_fine_monthly_rollups")),
+        sa.UniqueConstraint("month", "book_id", name=op.f("uq_fine_monthly_rollups_month")),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "analytics_watermarks",
+        sa.Column("id", big_int, nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("watermark", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        *_audit_columns(),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_analytics_watermarks")),
+        sa.UniqueConstraint("name", name=op.f("uq_analytics_watermarks_name")),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "analytics_deleted_loans",
+        sa.Column("id", big_int, nullable=False),
+        sa.Column("loan_dt", sa.Date(), nullable=False),
+        sa.Column("return_dt", sa.Date(), nullable=True),
+        sa.Column("book_id", big_int, nullable=False),
+        *_audit_columns(),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_analytics_deleted_loans")),
+        if_not_exists=True,
+    )
+    create_index_concurrently("ix_loans_book_id_loan_dt", "loans", ["book_id", "loan_dt"])
+    create_index_concurrently("ix_loans_archive_book_id_loan_dt", "loans_archive", ["book_id", "loan_dt"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    drop_index_concurrently("ix_loans_archive_book_id_loan_dt", "loans_archive")
+    drop_index_concurrently("ix_loans_book_id_loan_dt", "loans")
+    op.drop_table("analytics_deleted_loans")
+    op.drop_table("analytics_watermarks")
+    op.drop_table("fine_monthly_rollups")
+    op.drop_table("loan_daily_rollups")
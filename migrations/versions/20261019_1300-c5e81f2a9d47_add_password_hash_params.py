@@ -0,0 +1,44 @@
+"""Add password_hash_params for the Argon2 calibrations
+
+Revision ID: c5e81f2a9d47
+Revises: a93f5d2e6b14
+Create Date: 2026-10-19
+
+"""
+from __future__ import annotations
+
+from typing import Sequence, Union
+
+import advanced_alchemy
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e81f2a9d47"
+down_revision: Union[str, Sequence[str], None] = "a93f5d2e6b14"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "password_hash_params",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("time_cost", sa.Integer(), nullable=False),
+        sa.Column("memory_kib", sa.Integer(), nullable=False),
+        sa.Column("parallelism", sa.Integer(), nullable=False),
+        sa.Column("hash_ms", sa.Float(), nullable=False),
+        sa.Column("target_ms", sa.Float(), nullable=False),
+        sa.Column("host", sa.String(), nullable=False),
+        sa.Column("trials", advanced_alchemy.types.json.JsonB(), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_password_hash_params")),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("password_hash_params")
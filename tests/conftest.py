@@ -0,0 +1,26 @@
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Before anything reads the settings; TemplateDatabase refuses names without "test"
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{Path(tempfile.gettempdir()) / 'biblioteca_test.db'}")
+
+from app.testing import TemplateDatabase, client, login  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def template_db():
+    db = TemplateDatabase()
+    db.build()
+    yield db
+    db.drop()
+
+
+@pytest.fixture
+def api(template_db):
+    template_db.reset()
+    with client() as c:
+        login(c, "user1", "1234")
+        yield c
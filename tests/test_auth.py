@@ -0,0 +1,43 @@
+from app.config import settings
+
+
+def attempt(api, username, password="incorrecta"):
+    return api.post("/auth/login", data={"username": username, "password": password})
+
+
+def test_repeated_failures_back_off_the_pair_before_checking_the_password(api):
+    for _ in range(settings.login_backoff_after):
+        assert attempt(api, "user1").status_code == 401
+
+    response = attempt(api, "user1", "1234")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    stats = api.get("/auth/throttle-stats").json()
+    assert stats["failures"] == settings.login_backoff_after
+    assert stats["rejected"] == 1
+
+
+def test_success_clears_the_backoff(api):
+    for _ in range(settings.login_backoff_after - 1):
+        assert attempt(api, "user1").status_code == 401
+    assert attempt(api, "user1", "1234").status_code == 201
+    for _ in range(settings.login_backoff_after - 1):
+        assert attempt(api, "user1").status_code == 401
+    assert attempt(api, "user1", "1234").status_code == 201
+
+
+def test_ip_bucket_limits_failures_across_usernames(api, monkeypatch):
+    monkeypatch.setattr(settings, "login_ip_burst", 2)
+    assert attempt(api, "nadie-1").status_code == 401
+    assert attempt(api, "nadie-2").status_code == 401
+    response = attempt(api, "nadie-3")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_disabled_throttle_never_rejects(api, monkeypatch):
+    monkeypatch.setattr(settings, "login_throttle_enabled", False)
+    for _ in range(settings.login_backoff_after + 2):
+        assert attempt(api, "user1").status_code == 401
+    assert attempt(api, "user1", "1234").status_code == 201
@@ -0,0 +1,47 @@
+def browse(api, **params):
+    response = api.get("/books/browse", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def counts(page, facet):
+    return {entry["value"]: entry["count"] for entry in page["facets"][facet]}
+
+
+def test_facets_count_every_match_not_only_the_page(api):
+    page = browse(api, limit=3)
+    assert page["total"] == 10
+    assert [book["title"] for book in page["items"]] == ["Libro 1", "Libro 10", "Libro 2"]
+    assert counts(page, "languages") == {"en": 4, "es": 3, "fr": 3}
+    assert sum(counts(page, "publishers").values()) == 10
+    assert {entry["label"] for entry in page["facets"]["categories"]} >= {"Ficción", "Ciencia"}
+
+
+def test_filters_narrow_items_total_and_facets_together(api):
+    page = browse(api, language="en")
+    assert page["total"] == 4 == len(page["items"])
+    assert {book["language"] for book in page["items"]} == {"en"}
+    assert counts(page, "languages") == {"en": 4}
+    assert sum(counts(page, "years").values()) == 4
+
+    page = browse(api, year_from=2003, year_to=2005)
+    assert sorted(book["published_year"] for book in page["items"]) == [2003, 2004, 2005]
+
+
+def test_category_mode_any_or_all(api):
+    assert browse(api, category=[1, 3])["total"] == 4
+    assert browse(api, category=[1, 3], category_mode="all")["total"] == 0
+    assert browse(api, category=[1, 1], category_mode="all")["total"] == 2
+
+
+def test_availability_filter_and_facet(api):
+    assert api.post("/loans", json={"user_id": 1, "book_id": 3}).status_code == 201
+    page = browse(api, available=False)
+    assert [book["id"] for book in page["items"]] == [3]
+    assert counts(browse(api), "availability") == {"true": 9, "false": 1}
+
+
+def test_invalid_filters_are_rejected(api):
+    assert api.get("/books/browse", params={"language": "xx"}).status_code == 400
+    assert api.get("/books/browse", params={"year_from": 2005, "year_to": 2001}).status_code == 400
+    assert api.get("/books/browse", params={"limit": 0}).status_code == 400
@@ -0,0 +1,54 @@
+from sqlalchemy import update
+
+from app.catalog import catalog
+from app.db import sqlalchemy_config
+from app.models import Book
+
+CATALOG_FIELDS = {"fields": "id,title,stock"}
+
+
+def availability(api, book_id):
+    response = api.get(f"/books/{book_id}/availability")
+    assert response.status_code == 200
+    return response.json()
+
+
+def available_ids(api):
+    return {book["id"] for book in api.get("/books/available", params=CATALOG_FIELDS).json()}
+
+
+def test_loans_and_returns_update_the_live_stock(api):
+    assert availability(api, 3) == {"book_id": 3, "stock": 1, "available": True}
+    assert 3 in available_ids(api)
+
+    loan = api.post("/loans", json={"user_id": 1, "book_id": 3})
+    assert loan.status_code == 201
+    assert availability(api, 3) == {"book_id": 3, "stock": 0, "available": False}
+    assert 3 not in available_ids(api)
+    assert api.post("/loans", json={"user_id": 2, "book_id": 3}).status_code == 400
+
+    assert api.post(f"/loans/{loan.json()['id']}/return").status_code == 201
+    assert api.get("/books/3", params=CATALOG_FIELDS).json()["stock"] == 1
+    assert 3 in available_ids(api)
+
+
+def test_book_writes_update_the_snapshot(api):
+    assert api.patch("/books/1", json={"title": "Otro título"}).status_code == 200
+    assert api.get("/books/1", params=CATALOG_FIELDS).json()["title"] == "Otro título"
+
+    assert api.delete("/books/9").status_code == 204
+    assert api.get("/books/9", params=CATALOG_FIELDS).status_code == 404
+    assert api.get("/books/9/availability").status_code == 404
+
+
+def test_reconcile_picks_up_writes_from_other_workers(api):
+    assert availability(api, 1)["stock"] > 0
+
+    # Written behind this worker's back: the snapshot keeps serving the old value
+    with sqlalchemy_config.get_session() as session:
+        session.execute(update(Book).where(Book.id == 1).values(stock=0))
+        session.commit()
+        assert availability(api, 1)["available"] is True
+
+        assert catalog.reconcile(session) >= 1
+    assert availability(api, 1) == {"book_id": 1, "stock": 0, "available": False}
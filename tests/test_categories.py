@@ -0,0 +1,52 @@
+def snapshot_ids(api, category_id):
+    """Books of a category as served from the catalog snapshot."""
+    response = api.get(f"/books/by-category/{category_id}", params={"fields": "id,title"})
+    return sorted(book["id"] for book in response.json())
+
+
+def database_ids(api, category_id):
+    response = api.get("/books/browse", params={"category": category_id, "limit": 100})
+    return sorted(book["id"] for book in response.json()["items"])
+
+
+def set_categories(api, book_id, category_ids):
+    return api.put(f"/books/{book_id}/categories", json={"category_ids": category_ids})
+
+
+def test_put_book_categories_writes_only_the_difference(api):
+    response = set_categories(api, 1, [1, 3])
+    assert response.status_code == 200
+    assert response.json() == {"added": 1, "removed": 0}
+    assert snapshot_ids(api, 3) == database_ids(api, 3) == [1, 3, 8]
+
+    assert set_categories(api, 1, [3]).json() == {"added": 0, "removed": 1}
+    assert set_categories(api, 1, [3]).json() == {"added": 0, "removed": 0}
+    assert snapshot_ids(api, 1) == database_ids(api, 1) == [6]
+
+    assert set_categories(api, 1, []).json() == {"added": 0, "removed": 1}
+    assert snapshot_ids(api, 3) == database_ids(api, 3) == [3, 8]
+
+
+def test_put_book_categories_rejects_missing_ids(api):
+    response = set_categories(api, 1, [2, 99])
+    assert response.status_code == 400
+    assert "99" in response.json()["detail"]
+    assert database_ids(api, 2) == [2, 7]
+    assert set_categories(api, 999, [1]).status_code == 404
+
+
+def test_post_category_books_adds_and_removes(api):
+    response = api.post("/categories/2/books", json={"add": [1, 3, 7], "remove": [2]})
+    assert response.status_code == 200
+    assert response.json() == {"added": 2, "removed": 1}
+    assert snapshot_ids(api, 2) == database_ids(api, 2) == [1, 3, 7]
+
+    again = api.post("/categories/2/books", json={"add": [1, 3], "remove": [2]})
+    assert again.json() == {"added": 0, "removed": 0}
+
+
+def test_post_category_books_rejects_bad_requests(api):
+    assert api.post("/categories/2/books", json={"add": [99]}).status_code == 400
+    assert api.post("/categories/2/books", json={"add": [1], "remove": [1]}).status_code == 400
+    assert api.post("/categories/99/books", json={"add": [1]}).status_code == 404
+    assert database_ids(api, 2) == [2, 7]
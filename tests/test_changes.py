@@ -0,0 +1,51 @@
+import json
+
+import pytest
+
+from app.config import settings
+
+
+@pytest.fixture(autouse=True)
+def no_lag(monkeypatch):
+    monkeypatch.setattr(settings, "change_feed_lag_seconds", 0)
+
+
+def changes(api, resource, **params):
+    response = api.get(f"/{resource}/changes", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    *entries, last = [json.loads(line) for line in response.text.splitlines()]
+    assert last["op"] == "cursor"
+    return entries, last
+
+
+def test_first_sync_returns_every_row_then_resumes_from_the_cursor(api):
+    entries, last = changes(api, "books")
+    assert {e["op"] for e in entries} == {"upsert"}
+    assert len(entries) == 10
+    assert last["has_more"] is False
+
+    assert api.patch("/books/1", json={"title": "Cambiado"}).status_code == 200
+    assert api.delete("/books/9").status_code == 204
+    entries, _ = changes(api, "books", since=last["cursor"])
+    assert [(e["op"], e["id"]) for e in entries] == [("upsert", 1), ("delete", 9)]
+    assert entries[0]["data"]["title"] == "Cambiado"
+
+
+def test_limit_pages_through_the_feed(api):
+    entries, last = changes(api, "books", limit=4)
+    assert len(entries) == 4 and last["has_more"] is True
+    rest, last = changes(api, "books", since=last["cursor"])
+    assert len(rest) == 6 and last["has_more"] is False
+    assert {e["id"] for e in entries}.isdisjoint(e["id"] for e in rest)
+
+
+def test_user_changes_never_include_secrets(api):
+    entries, _ = changes(api, "users")
+    assert entries and all("password" not in e["data"] and "token_version" not in e["data"] for e in entries)
+
+
+def test_since_accepts_an_iso_datetime_and_rejects_garbage(api):
+    entries, _ = changes(api, "books", since="2100-01-01T00:00:00")
+    assert entries == []
+    assert api.get("/books/changes", params={"since": "no-es-un-cursor"}).status_code == 400
@@ -0,0 +1,18 @@
+import anyio
+import pytest
+
+from app.dashboard import DASHBOARD_QUERY_BUDGET, build_dashboard
+from app.db import count_queries, sqlalchemy_config
+from app.repositories.dashboard import DashboardRepository
+
+
+@pytest.mark.parametrize("user_id", [1, 4])
+def test_dashboard_stays_within_query_budget(template_db, user_id):
+    template_db.reset()
+    with sqlalchemy_config.get_session() as session:
+        repo = DashboardRepository(session=session)
+        with count_queries() as counter:
+            dashboard = anyio.run(build_dashboard, user_id, 5, repo)
+
+    assert dashboard.recent_reviews
+    assert 0 < counter.count <= DASHBOARD_QUERY_BUDGET
@@ -0,0 +1,83 @@
+import json
+import time
+
+import pytest
+
+from app.events import live_events
+
+
+def parse(body):
+    """SSE messages as ``(event, id, data)``; comments and blank lines are skipped."""
+    messages = []
+    for block in body.strip().split("\r\n\r\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if line and not line.startswith(":"))
+        if fields:
+            messages.append((fields.get("event"), fields.get("id"), json.loads(fields["data"])))
+    return messages
+
+
+def wait_for(stream, count):
+    """Events are fanned out on the event loop after the handler returns."""
+    deadline = time.monotonic() + 2
+    while len(live_events.buffers[stream]) < count:
+        assert time.monotonic() < deadline, f"{stream}: {len(live_events.buffers[stream])} eventos"
+        time.sleep(0.01)
+    return list(live_events.buffers[stream])
+
+
+@pytest.fixture
+def replay(api):
+    """Read a stream as a client reconnecting to a worker that is shutting down.
+
+    The streams never end while the worker serves, and the test client waits
+    for the whole body: with the loop detached a stream sends what it has
+    queued (the replay) and closes.
+    """
+
+    def read(stream, last_event_id):
+        loop, live_events._loop = live_events._loop, None
+        try:
+            response = api.get(f"/events/{stream}", headers={"Last-Event-ID": last_event_id})
+        finally:
+            live_events._loop = loop
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        return parse(response.text)
+
+    return read
+
+
+def test_reconnecting_client_gets_the_missed_events(api, replay):
+    loan = api.post("/loans", json={"user_id": 1, "book_id": 3}).json()
+    assert api.post(f"/loans/{loan['id']}/return").status_code == 201
+    assert api.patch("/books/3/stock", params={"quantity": 5}).status_code == 200
+
+    first, *missed = wait_for("stock", 3)
+    assert replay("stock", first.id) == [("stock", e.id, e.data) for e in missed]
+    assert [data for _, _, data in replay("stock", first.id)] == [
+        {"book_id": 3, "stock": 1},
+        {"book_id": 3, "stock": 6},
+    ]
+
+    created, returned = wait_for("loans", 2)
+    (event, event_id, data), = replay("loans", created.id)
+    assert (event, event_id) == ("returned", returned.id)
+    assert data["loan_id"] == loan["id"]
+    assert data["status"] == "RETURNED"
+
+
+def test_unknown_last_event_id_gets_a_reset(api, replay):
+    assert replay("stock", "0-0") == [("reset", None, {})]
+
+
+def test_overdue_sweep_is_published(api, replay):
+    # Marker event to reconnect from; a fresh loan isn't due for 14 days
+    assert api.post("/loans", json={"user_id": 1, "book_id": 1}).status_code == 201
+    marker, = wait_for("loans", 1)
+
+    assert api.get("/loans/overdue").status_code == 200
+    events = replay("loans", marker.id)
+    # Seeded ACTIVE loans 1 and 5 were due in December 2025
+    assert {event for event, _, _ in events} == {"overdue"}
+    assert sorted(data["loan_id"] for _, _, data in events) == [1, 5]
+    assert {data["status"] for _, _, data in events} == {"OVERDUE"}
@@ -0,0 +1,30 @@
+def assessed(api, user_id):
+    return api.get(f"/users/{user_id}/fines").json()["assessed_amount"]
+
+
+def test_fines_report_includes_seeded_balance(api):
+    report = api.get("/loans/fines-report").json()
+    rows = {row["user_id"]: row for row in report["items"]}
+    assert rows[4]["assessed_amount"] == "25000.00"
+    assert report["total"] == len(report["items"])
+    totals = [row["total_amount"] for row in report["items"]]
+    assert totals == sorted(totals, key=float, reverse=True)
+
+
+def test_late_return_adds_the_fine_to_the_balance(api):
+    returned = api.post("/loans/2/return").json()
+    assert float(returned["fine_amount"]) > 0
+    assert assessed(api, 2) == returned["fine_amount"]
+
+
+def test_deleting_a_fined_loan_drops_its_fine(api):
+    assert api.delete("/loans/4").status_code == 204
+    assert assessed(api, 4) == "0.00"
+
+
+def test_reopening_a_returned_loan_drops_its_fine(api):
+    assert api.patch("/loans/4", json={"status": "ACTIVE"}).status_code == 200
+    assert assessed(api, 4) == "0.00"
+
+    assert api.patch("/loans/4", json={"status": "RETURNED"}).status_code == 200
+    assert assessed(api, 4) == "25000.00"
@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.config import settings
+from app.limiter import limiter
+from app.repositories.book import BookRepository
+
+
+@pytest.fixture
+def slow_stats(monkeypatch):
+    """Keep ``/books/stats`` (analytics group) busy long enough to overlap other requests."""
+    original = BookRepository.count
+
+    def count(self, *args, **kwargs):
+        time.sleep(0.5)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(BookRepository, "count", count)
+
+
+@pytest.fixture
+def analytics(monkeypatch):
+    group = limiter.groups["analytics"]
+    monkeypatch.setattr(group, "max_running", 1)
+    monkeypatch.setattr(group, "queue_size", 0)
+    return group
+
+
+def while_busy(api, busy_path, *requests):
+    """Run ``requests`` (callables taking the client) while ``busy_path`` is being served."""
+    with ThreadPoolExecutor(max_workers=len(requests) + 1) as pool:
+        busy = pool.submit(api.get, busy_path)
+        time.sleep(0.15)
+        results = [pool.submit(request, api) for request in requests]
+        return busy.result(), [future.result() for future in results]
+
+
+def test_full_group_sheds_with_retry_after(api, slow_stats, analytics):
+    # Different query strings: single-flight doesn't coalesce them
+    busy, [shed] = while_busy(api, "/books/stats?n=1", lambda c: c.get("/books/stats?n=2"))
+    assert busy.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == str(int(settings.concurrency_queue_seconds["analytics"]))
+
+
+def test_queued_request_runs_when_the_slot_frees(api, slow_stats, analytics, monkeypatch):
+    monkeypatch.setattr(analytics, "queue_size", 1)
+    busy, [queued] = while_busy(api, "/books/stats?n=1", lambda c: c.get("/books/stats?n=2"))
+    assert (busy.status_code, queued.status_code) == (200, 200)
+
+
+def test_reserved_slots_keep_circulation_going(api, slow_stats, analytics, monkeypatch):
+    monkeypatch.setattr(settings, "concurrency_limit", 2)
+    monkeypatch.setattr(settings, "concurrency_reserved_circulation", 1)
+    monkeypatch.setattr(analytics, "max_running", 4)
+
+    busy, [report, loan] = while_busy(
+        api,
+        "/books/stats?n=1",
+        lambda c: c.get("/books/stats?n=2"),
+        lambda c: c.post("/loans", json={"user_id": 1, "book_id": 1}),
+    )
+    assert busy.status_code == 200
+    assert report.status_code == 503
+    assert loan.status_code == 201
+
+
+def test_metrics_are_never_limited(api, slow_stats, analytics):
+    busy, [metrics] = while_busy(api, "/books/stats", lambda c: c.get("/metrics"))
+    assert (busy.status_code, metrics.status_code) == (200, 200)
@@ -0,0 +1,38 @@
+import json
+from datetime import date
+
+from app.config import settings
+from app.db import sqlalchemy_config
+from app.repositories.loan import LoanRepository
+
+
+def changes(api, since=None):
+    response = api.get("/loans/changes", params={"since": since} if since else {})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    return lines[:-1], lines[-1]["cursor"]
+
+
+def test_change_feed_reports_archived_loans(api, monkeypatch):
+    monkeypatch.setattr(settings, "change_feed_lag_seconds", 0)
+    _, cursor = changes(api)
+
+    with sqlalchemy_config.get_session() as session:
+        archived = LoanRepository(session=session).archive_returned_loans(returned_before=date.today())
+    assert archived == 3
+
+    entries, _ = changes(api, cursor)
+    assert sorted(e["id"] for e in entries if e["op"] == "delete") == [3, 4, 7]
+
+
+def test_change_feed_holds_back_recent_changes(api, monkeypatch):
+    _, cursor = changes(api)
+    loan_id = api.post("/loans/", json={"user_id": 1, "book_id": 3}).json()["id"]
+
+    # Within the lag the new loan is not served, and the cursor stays behind it
+    entries, cursor = changes(api, cursor)
+    assert loan_id not in [e["id"] for e in entries]
+
+    monkeypatch.setattr(settings, "change_feed_lag_seconds", 0)
+    entries, _ = changes(api, cursor)
+    assert loan_id in [e["id"] for e in entries if e["op"] == "upsert"]
@@ -0,0 +1,66 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.repositories.book import BookRepository
+
+
+@pytest.fixture
+def slow_stats(monkeypatch):
+    """Make ``/books/stats`` slow enough for concurrent requests to overlap; record its runs."""
+    runs = []
+    lock = threading.Lock()
+    original = BookRepository.count
+
+    def count(self, *args, **kwargs):
+        with lock:
+            runs.append(len(runs))
+            run = runs[-1]
+        time.sleep(0.3)
+        if getattr(count, "fail_first", False) and run == 0:
+            raise RuntimeError("fallo simulado")
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(BookRepository, "count", count)
+    count.runs = runs
+    return count
+
+
+def concurrently(api, paths):
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        return list(pool.map(api.get, paths))
+
+
+def test_identical_concurrent_requests_run_the_handler_once(api, slow_stats):
+    responses = concurrently(api, ["/books/stats"] * 5)
+    assert [r.status_code for r in responses] == [200] * 5
+    assert len({r.content for r in responses}) == 1
+    assert len(slow_stats.runs) == 1
+
+    # Nothing is cached once the leader has answered
+    assert api.get("/books/stats").status_code == 200
+    assert len(slow_stats.runs) == 2
+
+
+def test_waiters_take_over_when_the_leader_fails(api, slow_stats):
+    slow_stats.fail_first = True
+    responses = concurrently(api, ["/books/stats"] * 3)
+    assert sorted(r.status_code for r in responses) == [200, 200, 500]
+    assert len(slow_stats.runs) == 2
+
+
+def test_routes_not_listed_are_not_coalesced(api, monkeypatch):
+    runs = []
+    original = BookRepository.list
+
+    def slow_list(self, *args, **kwargs):
+        runs.append(1)
+        time.sleep(0.2)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(BookRepository, "list", slow_list)
+    responses = concurrently(api, ["/books"] * 3)
+    assert [r.status_code for r in responses] == [200] * 3
+    assert len(runs) == 3
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+from app.testing import PROJECT_ROOT
+
+
+def test_dto_backends_are_shared_between_handlers():
+    from app import app  # noqa: F401  (builds every handler's DTO backends)
+    from app.dtos.book import BookReadDTO
+
+    backends = [backend for handler in BookReadDTO._dto_backends.values() for backend in handler.values()]
+    assert len({id(backend) for backend in backends}) < len(backends)
+
+
+def test_cold_start_within_budget():
+    result = subprocess.run(
+        [sys.executable, "-m", "litestar", "--app", "app:app", "startup-profile", "--check"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.mark.parametrize("run", [1, 2])
+def test_each_test_starts_from_the_seed(api, run):
+    titles = [book["title"] for book in api.get("/books/", params={"fields": "title"}).json()]
+    assert "Escrito por una prueba" not in titles
+
+    created = api.post(
+        "/books/",
+        json={"title": "Escrito por una prueba", "author": "Pytest", "isbn": f"test-{run}", "pages": 1, "published_year": 2026},
+    )
+    assert created.status_code == 201
+
+
+def test_seeded_fine_balances(api):
+    fines = api.get("/users/4/fines").json()
+    assert fines["assessed_amount"] == "25000.00"